@@ -1,7 +1,18 @@
+import time
+from collections import OrderedDict
+
 from fastapi import Depends, HTTPException, Request
 from jose import JWTError, jwt
+
 from app.core.config import settings
 
+# Verified tokens -> (expires_at, claims). The Studio UI polls many endpoints
+# with the same token, so repeat requests skip HMAC verification. Entries die
+# at the token's `exp`, and the cache is dropped if the signing key changes.
+_token_cache: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+_token_cache_secret = ""
+_token_cache_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
 
 def get_token(request: Request) -> str:
     auth = request.headers.get("Authorization")
@@ -10,16 +21,64 @@ def get_token(request: Request) -> str:
     return auth[7:]
 
 
+def decode_token(token: str) -> dict:
+    """Verify a Supabase JWT and return its claims. Raises JWTError if invalid.
+
+    Claims are shared between callers of the same token; treat them as read-only.
+    """
+    global _token_cache_secret
+    if _token_cache_secret != settings.supabase_anon_key:
+        _token_cache.clear()
+        _token_cache_secret = settings.supabase_anon_key
+
+    now = time.time()
+    entry = _token_cache.get(token)
+    if entry is not None:
+        if entry[0] > now:
+            _token_cache.move_to_end(token)
+            _token_cache_stats["hits"] += 1
+            return entry[1]
+        del _token_cache[token]
+    _token_cache_stats["misses"] += 1
+
+    # Supabase JWTs use the anon key as the secret with HS256
+    claims = jwt.decode(
+        token,
+        settings.supabase_anon_key,
+        algorithms=["HS256"],
+        audience="authenticated",
+    )
+    exp = claims.get("exp")
+    expires_at = float(exp) if isinstance(exp, (int, float)) else now + settings.auth_token_cache_ttl
+    _token_cache[token] = (min(expires_at, now + settings.auth_token_cache_ttl), claims)
+    if len(_token_cache) > settings.auth_token_cache_size:
+        _token_cache.popitem(last=False)
+        _token_cache_stats["evictions"] += 1
+    return claims
+
+
+def get_token_cache_stats() -> dict:
+    """Verified-token cache counters for the admin dashboard."""
+    lookups = _token_cache_stats["hits"] + _token_cache_stats["misses"]
+    return {
+        **_token_cache_stats,
+        "hit_rate": round(_token_cache_stats["hits"] / lookups, 4) if lookups else 0.0,
+        "entries": len(_token_cache),
+        "max_entries": settings.auth_token_cache_size,
+    }
+
+
+def clear_token_cache():
+    """Forget verified tokens and reset counters (used between tests)."""
+    _token_cache.clear()
+    for k in _token_cache_stats:
+        _token_cache_stats[k] = 0
+
+
 async def get_current_user(token: str = Depends(get_token)) -> dict:
     """Decode Supabase JWT and return user payload."""
     try:
-        # Supabase JWTs use the anon key as the secret with HS256
-        payload = jwt.decode(
-            token,
-            settings.supabase_anon_key,
-            algorithms=["HS256"],
-            audience="authenticated",
-        )
+        payload = decode_token(token)
         user_id = payload.get("sub")
         if not user_id:
             raise HTTPException(status_code=401, detail="Invalid token payload")
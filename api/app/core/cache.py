@@ -1,75 +1,575 @@
 """
-Redis cache layer — reduces repeated LLM calls and API queries.
-Gracefully degrades to no-op if Redis unavailable.
+Two-tier cache: an in-process LRU (L1) in front of Redis (L2).
+Degrades to L1-only while Redis is unavailable and retries the connection with
+backoff. Counters are kept per key prefix (the part before the first ":").
+Redis values are encoded by CacheCodec (versioned binary, compressed when large).
+
+L1 holds the same encoded bytes and decodes on every hit, so each caller gets
+its own copy and may mutate it.
 """
 
-import json
+import asyncio
+import functools
 import hashlib
-import os
+import inspect
+import json
+import math
+import random
+import time
+import zlib
+from collections import OrderedDict
 
 import redis.asyncio as redis
 import structlog
+from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import TimeoutError as RedisTimeoutError
+
+from app.core.cache_codec import CacheCodec
+from app.core.config import settings
 
 logger = structlog.get_logger()
 
 _redis = None
-_redis_available = True
+_redis_retry_at = 0.0
+_redis_failures = 0
+_REDIS_RETRY_BASE = 1.0
+
+_codec = CacheCodec(settings.cache_compress_threshold, settings.cache_compress_level)
+
+
+def set_cache_codec(codec: CacheCodec):
+    """Swap the codec used for Redis values (reads still accept older formats)."""
+    global _codec
+    _codec = codec
 
 
 async def get_redis():
-    """Get Redis connection, returns None if unavailable."""
-    global _redis, _redis_available
-    if not _redis_available:
+    """Get Redis connection, returns None if unavailable.
+
+    After a failure the connection is retried with exponential backoff
+    (capped at settings.cache_redis_retry_max) instead of being given up on.
+    """
+    global _redis, _redis_retry_at, _redis_failures
+    if _redis is not None:
+        return _redis
+    if time.monotonic() < _redis_retry_at:
         return None
-    if _redis is None:
-        try:
-            _redis = redis.from_url(
-                os.environ.get("REDIS_URL", "redis://localhost:6379"),
-                decode_responses=True,
-            )
-            await _redis.ping()
-        except Exception:
-            logger.warning("redis_unavailable")
-            _redis_available = False
-            _redis = None
+    try:
+        conn = redis.from_url(
+            settings.redis_url,
+            decode_responses=False,
+            socket_connect_timeout=settings.cache_redis_timeout,
+            socket_timeout=settings.cache_redis_timeout,
+        )
+        await conn.ping()
+    except Exception:
+        _mark_redis_down()
+        return None
+    if _redis_failures:
+        logger.info("redis_reconnected", after_failures=_redis_failures)
+    _redis = conn
+    _redis_failures = 0
     return _redis
 
 
+def _mark_redis_down():
+    global _redis, _redis_retry_at, _redis_failures
+    _redis = None
+    _redis_failures += 1
+    backoff = min(settings.cache_redis_retry_max, _REDIS_RETRY_BASE * 2 ** (_redis_failures - 1))
+    _redis_retry_at = time.monotonic() + backoff
+    logger.warning("redis_unavailable", failures=_redis_failures, retry_in=backoff)
+
+
+def _on_redis_error(e: Exception):
+    # Connection-level failures take Redis out of rotation until the next retry;
+    # anything else (bad payload, wrong type) only fails the one operation.
+    if isinstance(e, (RedisConnectionError, RedisTimeoutError, OSError)):
+        _mark_redis_down()
+
+
+# ─── L1: in-process LRU ──────────────────────────────────────
+
+# key -> (l1_expires_at, encoded value, expires_at). L1 entries live at most
+# cache_l1_max_ttl so deletes made by other processes are picked up eventually;
+# expires_at is the value's real expiry, used for early refresh. Values are held
+# in their CacheCodec encoding, so every hit is a fresh copy that callers may
+# mutate, and an L1 hit returns exactly what an L2 hit would.
+_local: OrderedDict[str, tuple[float, bytes, float]] = OrderedDict()
+
+
+def _local_get(key: str):
+    """(l1_expires_at, decoded value, expires_at), or None on a miss."""
+    entry = _local.get(key)
+    if entry is None:
+        return None
+    if entry[0] <= time.time():
+        del _local[key]
+        return None
+    _local.move_to_end(key)
+    return entry[0], _codec.decode(entry[1]), entry[2]
+
+
+def _local_set(key: str, data: bytes | str, ttl: float):
+    now = time.time()
+    _local[key] = (now + min(ttl, settings.cache_l1_max_ttl), data, now + ttl)
+    _local.move_to_end(key)
+    while len(_local) > settings.cache_l1_max_entries:
+        _local.popitem(last=False)
+
+
+def clear_local_cache(prefix: str | None = None):
+    """Drop L1 entries (all, or those under one key prefix). Redis is untouched."""
+    if prefix is None:
+        _local.clear()
+        return
+    for key in [k for k in _local if _prefix(k) == prefix]:
+        del _local[key]
+
+
+# ─── Per-prefix counters ─────────────────────────────────────
+
+_COUNTERS = (
+    "l1_hits", "l2_hits", "misses", "sets", "deletes", "invalidations", "errors", "refreshes",
+    "l2_calls", "bytes_written",
+)
+_stats: dict[str, dict] = {}
+
+
+def _prefix(key: str) -> str:
+    return key.split(":", 1)[0] if ":" in key else "other"
+
+
+def _counters(key: str) -> dict:
+    prefix = _prefix(key)
+    counters = _stats.get(prefix)
+    if counters is None:
+        counters = _stats[prefix] = {name: 0 for name in _COUNTERS}
+        counters["l2_seconds"] = 0.0
+    return counters
+
+
+def _record_l2(counters: dict, start: float):
+    counters["l2_calls"] += 1
+    counters["l2_seconds"] += time.perf_counter() - start
+
+
+def get_cache_stats() -> dict:
+    """Cache counters per key prefix for the admin dashboard."""
+    prefixes = {}
+    for prefix, c in _stats.items():
+        hits = c["l1_hits"] + c["l2_hits"]
+        lookups = hits + c["misses"]
+        prefixes[prefix] = {
+            **{name: c[name] for name in _COUNTERS},
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "l2_avg_ms": round(c["l2_seconds"] / c["l2_calls"] * 1000, 3) if c["l2_calls"] else 0.0,
+        }
+    return {
+        "redis": "connected" if _redis is not None else "unavailable",
+        "redis_failures": _redis_failures,
+        "l1_entries": len(_local),
+        "l1_max_entries": settings.cache_l1_max_entries,
+        "prefixes": prefixes,
+    }
+
+
+def reset_cache_state():
+    """Clear L1, counters, refresh locks and the local tag index (used between tests)."""
+    _local.clear()
+    _stats.clear()
+    _refresh_locks.clear()
+    _tags.clear()
+
+
+# ─── Public API ──────────────────────────────────────────────
+
 async def cache_get(key: str):
     """Get value from cache. Returns None on miss or failure."""
+    counters = _counters(key)
+    entry = _local_get(key)
+    if entry is not None:
+        counters["l1_hits"] += 1
+        return entry[1]
+
     r = await get_redis()
     if not r:
+        counters["misses"] += 1
         return None
+    start = time.perf_counter()
     try:
-        val = await r.get(key)
-        return json.loads(val) if val else None
-    except Exception:
+        async with r.pipeline(transaction=False) as pipe:
+            val, pttl = await pipe.get(key).pttl(key).execute()
+    except Exception as e:
+        counters["errors"] += 1
+        _on_redis_error(e)
+        return None
+    finally:
+        _record_l2(counters, start)
+    if val is None:
+        counters["misses"] += 1
         return None
+    try:
+        value = _codec.decode(val)
+    except (ValueError, zlib.error):
+        counters["errors"] += 1
+        return None
+    counters["l2_hits"] += 1
+    # Warm L1 for the rest of the Redis TTL
+    if pttl and pttl > 0:
+        _local_set(key, val, pttl / 1000)
+    return value
 
 
 async def cache_set(key: str, value, ttl: int = 3600):
     """Set value in cache with TTL (seconds)."""
+    counters = _counters(key)
+    counters["sets"] += 1
+    payload = _codec.encode(value)
+    _local_set(key, payload, ttl)
     r = await get_redis()
     if not r:
         return
+    counters["bytes_written"] += len(payload)
+    start = time.perf_counter()
     try:
-        await r.setex(key, ttl, json.dumps(value, default=str))
-    except Exception:
-        pass
+        await r.setex(key, ttl, payload)
+    except Exception as e:
+        counters["errors"] += 1
+        _on_redis_error(e)
+    finally:
+        _record_l2(counters, start)
 
 
 async def cache_delete(key: str):
     """Delete key from cache."""
+    counters = _counters(key)
+    counters["deletes"] += 1
+    _local.pop(key, None)
     r = await get_redis()
     if not r:
         return
+    start = time.perf_counter()
     try:
         await r.delete(key)
-    except Exception:
-        pass
+    except Exception as e:
+        counters["errors"] += 1
+        _on_redis_error(e)
+    finally:
+        _record_l2(counters, start)
+
+
+# ─── Batch API: one Redis round trip per call ────────────────
+
+def _record_l2_batch(keys, start: float):
+    for counters in {id(c): c for c in map(_counters, keys)}.values():
+        _record_l2(counters, start)
+
+
+async def cache_get_many(keys: list[str]) -> dict:
+    """Get several keys at once. Returns {key: value} for the hits only.
+
+    L1 answers what it can; the rest is fetched with a single pipelined MGET.
+    """
+    found: dict = {}
+    missing: list[str] = []
+    for key in dict.fromkeys(keys):
+        entry = _local_get(key)
+        if entry is not None:
+            _counters(key)["l1_hits"] += 1
+            found[key] = entry[1]
+        else:
+            missing.append(key)
+    if not missing:
+        return found
+
+    r = await get_redis()
+    if not r:
+        for key in missing:
+            _counters(key)["misses"] += 1
+        return found
+    start = time.perf_counter()
+    try:
+        async with r.pipeline(transaction=False) as pipe:
+            pipe.mget(missing)
+            for key in missing:
+                pipe.pttl(key)
+            values, *pttls = await pipe.execute()
+    except Exception as e:
+        for key in missing:
+            _counters(key)["errors"] += 1
+        _on_redis_error(e)
+        return found
+    finally:
+        _record_l2_batch(missing, start)
+
+    for key, val, pttl in zip(missing, values, pttls):
+        counters = _counters(key)
+        if val is None:
+            counters["misses"] += 1
+            continue
+        try:
+            value = _codec.decode(val)
+        except (ValueError, zlib.error):
+            counters["errors"] += 1
+            continue
+        counters["l2_hits"] += 1
+        if pttl and pttl > 0:
+            _local_set(key, val, pttl / 1000)
+        found[key] = value
+    return found
+
+
+async def cache_set_many(items: dict, ttl: int = 3600):
+    """Set several keys with the same TTL in one pipelined round trip."""
+    if not items:
+        return
+    payloads = {}
+    for key, value in items.items():
+        counters = _counters(key)
+        counters["sets"] += 1
+        payloads[key] = _codec.encode(value)
+        _local_set(key, payloads[key], ttl)
+        counters["bytes_written"] += len(payloads[key])
+    r = await get_redis()
+    if not r:
+        return
+    start = time.perf_counter()
+    try:
+        async with r.pipeline(transaction=False) as pipe:
+            for key, payload in payloads.items():
+                pipe.setex(key, ttl, payload)
+            await pipe.execute()
+    except Exception as e:
+        for key in payloads:
+            _counters(key)["errors"] += 1
+        _on_redis_error(e)
+    finally:
+        _record_l2_batch(payloads, start)
+
+
+async def cache_delete_many(keys: list[str]):
+    """Delete several keys with a single DEL."""
+    if not keys:
+        return
+    for key in keys:
+        _counters(key)["deletes"] += 1
+        _local.pop(key, None)
+    r = await get_redis()
+    if not r:
+        return
+    start = time.perf_counter()
+    try:
+        await r.delete(*keys)
+    except Exception as e:
+        for key in keys:
+            _counters(key)["errors"] += 1
+        _on_redis_error(e)
+    finally:
+        _record_l2_batch(keys, start)
+
+
+# ─── Stampede protection ─────────────────────────────────────
+
+class _RefreshLock:
+    """A per-key lock that counts the callers holding or waiting for it."""
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.users = 0
+
+
+# key -> lock, present while anyone holds or waits for it
+_refresh_locks: dict[str, _RefreshLock] = {}
+
+
+async def _get_entry(key: str, local_only: bool = False) -> tuple[dict, float] | None:
+    """(envelope, expires_at) for a key written by cache_get_or_set."""
+    entry = _local_get(key)
+    if entry is not None:
+        _counters(key)["l1_hits"] += 1
+        return entry[1], entry[2]
+    if local_only:
+        _counters(key)["misses"] += 1
+        return None
+    envelope = await cache_get(key)
+    if not isinstance(envelope, dict) or "v" not in envelope:
+        return None
+    entry = _local.get(key)
+    return envelope, entry[2] if entry else math.inf
+
+
+def _should_refresh(envelope: dict, expires_at: float, beta: float) -> bool:
+    """XFetch: refresh early with probability rising as expiry approaches.
+
+    A value that took `delta` seconds to compute is refreshed once
+    now - delta * beta * ln(rand) >= expiry, so slow keys start refreshing
+    sooner and concurrent readers rarely all decide at once.
+    """
+    delta = envelope.get("d", 0.0)
+    if delta <= 0 or beta <= 0:
+        return time.time() >= expires_at
+    return time.time() - delta * beta * math.log(random.random() or 1e-12) >= expires_at
+
+
+async def cache_get_or_set(
+    key: str,
+    loader,
+    ttl: int = 3600,
+    beta: float = 1.0,
+    tags: list[str] | None = None,
+    cache_if=None,
+    local_only: bool = False,
+):
+    """Return the cached value for `key`, computing it with `await loader()` on a miss.
+
+    Only one coroutine per process recomputes a key at a time; others wait for
+    it, or keep serving the current value if one exists. Values are refreshed
+    probabilistically before they expire (see _should_refresh) so an expensive
+    key never expires under load. Keys written here hold an envelope and should
+    only be read through this function.
+
+    `tags` register the key for invalidate_tag(); results for which
+    `cache_if(value)` is false (e.g. an empty fallback) are returned uncached.
+    `local_only` keeps the value in this process's L1 and never in Redis, for
+    values computed from per-process state.
+    """
+    entry = await _get_entry(key, local_only)
+    if entry is not None and not _should_refresh(entry[0], entry[1], beta):
+        return entry[0]["v"]
+
+    refresh = _refresh_locks.get(key)
+    if entry is not None and refresh is not None and refresh.lock.locked():
+        # Another caller is already refreshing; the current value is still good
+        return entry[0]["v"]
+    if refresh is None:
+        refresh = _refresh_locks[key] = _RefreshLock()
+
+    waited_since = time.time()
+    refresh.users += 1
+    try:
+        async with refresh.lock:
+            latest = _local.get(key)
+            if latest is not None and latest[2] - ttl >= waited_since:
+                # Refreshed by whoever held the lock while we waited
+                return _codec.decode(latest[1])["v"]
+            start = time.monotonic()
+            value = await loader()
+            delta = time.monotonic() - start
+            if cache_if is None or cache_if(value):
+                _counters(key)["refreshes"] += 1
+                envelope = {"v": value, "d": round(delta, 4)}
+                if local_only:
+                    _counters(key)["sets"] += 1
+                    _local_set(key, _codec.encode(envelope), ttl)
+                else:
+                    await cache_set(key, envelope, ttl=ttl)
+                if tags:
+                    await _tag_keys(key, tags, ttl, local_only)
+    finally:
+        # Only drop the lock once nobody holds it or is queued on it, so a
+        # caller arriving now still serializes behind the queued ones
+        refresh.users -= 1
+        if not refresh.users and _refresh_locks.get(key) is refresh:
+            del _refresh_locks[key]
+    return value
+
+
+# ─── Tags ────────────────────────────────────────────────────
+
+# tag -> keys written under it. Mirrors the Redis "tag:{tag}" sets so
+# invalidation still works while Redis is down.
+_tags: dict[str, set[str]] = {}
+_TAG_PRUNE_AT = 64
+
+
+async def _tag_keys(key: str, tags: list[str], ttl: int, local_only: bool = False):
+    for tag in tags:
+        keys = _tags.setdefault(tag, set())
+        keys.add(key)
+        if len(keys) > _TAG_PRUNE_AT:
+            keys.intersection_update(_local)
+    r = None if local_only else await get_redis()
+    if not r:
+        return
+    try:
+        async with r.pipeline(transaction=False) as pipe:
+            for tag in tags:
+                pipe.sadd(f"tag:{tag}", key).expire(f"tag:{tag}", ttl)
+            await pipe.execute()
+    except Exception as e:
+        _counters(key)["errors"] += 1
+        _on_redis_error(e)
+
+
+async def invalidate_tag(tag: str) -> int:
+    """Delete every key cached under `tag`. Returns how many keys were dropped."""
+    keys = _tags.pop(tag, set())
+    r = await get_redis()
+    if r:
+        try:
+            keys |= {k.decode() for k in await r.smembers(f"tag:{tag}")}
+            await r.delete(f"tag:{tag}", *keys)
+        except Exception as e:
+            _on_redis_error(e)
+    for key in keys:
+        _local.pop(key, None)
+        _counters(key)["invalidations"] += 1
+    logger.debug("cache_tag_invalidated", tag=tag, keys=len(keys))
+    return len(keys)
+
+
+def cached(prefix: str, ttl: int = 3600, tags=(), cache_if=None, beta: float = 1.0, local_only: bool = False):
+    """Cache an async function's result, keyed by `prefix` and its bound arguments.
+
+    `tags` are templates formatted with the call's arguments, e.g.
+    tags=("market:{market_id}",); invalidate_tag("market:abc") then drops every
+    cached call for that market. Calls go through cache_get_or_set, so
+    concurrent misses for the same arguments run the function once.
+
+        @cached("worldbank", ttl=24 * 3600, cache_if=bool)
+        async def _fetch_indicator(country_code, indicator, years): ...
+    """
+
+    def decorator(func):
+        sig = inspect.signature(func)
+
+        def _bind(args, kwargs) -> dict:
+            bound = sig.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return bound.arguments
+
+        def _key(arguments: dict) -> str:
+            return make_cache_key(prefix, json.dumps(arguments, sort_keys=True, default=str))
+
+        def key_for(*args, **kwargs) -> str:
+            return _key(_bind(args, kwargs))
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            arguments = _bind(args, kwargs)
+            return await cache_get_or_set(
+                _key(arguments),
+                lambda: func(*args, **kwargs),
+                ttl=ttl,
+                beta=beta,
+                tags=[t.format(**arguments) for t in tags],
+                cache_if=cache_if,
+                local_only=local_only,
+            )
+
+        async def invalidate(*args, **kwargs):
+            """Drop the cached result for one set of arguments."""
+            await cache_delete(key_for(*args, **kwargs))
+
+        wrapper.cache_key = key_for
+        wrapper.invalidate = invalidate
+        return wrapper
+
+    return decorator
 
 
 def make_cache_key(prefix: str, *args) -> str:
-    """Generate a deterministic cache key."""
-    raw = f"{prefix}:" + ":".join(str(a) for a in args)
-    return hashlib.md5(raw.encode()).hexdigest()
+    """Generate a deterministic cache key ("{prefix}:{hash}", so counters group by prefix)."""
+    raw = ":".join(str(a) for a in args)
+    return f"{prefix}:" + hashlib.md5(raw.encode()).hexdigest()
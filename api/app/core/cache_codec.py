@@ -0,0 +1,76 @@
+"""
+Binary codec for cached values.
+
+Every encoded value starts with a format byte so the layout can change without
+flushing Redis:
+
+    0x01  JSON body (orjson; stdlib json if it is missing)
+    0x02  zlib-compressed JSON body (used above `compress_threshold` bytes)
+
+Values written before the codec existed are plain JSON text; their first byte
+is always printable, so decode() still reads them.
+"""
+
+import json
+import zlib
+
+try:
+    import orjson
+except ImportError:  # a locked dependency; stdlib json produces the same documents
+    orjson = None
+
+FORMAT_JSON = 0x01
+FORMAT_JSON_ZLIB = 0x02
+
+
+def _default(value):
+    # NumPy arrays and scalars (e.g. population columns) encode as lists / numbers
+    tolist = getattr(value, "tolist", None)
+    return tolist() if tolist is not None else str(value)
+
+
+def _dumps(value) -> bytes:
+    if orjson is not None:
+        try:
+            return orjson.dumps(
+                value, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+            )
+        except TypeError:
+            # e.g. integers beyond 64 bits; fall through to the stdlib encoder
+            pass
+    return json.dumps(value, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def _loads(data: bytes):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+class CacheCodec:
+    """Encode values to versioned bytes, compressing large ones."""
+
+    def __init__(self, compress_threshold: int = 1024, compress_level: int = 1):
+        self.compress_threshold = compress_threshold
+        self.compress_level = compress_level
+
+    def encode(self, value) -> bytes:
+        body = _dumps(value)
+        if self.compress_threshold and len(body) >= self.compress_threshold:
+            packed = zlib.compress(body, self.compress_level)
+            if len(packed) < len(body):
+                return bytes((FORMAT_JSON_ZLIB,)) + packed
+        return bytes((FORMAT_JSON,)) + body
+
+    def decode(self, data: bytes | str):
+        if isinstance(data, str):
+            return json.loads(data)
+        if not data:
+            raise ValueError("empty cache payload")
+        fmt = data[0]
+        if fmt == FORMAT_JSON:
+            return _loads(data[1:])
+        if fmt == FORMAT_JSON_ZLIB:
+            return _loads(zlib.decompress(data[1:]))
+        if fmt >= 0x20:
+            # Pre-codec entry: plain JSON text
+            return _loads(data)
+        raise ValueError(f"Unknown cache format byte: {fmt:#04x}")
@@ -12,12 +12,78 @@ class Settings(BaseSettings):
     supabase_anon_key: str = ""
     supabase_service_role_key: str = ""
 
+    # Verified-JWT cache: entries expire at the token's exp, capped at the TTL
+    auth_token_cache_size: int = 10_000
+    auth_token_cache_ttl: int = 3600
+
     # OpenRouter
     openrouter_api_key: str = ""
 
+    # LLM backend: "openrouter", or "replay"/"record" for the offline stand-in
+    llm_backend: str = "openrouter"
+    llm_replay_path: str = ""
+    llm_replay_latency_median: float = 0.0
+    llm_replay_latency_sigma: float = 0.5
+    llm_replay_error_rate: float = 0.0
+    llm_replay_rate_limit_rate: float = 0.0
+    llm_replay_seed: int = 0
+
+    # LLM response cache (per-task TTLs live in app.core.llm.TASK_CACHE_TTL)
+    llm_cache_enabled: bool = True
+
+    # LLM concurrency: default per-model cap, optional per-model overrides (JSON)
+    llm_max_concurrency: int = 16
+    llm_model_concurrency: dict[str, int] = {}
+
+    # LLM hedging: race the next fallback model once a call exceeds its task's p95
+    llm_hedging_enabled: bool = True
+    llm_hedge_min_samples: int = 20
+    llm_hedge_min_delay: float = 2.0
+
+    # Prediction pipeline: synthetic population size
+    pipeline_agent_count: int = 10_000
+    # Prediction pipeline: per-stage timeout overrides in seconds (JSON), e.g. {"reasoning": 240}
+    pipeline_stage_timeouts: dict[str, float] = {}
+    # Stage outputs are checkpointed per prediction for resume and reruns
+    pipeline_checkpoint_ttl: int = 7 * 24 * 3600
+    # ...and while Redis is down, held in-process up to this many encoded bytes
+    pipeline_checkpoint_local_bytes: int = 32 * 2**20
+    # Identical questions within this window reuse one run (force_fresh opts out)
+    dedup_enabled: bool = True
+    dedup_freshness_seconds: int = 3600
+    # Batch submissions: max queries per request
+    batch_max_items: int = 50
+    # What-if reruns wait this long for the slider to settle before calling the engines
+    rerun_debounce_seconds: float = 0.3
+
+    # Prediction jobs: "memory" runs them inside the API process; "redis" queues them
+    # on Redis Streams for the standalone worker (Procfile `worker`). The API also
+    # runs a worker itself when the backend is "memory" or jobs_embedded_worker is set.
+    jobs_backend: str = "memory"
+    jobs_embedded_worker: bool = False
+    jobs_max_concurrency: int = 4  # pipelines per worker process
+    jobs_poll_interval: float = 1.0
+    jobs_visibility_timeout: float = 120.0  # a job silent this long is handed to another worker
+    jobs_result_ttl: int = 86400
+
     # Redis
     redis_url: str = "redis://localhost:6379"
 
+    # Cache: in-process L1 in front of Redis; Redis reconnects with backoff
+    cache_l1_max_entries: int = 4096
+    cache_l1_max_ttl: int = 300
+    cache_redis_timeout: float = 1.0
+    cache_redis_retry_max: float = 60.0
+    # Redis values at least this many bytes are zlib-compressed (0 disables)
+    cache_compress_threshold: int = 1024
+    cache_compress_level: int = 1
+
+    # Rate limiting: shared through Redis when available; tracked keys are capped
+    # per process; route costs are keyed "METHOD /path" (JSON)
+    rate_limit_redis: bool = True
+    rate_limit_max_keys: int = 100_000
+    rate_limit_costs: dict[str, int] = {"POST /api/v1/predictions/create": 10, "POST /api/v1/predictions/batch": 30}
+
     # Neo4j
     neo4j_uri: str = ""
     neo4j_username: str = "neo4j"
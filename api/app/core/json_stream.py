@@ -0,0 +1,88 @@
+"""
+Incremental JSON parsing for streamed LLM output.
+Emits each top-level field of a JSON object as soon as its value is complete,
+so callers can use `outcomes` while `causal_graph` is still being generated.
+"""
+
+import json
+
+_EXPECT_KEY, _IN_KEY, _EXPECT_COLON, _IN_VALUE, _DONE = range(5)
+
+
+class JSONFieldStream:
+    """Feed text chunks; get back (key, value) pairs for completed top-level fields.
+
+    Text before the first "{" (e.g. a ```json fence) and after the closing "}"
+    is ignored. Scanning is incremental: each character is examined once.
+    """
+
+    def __init__(self):
+        self._buf = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._state = _EXPECT_KEY
+        self._start = 0
+        self._key: str | None = None
+        self.fields: dict = {}
+
+    @property
+    def done(self) -> bool:
+        return self._state == _DONE
+
+    def feed(self, chunk: str) -> list[tuple[str, object]]:
+        """Consume a chunk and return the fields it completed, in order."""
+        if self._state == _DONE:
+            return []
+        self._buf += chunk
+        completed: list[tuple[str, object]] = []
+        buf = self._buf
+        i = self._pos
+        while i < len(buf) and self._state != _DONE:
+            ch = buf[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._state == _IN_KEY and self._depth == 1:
+                        self._key = json.loads(buf[self._start : i + 1])
+                        self._state = _EXPECT_COLON
+            elif self._depth == 0:
+                if ch == "{":
+                    self._depth = 1
+            elif ch == '"':
+                self._in_string = True
+                if self._state == _EXPECT_KEY and self._depth == 1:
+                    self._state = _IN_KEY
+                    self._start = i
+            elif self._state == _EXPECT_COLON and ch == ":":
+                self._state = _IN_VALUE
+                self._start = i + 1
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "]}":
+                if self._depth == 1 and ch == "}":
+                    self._emit(buf[self._start : i], completed)
+                    self._state = _DONE
+                self._depth -= 1
+            elif ch == "," and self._depth == 1:
+                self._emit(buf[self._start : i], completed)
+                self._state = _EXPECT_KEY
+            i += 1
+        self._pos = i
+        return completed
+
+    def _emit(self, raw: str, completed: list):
+        if self._state != _IN_VALUE or self._key is None:
+            return
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            return
+        self.fields[self._key] = value
+        completed.append((self._key, value))
+        self._key = None
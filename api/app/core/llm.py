@@ -1,14 +1,32 @@
 """
-OpenRouter LLM wrapper with timeout, retry, and cost tracking.
+OpenRouter LLM wrapper with timeout, retry, response caching and cost tracking.
 All LLM calls go through this module.
 """
 
 import asyncio
+import hashlib
+import heapq
+import itertools
 import json
 import time
+from collections import deque
+from contextlib import aclosing, contextmanager
+from contextvars import ContextVar
+
 import structlog
-from openai import AsyncOpenAI
+from openai import AsyncOpenAI, RateLimitError
+
+from app.core.cache import (
+    cache_delete,
+    cache_get,
+    cache_set,
+    clear_local_cache,
+    get_cache_stats,
+)
 from app.core.config import settings
+from app.core.json_stream import JSONFieldStream
+from app.core.llm_backends import LLMBackend, LLMResponse, ReplayBackend
+from app.core.llm_costs import CostTracker, charge_current_scope, llm_cost_scope  # noqa: F401
 
 logger = structlog.get_logger()
 
@@ -22,6 +40,68 @@ client = AsyncOpenAI(
 )
 
 
+class OpenRouterBackend:
+    """Production backend: the shared OpenRouter client."""
+
+    async def complete(self, task: str, model: str, messages: list, **kwargs) -> LLMResponse:
+        resp = await client.chat.completions.create(model=model, messages=messages, **kwargs)
+        return LLMResponse(
+            text=resp.choices[0].message.content or "",
+            tokens_in=resp.usage.prompt_tokens if resp.usage else 0,
+            tokens_out=resp.usage.completion_tokens if resp.usage else 0,
+        )
+
+    async def stream(self, task: str, model: str, messages: list, **kwargs):
+        stream = await client.chat.completions.create(
+            model=model,
+            messages=messages,
+            stream=True,
+            stream_options={"include_usage": True},
+            **kwargs,
+        )
+        async for chunk in stream:
+            usage = getattr(chunk, "usage", None)
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta or usage:
+                yield LLMResponse(
+                    text=delta or "",
+                    tokens_in=usage.prompt_tokens if usage else 0,
+                    tokens_out=usage.completion_tokens if usage else 0,
+                )
+
+
+_backend: LLMBackend | None = None
+
+
+def get_llm_backend() -> LLMBackend:
+    """Backend selected by settings.llm_backend (openrouter | replay | record)."""
+    global _backend
+    if _backend is None:
+        if settings.llm_backend == "openrouter":
+            _backend = OpenRouterBackend()
+        elif settings.llm_backend in ("replay", "record"):
+            _backend = ReplayBackend(
+                path=settings.llm_replay_path or None,
+                mode=settings.llm_backend,
+                inner=OpenRouterBackend() if settings.llm_backend == "record" else None,
+                latency_median=settings.llm_replay_latency_median,
+                latency_sigma=settings.llm_replay_latency_sigma,
+                error_rate=settings.llm_replay_error_rate,
+                rate_limit_rate=settings.llm_replay_rate_limit_rate,
+                seed=settings.llm_replay_seed,
+            )
+        else:
+            raise ValueError(f"Unknown LLM backend: {settings.llm_backend}")
+        logger.info("llm_backend", backend=settings.llm_backend)
+    return _backend
+
+
+def set_llm_backend(backend: LLMBackend | None):
+    """Swap the backend (e.g. a ReplayBackend for benchmarks); None re-reads settings."""
+    global _backend
+    _backend = backend
+
+
 class Models:
     OPUS = "anthropic/claude-opus-4"
     SONNET = "anthropic/claude-sonnet-4"
@@ -46,33 +126,412 @@ TASK_MODEL = {
     "schema_mapping": Models.FLASH,
 }
 
+# OpenRouter list prices, USD per 1M tokens (input, output)
+MODEL_PRICING = {
+    Models.OPUS: (15.0, 75.0),
+    Models.SONNET: (3.0, 15.0),
+    Models.HAIKU: (0.25, 1.25),
+    Models.FLASH: (0.10, 0.40),
+    Models.DEEPSEEK: (0.27, 1.10),
+}
+
+
+def compute_cost_usd(model: str, tokens_in: int, tokens_out: int) -> float:
+    """USD cost of one call; unknown models are priced as zero."""
+    price_in, price_out = MODEL_PRICING.get(model, (0.0, 0.0))
+    return (tokens_in * price_in + tokens_out * price_out) / 1_000_000
+
+
+class Priority:
+    """Admission priority for the per-model limiter (lower value = served first)."""
+
+    INTERACTIVE = 0  # user is waiting on the result, e.g. variable rerun
+    PIPELINE = 1  # background prediction pipeline stages
+    ROLLOUT = 2  # MCTS expansion/evaluation fan-out
+    BATCH = 3  # bulk batch submissions, served from whatever capacity is left
+
+
+TASK_PRIORITY = {
+    "mcts_evaluate": Priority.ROLLOUT,
+}
+
+_priority_override: ContextVar[int | None] = ContextVar("llm_priority", default=None)
+
+
+@contextmanager
+def llm_priority(priority: int):
+    """Run every LLM call made inside this block (including child tasks) at `priority`."""
+    token = _priority_override.set(priority)
+    try:
+        yield
+    finally:
+        _priority_override.reset(token)
+
+
+class ModelLimiter:
+    """Concurrency limit for one model with a priority wait queue and AIMD control.
+
+    The limit grows by 1/limit per successful call (additive increase) and is
+    halved at most once per second on 429s or timeouts (multiplicative decrease).
+    """
+
+    DECREASE_COOLDOWN = 1.0
+
+    def __init__(self, model: str, max_limit: int, min_limit: int = 1):
+        self.model = model
+        self.max_limit = max(max_limit, min_limit)
+        self.min_limit = min_limit
+        self.limit = float(self.max_limit)
+        self.active = 0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._last_decrease = 0.0
+        self._stats = {"acquired": 0, "queued": 0, "backoffs": 0, "total_wait": 0.0, "max_wait": 0.0}
+        self._wait_by_priority: dict[int, list[float]] = {}  # priority -> [count, total_wait]
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for _, _, fut in self._waiters if not fut.done())
+
+    def _capacity(self) -> int:
+        return max(self.min_limit, int(self.limit))
+
+    async def acquire(self, priority: int = Priority.PIPELINE):
+        start = time.monotonic()
+        if self.active < self._capacity() and not self.queue_depth:
+            self.active += 1
+        else:
+            self._stats["queued"] += 1
+            fut = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._waiters, (priority, next(self._seq), fut))
+            try:
+                await fut
+            except asyncio.CancelledError:
+                if fut.done() and not fut.cancelled():
+                    # Slot was handed over just as we were cancelled: give it back
+                    self.release()
+                else:
+                    fut.cancel()
+                raise
+        self._record_wait(priority, time.monotonic() - start)
+
+    def release(self):
+        self.active -= 1
+        self._wake()
+
+    def on_success(self):
+        if self.limit < self.max_limit:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._wake()
+
+    def on_backpressure(self):
+        now = time.monotonic()
+        if now - self._last_decrease < self.DECREASE_COOLDOWN:
+            return
+        self._last_decrease = now
+        self.limit = max(float(self.min_limit), self.limit / 2)
+        self._stats["backoffs"] += 1
+        logger.warning("llm_backoff", model=self.model, limit=round(self.limit, 2))
+
+    def _wake(self):
+        while self._waiters and self.active < self._capacity():
+            _, _, fut = heapq.heappop(self._waiters)
+            if fut.done():
+                continue
+            self.active += 1
+            fut.set_result(None)
+
+    def _record_wait(self, priority: int, waited: float):
+        self._stats["acquired"] += 1
+        self._stats["total_wait"] += waited
+        self._stats["max_wait"] = max(self._stats["max_wait"], waited)
+        entry = self._wait_by_priority.setdefault(priority, [0, 0.0])
+        entry[0] += 1
+        entry[1] += waited
+
+    def stats(self) -> dict:
+        acquired = self._stats["acquired"]
+        return {
+            "limit": round(self.limit, 2),
+            "max_limit": self.max_limit,
+            "active": self.active,
+            "queue_depth": self.queue_depth,
+            "acquired": acquired,
+            "queued": self._stats["queued"],
+            "backoffs": self._stats["backoffs"],
+            "avg_wait": round(self._stats["total_wait"] / acquired, 4) if acquired else 0.0,
+            "max_wait": round(self._stats["max_wait"], 4),
+            "avg_wait_by_priority": {
+                p: round(total / count, 4) for p, (count, total) in sorted(self._wait_by_priority.items())
+            },
+        }
+
+
+_limiters: dict[str, ModelLimiter] = {}
+
+
+def get_limiter(model: str) -> ModelLimiter:
+    limiter = _limiters.get(model)
+    if limiter is None:
+        max_limit = settings.llm_model_concurrency.get(model, settings.llm_max_concurrency)
+        limiter = _limiters[model] = ModelLimiter(model, max_limit)
+    return limiter
+
+
+def reset_llm_limiters():
+    """Forget learned limits (e.g. after changing concurrency settings)."""
+    _limiters.clear()
+
+
+def reset_llm_state():
+    """Clear caches, learned limits, latency history and cost totals (used between tests)."""
+    clear_llm_cache()
+    reset_llm_limiters()
+    _latencies.clear()
+    _cost_tracker.clear()
+
+
+def _is_rate_limited(error: Exception) -> bool:
+    return isinstance(error, RateLimitError) or getattr(error, "status_code", None) == 429
+
+
+# Hedging: if the primary model is slower than its recent p95, race the next
+# model in its chain and keep whichever answers first.
+MODEL_FALLBACK_CHAIN = {
+    Models.OPUS: [Models.SONNET, Models.HAIKU],
+    Models.SONNET: [Models.HAIKU],
+    Models.FLASH: [Models.HAIKU],
+    Models.DEEPSEEK: [Models.HAIKU],
+}
+
+_LATENCY_WINDOW = 200
+_latencies: dict[tuple[str, str], deque] = {}  # (task, model) -> recent call durations
+_hedge_stats = {"hedged_calls": 0, "hedges_launched": 0, "hedge_wins": 0}
+_hedge_wins_by_task: dict[str, int] = {}
+
+
+def record_latency(task: str, model: str, elapsed: float):
+    window = _latencies.get((task, model))
+    if window is None:
+        window = _latencies[(task, model)] = deque(maxlen=_LATENCY_WINDOW)
+    window.append(elapsed)
+
+
+def latency_p95(task: str, model: str) -> float | None:
+    """p95 of recent call durations, or None until enough samples have been seen."""
+    window = _latencies.get((task, model))
+    if not window or len(window) < settings.llm_hedge_min_samples:
+        return None
+    ordered = sorted(window)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+
+def _hedge_delay(task: str, model: str) -> float | None:
+    if not settings.llm_hedging_enabled or not MODEL_FALLBACK_CHAIN.get(model):
+        return None
+    p95 = latency_p95(task, model)
+    if p95 is None:
+        return None
+    return max(p95, settings.llm_hedge_min_delay)
+
+
+# Response cache TTLs (seconds). Only tasks listed here are cached; their prompts
+# repeat verbatim across runs and the answers are stable enough to reuse.
+TASK_CACHE_TTL = {
+    "intent_parse": 6 * 3600,
+    "data_gap_fill": 6 * 3600,
+    "sentiment_analysis": 3600,
+    "explanation": 3600,
+    "schema_mapping": 24 * 3600,
+    "translation": 24 * 3600,
+}
+
+_cache_stats = {"hits": 0, "misses": 0, "stores": 0}
+
+
+class _Flight:
+    """One in-flight provider request shared by every identical concurrent caller."""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+# Single-flight: request key -> shared in-flight call
+_inflight: dict[str, _Flight] = {}
+_flight_stats = {"leaders": 0, "coalesced": 0}
+_coalesced_by_task: dict[str, int] = {}
+
 # Cost tracking
-_cost_log: list[dict] = []
+_cost_tracker = CostTracker()
+_cost_log = _cost_tracker.entries
 _start_time = time.time()
 
 
 def get_cost_log() -> list[dict]:
     """Return the cost log for admin dashboard."""
-    return _cost_log
+    return list(_cost_log)
+
+
+def get_cost_tracker() -> CostTracker:
+    return _cost_tracker
 
 
 def get_uptime_seconds() -> float:
     return time.time() - _start_time
 
 
-async def call_llm(task: str, messages: list, timeout: int = 60, max_retries: int = 2, **kwargs) -> str:
-    """Unified LLM call with timeout, retry, and fallback to faster model."""
+def get_llm_stats() -> dict:
+    """Return LLM response cache counters for the admin dashboard."""
+    lookups = _cache_stats["hits"] + _cache_stats["misses"]
+    return {
+        "cache": {
+            **_cache_stats,
+            "hit_rate": round(_cache_stats["hits"] / lookups, 4) if lookups else 0.0,
+            "tiers": get_cache_stats()["prefixes"].get("llm", {}),
+        },
+        "single_flight": {
+            **_flight_stats,
+            "in_flight": len(_inflight),
+            "coalesced_by_task": dict(_coalesced_by_task),
+        },
+        "limiters": {model: limiter.stats() for model, limiter in _limiters.items()},
+        "hedging": {
+            **_hedge_stats,
+            "wins_by_task": dict(_hedge_wins_by_task),
+            "p95": {
+                f"{task}:{model}": round(p95, 3)
+                for (task, model) in _latencies
+                if (p95 := latency_p95(task, model)) is not None
+            },
+        },
+    }
+
+
+def make_llm_cache_key(task: str, model: str, messages: list, params: dict) -> str:
+    """Canonical content hash of a request: task, model, messages and sampling kwargs."""
+    payload = json.dumps(
+        {"task": task, "model": model, "messages": messages, "params": params},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+    return f"llm:{task}:" + hashlib.sha256(payload.encode()).hexdigest()
+
+
+def clear_llm_cache():
+    """Drop in-process cached responses (Redis entries expire via TTL)."""
+    clear_local_cache("llm")
+
+
+async def _cache_lookup(key: str) -> str | None:
+    text = await cache_get(key)
+    return text if isinstance(text, str) else None
+
+
+async def _cache_store(key: str, text: str, ttl: int):
+    await cache_set(key, text, ttl=ttl)
+    _cache_stats["stores"] += 1
+
+
+async def invalidate_llm_cache(task: str, messages: list, **kwargs):
+    """Evict a cached response, e.g. when it turned out not to be parseable."""
     model = TASK_MODEL.get(task, Models.HAIKU)
-    logger.info("llm_call", task=task, model=model)
+    await cache_delete(make_llm_cache_key(task, model, messages, kwargs))
+
+
+async def call_llm(
+    task: str,
+    messages: list,
+    timeout: int = 60,
+    max_retries: int = 2,
+    use_cache: bool = True,
+    **kwargs,
+) -> str:
+    """Unified LLM call with response cache, timeout, retry, and fallback to faster model.
+
+    Responses for tasks in TASK_CACHE_TTL are cached by content hash of
+    (task, model, messages, kwargs), and identical concurrent calls to them are
+    coalesced into a single provider request. Pass use_cache=False to force a
+    fresh call; uncached tasks (sampling such as mcts_evaluate) always get one.
+    """
+    model = TASK_MODEL.get(task, Models.HAIKU)
+    key = make_llm_cache_key(task, model, messages, kwargs)
+    priority = _current_priority(task)
+
+    ttl = TASK_CACHE_TTL.get(task) if use_cache and settings.llm_cache_enabled else None
+    if ttl:
+        cached = await _cache_lookup(key)
+        if cached is not None:
+            _cache_stats["hits"] += 1
+            logger.info("llm_cache_hit", task=task, model=model)
+            return cached
+        _cache_stats["misses"] += 1
 
+    async def _fetch() -> str:
+        logger.info("llm_call", task=task, model=model)
+        result = await _call_with_retry(task, model, messages, timeout, max_retries, priority, **kwargs)
+        if ttl and result:
+            await _cache_store(key, result, ttl)
+        return result
+
+    if not ttl:
+        return await _fetch()
+    return await _single_flight(key, task, _fetch)
+
+
+def _current_priority(task: str) -> int:
+    priority = _priority_override.get()
+    return TASK_PRIORITY.get(task, Priority.PIPELINE) if priority is None else priority
+
+
+async def _single_flight(key: str, task: str, fetch) -> str:
+    """Await the in-flight call for `key`, starting it if none exists.
+
+    The shared call runs as its own task so one caller being cancelled does not
+    cancel it for the others; it is cancelled only when every waiter has gone.
+    """
+    flight = _inflight.get(key)
+    if flight is None:
+        flight = _Flight(asyncio.ensure_future(fetch()))
+        _inflight[key] = flight
+        flight.task.add_done_callback(lambda t, f=flight: _finish_flight(key, f))
+        _flight_stats["leaders"] += 1
+    else:
+        _flight_stats["coalesced"] += 1
+        _coalesced_by_task[task] = _coalesced_by_task.get(task, 0) + 1
+        logger.info("llm_coalesced", task=task)
+
+    flight.waiters += 1
+    try:
+        return await asyncio.shield(flight.task)
+    except asyncio.CancelledError:
+        if flight.waiters == 1 and not flight.task.done():
+            flight.task.cancel()
+        raise
+    finally:
+        flight.waiters -= 1
+
+
+def _finish_flight(key: str, flight: _Flight):
+    if _inflight.get(key) is flight:
+        del _inflight[key]
+    # Mark the exception as retrieved when every waiter was cancelled
+    if not flight.task.cancelled():
+        flight.task.exception()
+
+
+async def _call_with_retry(
+    task: str, model: str, messages: list, timeout: int, max_retries: int,
+    priority: int = Priority.PIPELINE, **kwargs,
+) -> str:
+    """Retry loop: timeouts fall back to HAIKU, other errors back off linearly."""
     for attempt in range(max_retries + 1):
         try:
-            result = await asyncio.wait_for(
-                _do_call(task, model, messages, **kwargs),
-                timeout=timeout,
-            )
+            result = await _hedged_call(task, model, messages, timeout, priority, **kwargs)
             return result
-        except asyncio.TimeoutError:
+        except TimeoutError:
             logger.warning("llm_timeout", task=task, model=model, attempt=attempt)
             if attempt < max_retries:
                 # Fallback to faster model on timeout
@@ -90,41 +549,288 @@ async def call_llm(task: str, messages: list, timeout: int = 60, max_retries: in
     return ""
 
 
+async def _hedged_call(
+    task: str, model: str, messages: list, timeout: int, priority: int, **kwargs
+) -> str:
+    """Call `model`, racing backups from MODEL_FALLBACK_CHAIN once it runs slow."""
+    return await _race_models(
+        task, model, timeout,
+        lambda m, t: _limited_call(task, m, messages, t, priority, **kwargs),
+    )
+
+
+async def _race_models(
+    task: str, model: str, timeout: float, attempt, latency_task: str | None = None, discard=None,
+):
+    """Run `attempt(model, timeout)`, racing `attempt(backup, remaining)` for slow ones.
+
+    A backup from MODEL_FALLBACK_CHAIN is launched each time another p95
+    interval (of `latency_task`'s latencies, `task` by default) passes without
+    an answer. The first successful result wins and the rest are cancelled;
+    `discard(result)` is called for any other attempt that succeeded at the
+    same moment. All attempts share one deadline of `timeout` seconds.
+    """
+    latency_task = latency_task or task
+    delay = _hedge_delay(latency_task, model)
+    if delay is None:
+        return await attempt(model, timeout)
+
+    backups = list(MODEL_FALLBACK_CHAIN[model])
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    started = loop.time()
+    primary = asyncio.ensure_future(attempt(model, timeout))
+    pending = {primary}
+    error: BaseException | None = None
+    _hedge_stats["hedged_calls"] += 1
+
+    try:
+        while pending:
+            wait = delay if backups else deadline - loop.time()
+            done, pending = await asyncio.wait(
+                pending, timeout=max(wait, 0), return_when=asyncio.FIRST_COMPLETED
+            )
+            winner = next((t for t in done if t.exception() is None), None)
+            if winner is not None:
+                for t in done:
+                    if t is not winner and t.exception() is None and discard:
+                        discard(t.result())
+                if winner is not primary:
+                    _hedge_stats["hedge_wins"] += 1
+                    _hedge_wins_by_task[task] = _hedge_wins_by_task.get(task, 0) + 1
+                    # The primary's true latency is at least this long
+                    record_latency(latency_task, model, loop.time() - started)
+                return winner.result()
+            for t in done:
+                error = t.exception()
+            if not done and backups and deadline > loop.time():
+                backup = backups.pop(0)
+                _hedge_stats["hedges_launched"] += 1
+                logger.info("llm_hedge", task=task, model=model, backup=backup, after=round(delay, 2))
+                pending.add(asyncio.ensure_future(attempt(backup, deadline - loop.time())))
+            elif not done and not backups and deadline <= loop.time():
+                raise TimeoutError()
+        raise error or TimeoutError()
+    finally:
+        for t in pending:
+            t.cancel()
+
+
+async def _limited_call(
+    task: str, model: str, messages: list, timeout: int, priority: int, **kwargs
+) -> str:
+    """Run one provider call inside the model's concurrency limit.
+
+    Time spent queueing for a slot does not count against `timeout`.
+    """
+    limiter = get_limiter(model)
+    await limiter.acquire(priority)
+    try:
+        result = await asyncio.wait_for(_do_call(task, model, messages, **kwargs), timeout=timeout)
+    except TimeoutError:
+        limiter.on_backpressure()
+        raise
+    except Exception as e:
+        if _is_rate_limited(e):
+            limiter.on_backpressure()
+        raise
+    finally:
+        limiter.release()
+    limiter.on_success()
+    return result
+
+
 async def _do_call(task: str, model: str, messages: list, **kwargs) -> str:
     """Execute raw LLM call with cost tracking."""
     start = time.time()
-    resp = await client.chat.completions.create(
-        model=model,
-        messages=messages,
-        **kwargs,
-    )
+    resp = await get_llm_backend().complete(task, model, messages, **kwargs)
     elapsed = time.time() - start
+    record_latency(task, model, elapsed)
+    _record_cost(task, model, elapsed, resp.tokens_in, resp.tokens_out)
+    return resp.text
 
-    tokens_in = resp.usage.prompt_tokens if resp.usage else 0
-    tokens_out = resp.usage.completion_tokens if resp.usage else 0
 
-    _cost_log.append({
+def _record_cost(task: str, model: str, elapsed: float, tokens_in: int, tokens_out: int):
+    entry = {
         "task": task,
         "model": model,
         "elapsed": round(elapsed, 2),
         "tokens_in": tokens_in,
         "tokens_out": tokens_out,
+        "cost_usd": compute_cost_usd(model, tokens_in, tokens_out),
         "timestamp": time.time(),
-    })
-
-    # Keep log bounded
-    if len(_cost_log) > 10000:
-        _cost_log.pop(0)
-
-    return resp.choices[0].message.content or ""
+    }
+    _cost_tracker.record(entry)
+    charge_current_scope(entry)
 
 
 async def call_llm_json(task: str, messages: list, **kwargs) -> dict:
-    """Call LLM and parse response as JSON."""
+    """Call LLM and parse response as JSON. Unparseable cached responses are evicted."""
     text = await call_llm(task, messages, **kwargs)
+    return await _parse_json_response(task, messages, text, kwargs)
+
+
+async def _parse_json_response(task: str, messages: list, text: str, kwargs: dict) -> dict:
     text = text.strip()
     if text.startswith("```"):
         text = text.split("```")[1]
         if text.startswith("json"):
             text = text[4:]
-    return json.loads(text)
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        if task in TASK_CACHE_TTL:
+            params = {k: v for k, v in kwargs.items() if k not in ("timeout", "max_retries", "use_cache")}
+            await invalidate_llm_cache(task, messages, **params)
+        raise
+
+
+async def call_llm_stream(
+    task: str, messages: list, timeout: int = 60, use_cache: bool = True, **kwargs
+):
+    """Stream a completion as text deltas.
+
+    `timeout` bounds the wait for each chunk (including the first) rather than
+    the whole response. Cached responses are yielded as a single chunk. Streams
+    take a limiter slot like any other call and are hedged on their first
+    chunk: once the wait runs past the p95 time to first chunk, a stream from
+    the next model in MODEL_FALLBACK_CHAIN is opened, and whichever starts
+    first is the one read. Streams are not retried or coalesced; callers fall
+    back to call_llm on failure.
+    """
+    model = TASK_MODEL.get(task, Models.HAIKU)
+    key = make_llm_cache_key(task, model, messages, kwargs)
+    ttl = TASK_CACHE_TTL.get(task) if use_cache and settings.llm_cache_enabled else None
+    if ttl:
+        cached = await _cache_lookup(key)
+        if cached is not None:
+            _cache_stats["hits"] += 1
+            yield cached
+            return
+        _cache_stats["misses"] += 1
+
+    logger.info("llm_stream", task=task, model=model)
+    priority = _current_priority(task)
+    start = time.time()
+    stream = await _race_models(
+        task, model, timeout,
+        lambda m, t: _open_stream(task, m, messages, min(t, timeout), priority, **kwargs),
+        latency_task=_first_chunk_task(task), discard=_OpenStream.release,
+    )
+    model, limiter, chunk = stream.model, stream.limiter, stream.first
+    parts: list[str] = []
+    tokens_in = tokens_out = 0
+    try:
+        while chunk is not None:
+            tokens_in = chunk.tokens_in or tokens_in
+            tokens_out = chunk.tokens_out or tokens_out
+            if chunk.text:
+                parts.append(chunk.text)
+                yield chunk.text
+            chunk = await stream.next(timeout)
+    except TimeoutError:
+        limiter.on_backpressure()
+        raise
+    except Exception as e:
+        if _is_rate_limited(e):
+            limiter.on_backpressure()
+        raise
+    finally:
+        limiter.release()
+    limiter.on_success()
+
+    elapsed = time.time() - start
+    record_latency(task, model, elapsed)
+    _record_cost(task, model, elapsed, tokens_in, tokens_out)
+    text = "".join(parts)
+    if ttl and text:
+        await _cache_store(key, text, ttl)
+
+
+def _first_chunk_task(task: str) -> str:
+    """Latency key under which a task's time to first streamed chunk is tracked."""
+    return f"{task}:first_chunk"
+
+
+class _OpenStream:
+    """A provider stream that has produced its first chunk, holding its limiter slot."""
+
+    def __init__(self, model: str, limiter, chunks, first: LLMResponse | None):
+        self.model = model
+        self.limiter = limiter
+        self.chunks = chunks
+        self.first = first
+
+    async def next(self, timeout: float) -> LLMResponse | None:
+        try:
+            return await asyncio.wait_for(self.chunks.__anext__(), timeout=timeout)
+        except StopAsyncIteration:
+            return None
+
+    def release(self):
+        """Give up a stream that lost the race, closing its provider response."""
+        self.limiter.release()
+        aclose = getattr(self.chunks, "aclose", None)
+        if aclose is not None:
+            asyncio.ensure_future(aclose())
+
+
+async def _open_stream(
+    task: str, model: str, messages: list, timeout: float, priority: int, **kwargs
+) -> _OpenStream:
+    """Take a limiter slot for `model`, start its stream and wait for the first chunk."""
+    limiter = get_limiter(model)
+    await limiter.acquire(priority)
+    start = time.time()
+    chunks = get_llm_backend().stream(task, model, messages, **kwargs).__aiter__()
+    try:
+        first = await asyncio.wait_for(chunks.__anext__(), timeout=timeout)
+    except StopAsyncIteration:
+        first = None
+    except TimeoutError:
+        limiter.on_backpressure()
+        limiter.release()
+        raise
+    except BaseException as e:
+        if _is_rate_limited(e):
+            limiter.on_backpressure()
+        limiter.release()
+        raise
+    record_latency(_first_chunk_task(task), model, time.time() - start)
+    return _OpenStream(model, limiter, chunks, first)
+
+
+async def call_llm_json_stream(task: str, messages: list, on_field=None, **kwargs) -> dict:
+    """Stream a JSON completion, awaiting `on_field(key, value)` per top-level field.
+
+    Fields are reported as soon as their value is complete, in the order the
+    model writes them. If streaming fails, falls back to call_llm_json and
+    reports any fields that were not already delivered. Exceptions raised by
+    `on_field` itself propagate and do not trigger the fallback.
+    """
+    parser = JSONFieldStream()
+    parts: list[str] = []
+    # aclosing: a raising on_field still closes the stream and frees its limiter slot
+    async with aclosing(call_llm_stream(task, messages, **kwargs)) as stream:
+        while True:
+            try:
+                delta = await anext(stream)
+                fields = parser.feed(delta)
+            except StopAsyncIteration:
+                break
+            except Exception as e:
+                logger.warning(
+                    "llm_stream_fallback", task=task, error=str(e), received=len(parser.fields),
+                )
+                result = await call_llm_json(task, messages, **kwargs)
+                if on_field and isinstance(result, dict):
+                    for key, value in result.items():
+                        if key not in parser.fields:
+                            await on_field(key, value)
+                return result
+            parts.append(delta)
+            if on_field:
+                for key, value in fields:
+                    await on_field(key, value)
+
+    return await _parse_json_response(task, messages, "".join(parts), kwargs)
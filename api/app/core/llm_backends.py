@@ -0,0 +1,253 @@
+"""
+Pluggable LLM backends.
+
+Production traffic goes through OpenRouterBackend (defined in app.core.llm next
+to the shared client). ReplayBackend is an offline stand-in for benchmarks and
+load tests: it replays recorded responses keyed by request hash, synthesizes
+deterministic task-shaped JSON on a miss, and can inject latency, errors and
+token counts.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import random
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Protocol
+
+import structlog
+
+logger = structlog.get_logger()
+
+
+@dataclass
+class LLMResponse:
+    """A completion (or, when streaming, one chunk of it)."""
+
+    text: str
+    tokens_in: int = 0
+    tokens_out: int = 0
+
+
+class LLMBackend(Protocol):
+    async def complete(self, task: str, model: str, messages: list, **kwargs) -> LLMResponse:
+        ...
+
+    def stream(self, task: str, model: str, messages: list, **kwargs) -> AsyncIterator[LLMResponse]:
+        """Yield text deltas; token counts arrive on the final chunk."""
+        ...
+
+
+class InjectedLLMError(Exception):
+    """Failure raised by ReplayBackend to exercise retry and backoff paths."""
+
+    def __init__(self, status_code: int, message: str = "injected failure"):
+        super().__init__(f"{status_code}: {message}")
+        self.status_code = status_code
+
+
+def request_hash(model: str, messages: list, params: dict) -> str:
+    """Stable hash of a provider request (model, messages, sampling kwargs)."""
+    payload = json.dumps(
+        {"model": model, "messages": messages, "params": params},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token)."""
+    return max(1, len(text) // 4) if text else 0
+
+
+class ReplayBackend:
+    """Deterministic offline backend.
+
+    mode="replay": answer from recordings, synthesize on a miss (or raise if
+        synthesize_misses=False).
+    mode="record": forward to `inner` and append every response to `path`.
+
+    Latency is lognormal around `latency_median` seconds. `error_rate` and
+    `rate_limit_rate` are per-call probabilities of a 503 / 429. All randomness
+    comes from `seed`, so a given call sequence is reproducible.
+    """
+
+    def __init__(
+        self,
+        path: str | None = None,
+        mode: str = "replay",
+        inner: LLMBackend | None = None,
+        latency_median: float = 0.0,
+        latency_sigma: float = 0.5,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        synthesize_misses: bool = True,
+        seed: int = 0,
+    ):
+        if mode not in ("replay", "record"):
+            raise ValueError(f"Unknown replay mode: {mode}")
+        if mode == "record" and (inner is None or not path):
+            raise ValueError("Record mode needs an inner backend and a path")
+        self.path = Path(path) if path else None
+        self.mode = mode
+        self.inner = inner
+        self.latency_median = latency_median
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.synthesize_misses = synthesize_misses
+        self._rng = random.Random(seed)
+        self._recordings: dict[str, dict] = {}
+        self.stats = {"calls": 0, "replayed": 0, "synthesized": 0, "recorded": 0, "errors": 0}
+        if self.path and self.path.exists():
+            self._load()
+
+    def _load(self):
+        with self.path.open() as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._recordings[entry["key"]] = entry
+        logger.info("llm_replay_loaded", path=str(self.path), entries=len(self._recordings))
+
+    def _record(self, key: str, task: str, model: str, resp: LLMResponse):
+        entry = {
+            "key": key, "task": task, "model": model,
+            "text": resp.text, "tokens_in": resp.tokens_in, "tokens_out": resp.tokens_out,
+        }
+        self._recordings[key] = entry
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self.stats["recorded"] += 1
+
+    def _sample_latency(self) -> float:
+        if self.latency_median <= 0:
+            return 0.0
+        return self._rng.lognormvariate(math.log(self.latency_median), self.latency_sigma)
+
+    def _maybe_fail(self):
+        roll = self._rng.random()
+        if roll < self.rate_limit_rate:
+            self.stats["errors"] += 1
+            raise InjectedLLMError(429, "rate limited")
+        if roll < self.rate_limit_rate + self.error_rate:
+            self.stats["errors"] += 1
+            raise InjectedLLMError(503, "upstream error")
+
+    async def complete(self, task: str, model: str, messages: list, **kwargs) -> LLMResponse:
+        self.stats["calls"] += 1
+        key = request_hash(model, messages, kwargs)
+
+        if self.mode == "record":
+            resp = await self.inner.complete(task, model, messages, **kwargs)
+            self._record(key, task, model, resp)
+            return resp
+
+        latency = self._sample_latency()
+        self._maybe_fail()
+        if latency:
+            await asyncio.sleep(latency)
+
+        entry = self._recordings.get(key)
+        if entry is not None:
+            self.stats["replayed"] += 1
+            return LLMResponse(entry["text"], entry.get("tokens_in", 0), entry.get("tokens_out", 0))
+        if not self.synthesize_misses:
+            raise KeyError(f"No recording for {task} request {key[:12]}")
+
+        self.stats["synthesized"] += 1
+        text = synthesize_response(task, key)
+        prompt_chars = sum(len(str(m.get("content", ""))) for m in messages)
+        return LLMResponse(text, max(1, prompt_chars // 4), estimate_tokens(text))
+
+    async def stream(self, task: str, model: str, messages: list, **kwargs) -> AsyncIterator[LLMResponse]:
+        resp = await self.complete(task, model, messages, **kwargs)
+        for i in range(0, len(resp.text), 64):
+            yield LLMResponse(resp.text[i : i + 64])
+        yield LLMResponse("", resp.tokens_in, resp.tokens_out)
+
+
+# ─── Synthetic responses ─────────────────────────────────────
+
+_SYNTHETIC_OUTCOMES = ["PH wins", "PN wins", "Hung parliament"]
+
+
+def _probabilities(rng: random.Random) -> dict[str, float]:
+    raw = [rng.uniform(0.15, 0.5) for _ in _SYNTHETIC_OUTCOMES]
+    total = sum(raw)
+    return {o: round(p / total, 4) for o, p in zip(_SYNTHETIC_OUTCOMES, raw)}
+
+
+def synthesize_response(task: str, key: str) -> str:
+    """Deterministic JSON shaped like each task's expected output, seeded by request hash."""
+    rng = random.Random(key)
+    probs = _probabilities(rng)
+
+    if task == "intent_parse":
+        body = {
+            "type": "election", "region": "MY", "timeframe": "P6M",
+            "outcomes": _SYNTHETIC_OUTCOMES,
+            "key_variables": ["GDP growth", "Oil price", "Youth turnout"],
+        }
+    elif task == "data_gap_fill":
+        body = {"gap_fills": [{"field": "youth_turnout", "value": round(rng.uniform(0.5, 0.8), 3), "confidence": 0.6}]}
+    elif task == "sentiment_analysis":
+        body = {
+            "overall_sentiment": round(rng.uniform(-1, 1), 3),
+            "positive_themes": ["growth"], "negative_themes": ["cost of living"],
+            "key_events": [], "summary": "Synthetic sentiment summary.",
+        }
+    elif task == "got_reasoning":
+        dims = ["Economic", "Political", "Social", "Youth", "External"]
+        body = {
+            "dimensions": [
+                {"name": d, "analysis": f"{d} analysis", "impact": {o: round(rng.uniform(-0.2, 0.3), 3) for o in probs}}
+                for d in dims
+            ],
+            "cross_interactions": [{"from": "Economic", "to": "Political", "effect": "spillover", "strength": 0.5}],
+            "outcomes": [
+                {"name": o, "probability": p, "confidence_interval": [max(0, round(p - 0.08, 4)), min(1, round(p + 0.08, 4))], "reasoning": f"Synthetic reasoning for {o}"}
+                for o, p in probs.items()
+            ],
+            "causal_graph": {
+                "nodes": [{"id": d.lower(), "label": d, "probability": 0.5, "confidence": 0.6, "category": "factor"} for d in dims],
+                "edges": [
+                    {"source": dims[i].lower(), "target": dims[i + 1].lower(), "weight": round(rng.uniform(0.2, 0.9), 3), "type": "positive", "description": "synthetic"}
+                    for i in range(len(dims) - 1)
+                ],
+            },
+        }
+    elif task == "mcts_evaluate":
+        # Expansion and evaluation share a task; answer both shapes at once
+        body = {
+            "branches": [{"action": f"Explore factor {rng.randint(1, 99)}", "state": f"state-{key[:8]}-{i}"} for i in range(2)],
+            "score": round(rng.uniform(0.3, 0.8), 3),
+            "rationale": "synthetic",
+        }
+    elif task == "debate":
+        # Opening, rebuttal and judge rounds share a task; answer every shape
+        body = {
+            "analysis": "Synthetic debate analysis.",
+            "probabilities": probs,
+            "key_evidence": ["synthetic evidence"],
+            "rebuttals": ["synthetic rebuttal"],
+            "updated_probabilities": probs,
+            "reasoning": "Synthetic judge synthesis.",
+            "key_arguments": [{"from": "optimist", "argument": "synthetic", "weight": 0.5}],
+            "confidence": round(rng.uniform(0.4, 0.8), 3),
+        }
+    elif task == "explanation":
+        body = {
+            "explanation_text": "Synthetic explanation of the prediction.",
+            "shap_factors": [{"name": "Economic Growth", "impact": 0.3, "direction": "positive"}],
+        }
+    else:
+        body = {"result": "synthetic", "value": round(rng.random(), 4)}
+    return json.dumps(body)
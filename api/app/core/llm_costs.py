@@ -0,0 +1,143 @@
+"""
+LLM cost accounting: bounded call log, hourly rolling aggregates, USD pricing.
+Recording a call is O(1); dashboard summaries are O(buckets), not O(calls).
+"""
+
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+BUCKET_SECONDS = 3600
+RETENTION_BUCKETS = 7 * 24  # one week of hourly buckets
+LOG_SIZE = 10_000
+
+
+def _empty_totals() -> dict:
+    return {"calls": 0, "tokens_in": 0, "tokens_out": 0, "total_elapsed": 0.0, "cost_usd": 0.0}
+
+
+def _add(totals: dict, entry: dict):
+    totals["calls"] += 1
+    totals["tokens_in"] += entry["tokens_in"]
+    totals["tokens_out"] += entry["tokens_out"]
+    totals["total_elapsed"] += entry["elapsed"]
+    totals["cost_usd"] += entry["cost_usd"]
+
+
+def _merge(into: dict, other: dict):
+    for k, v in other.items():
+        into[k] += v
+
+
+class CostAggregate:
+    """Running totals overall, per model and per task."""
+
+    __slots__ = ("totals", "by_model", "by_task")
+
+    def __init__(self):
+        self.totals = _empty_totals()
+        self.by_model: dict[str, dict] = {}
+        self.by_task: dict[str, dict] = {}
+
+    def add(self, entry: dict):
+        _add(self.totals, entry)
+        _add(self.by_model.setdefault(entry["model"], _empty_totals()), entry)
+        _add(self.by_task.setdefault(entry["task"], _empty_totals()), entry)
+
+    def merge(self, other: "CostAggregate"):
+        _merge(self.totals, other.totals)
+        for model, totals in other.by_model.items():
+            _merge(self.by_model.setdefault(model, _empty_totals()), totals)
+        for task, totals in other.by_task.items():
+            _merge(self.by_task.setdefault(task, _empty_totals()), totals)
+
+    def summary(self) -> dict:
+        def _round(t: dict) -> dict:
+            return {**t, "total_elapsed": round(t["total_elapsed"], 2), "cost_usd": round(t["cost_usd"], 6)}
+
+        return {
+            "calls": self.totals["calls"],
+            "total_tokens_in": self.totals["tokens_in"],
+            "total_tokens_out": self.totals["tokens_out"],
+            "total_cost_usd": round(self.totals["cost_usd"], 6),
+            "by_model": {m: _round(t) for m, t in self.by_model.items()},
+            "by_task": {t: _round(v) for t, v in self.by_task.items()},
+        }
+
+
+class CostTracker:
+    """Ring-buffer call log plus hourly buckets and all-time totals."""
+
+    def __init__(self, log_size: int = LOG_SIZE, retention_buckets: int = RETENTION_BUCKETS):
+        self.entries: deque[dict] = deque(maxlen=log_size)
+        self.retention_buckets = retention_buckets
+        self._buckets: OrderedDict[int, CostAggregate] = OrderedDict()
+        self.all_time = CostAggregate()
+
+    def clear(self):
+        self.entries.clear()
+        self._buckets.clear()
+        self.all_time = CostAggregate()
+
+    def record(self, entry: dict):
+        self.entries.append(entry)
+        self.all_time.add(entry)
+        bucket_start = int(entry["timestamp"]) // BUCKET_SECONDS * BUCKET_SECONDS
+        bucket = self._buckets.get(bucket_start)
+        if bucket is None:
+            bucket = self._buckets[bucket_start] = CostAggregate()
+            oldest_kept = bucket_start - (self.retention_buckets - 1) * BUCKET_SECONDS
+            while next(iter(self._buckets)) < oldest_kept:
+                self._buckets.popitem(last=False)
+        bucket.add(entry)
+
+    def window(self, seconds: int, now: float | None = None) -> CostAggregate:
+        """Aggregate of the buckets overlapping the last `seconds` (hour granularity)."""
+        now = time.time() if now is None else now
+        since = int(now - seconds) // BUCKET_SECONDS * BUCKET_SECONDS
+        agg = CostAggregate()
+        for bucket_start in reversed(self._buckets):
+            if bucket_start < since:
+                break
+            agg.merge(self._buckets[bucket_start])
+        return agg
+
+
+# ─── Per-run cost scopes ─────────────────────────────────────
+
+@dataclass
+class CostScope:
+    """Totals for every LLM call made inside one llm_cost_scope() block."""
+
+    calls: int = 0
+    tokens_in: int = 0
+    tokens_out: int = 0
+    cost_usd: float = 0.0
+
+
+_scope: ContextVar[CostScope | None] = ContextVar("llm_cost_scope", default=None)
+
+
+@contextmanager
+def llm_cost_scope(scope: CostScope | None = None):
+    """Attribute the cost of calls in this block (and its child tasks) to one scope.
+
+    Pass a scope from an earlier block to keep adding to its totals.
+    """
+    scope = scope if scope is not None else CostScope()
+    token = _scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _scope.reset(token)
+
+
+def charge_current_scope(entry: dict):
+    scope = _scope.get()
+    if scope is not None:
+        scope.calls += 1
+        scope.tokens_in += entry["tokens_in"]
+        scope.tokens_out += entry["tokens_out"]
+        scope.cost_usd += entry["cost_usd"]
@@ -0,0 +1,180 @@
+"""
+Rate limiting with GCRA (generic cell rate algorithm).
+
+Each key stores a single float, its theoretical arrival time (TAT), so a check
+is O(1) regardless of how many requests fall inside the window. A key whose TAT
+is in the past has its full burst available again and carries no information,
+so idle keys are swept out and the table is capped at `max_keys`.
+
+LocalRateLimiter keeps state in-process; RedisRateLimiter runs the same
+algorithm in a Lua script so the limit holds across workers and replicas.
+"""
+
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import structlog
+
+from app.core import cache
+
+logger = structlog.get_logger()
+
+
+@dataclass(slots=True)
+class RateLimitResult:
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float  # seconds until this request would be allowed (0 if allowed)
+    reset_after: float  # seconds until the full burst is available again
+
+
+def gcra(tat: float, now: float, cost: int, limit: int, window: float) -> tuple[RateLimitResult, float]:
+    """One GCRA decision. Returns (result, new TAT); the TAT is unchanged when denied.
+
+    `limit` requests per `window` seconds, allowing the whole limit as a burst.
+    """
+    interval = window / limit
+    tat = max(tat, now)
+    new_tat = tat + cost * interval
+    allow_at = new_tat - window
+    if allow_at > now:
+        remaining = max(0, math.floor((window - (tat - now)) / interval))
+        return RateLimitResult(False, limit, remaining, allow_at - now, tat - now), tat
+    remaining = max(0, math.floor((window - (new_tat - now)) / interval))
+    return RateLimitResult(True, limit, remaining, 0.0, new_tat - now), new_tat
+
+
+class LocalRateLimiter:
+    """In-process GCRA limiter with bounded memory."""
+
+    def __init__(
+        self,
+        limit: int = 60,
+        window: float = 60,
+        max_keys: int = 100_000,
+        sweep_interval: float = 30.0,
+    ):
+        self.limit = limit
+        self.window = window
+        self.max_keys = max_keys
+        self.sweep_interval = sweep_interval
+        # key -> TAT, least recently used first
+        self._tat: OrderedDict[str, float] = OrderedDict()
+        self._next_sweep = 0.0
+        self.stats = {"allowed": 0, "denied": 0, "evicted": 0}
+
+    def __len__(self) -> int:
+        return len(self._tat)
+
+    def hit(self, key: str, cost: int = 1, now: float | None = None) -> RateLimitResult:
+        now = time.monotonic() if now is None else now
+        if now >= self._next_sweep:
+            self.sweep(now)
+        result, tat = gcra(self._tat.get(key, now), now, cost, self.limit, self.window)
+        if result.allowed:
+            self._tat[key] = tat
+            self._tat.move_to_end(key)
+            if len(self._tat) > self.max_keys:
+                self._tat.popitem(last=False)
+                self.stats["evicted"] += 1
+            self.stats["allowed"] += 1
+        else:
+            self.stats["denied"] += 1
+        return result
+
+    def sweep(self, now: float | None = None):
+        """Drop keys whose allowance has fully recovered.
+
+        Keys are kept in last-use order, so the scan stops at the first key that
+        is still active; the cost is proportional to the keys removed.
+        """
+        now = time.monotonic() if now is None else now
+        self._next_sweep = now + self.sweep_interval
+        while self._tat:
+            key, tat = next(iter(self._tat.items()))
+            if tat > now:
+                break
+            del self._tat[key]
+            self.stats["evicted"] += 1
+
+    def reset(self):
+        self._tat.clear()
+
+
+def route_cost(costs: dict[str, int], method: str, path: str) -> int:
+    """Weight of one request, looked up as "METHOD /path" (default 1)."""
+    return costs.get(f"{method} {path}", 1)
+
+
+# ─── Distributed limiter ─────────────────────────────────────
+
+# GCRA in one atomic step. Times are milliseconds from the Redis clock, so
+# replicas with skewed clocks still agree. The key expires once its allowance
+# has fully recovered, which is when it stops carrying information.
+_GCRA_LUA = """
+local cost = tonumber(ARGV[1])
+local limit = tonumber(ARGV[2])
+local window = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = t[1] * 1000 + t[2] / 1000
+local interval = window / limit
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then tat = now end
+local new_tat = tat + cost * interval
+local allow_at = new_tat - window
+if allow_at > now then
+  return {0, math.max(0, math.floor((window - (tat - now)) / interval)), math.ceil(allow_at - now), math.ceil(tat - now)}
+end
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.max(1, math.ceil(new_tat - now)))
+return {1, math.max(0, math.floor((window - (new_tat - now)) / interval)), 0, math.ceil(new_tat - now)}
+"""
+
+
+class RedisRateLimiter:
+    """GCRA shared by every worker and replica through Redis.
+
+    Falls back to a per-process LocalRateLimiter while Redis is unavailable, so
+    abuse protection degrades (limits become per-process) instead of vanishing.
+    """
+
+    def __init__(self, limit: int = 60, window: float = 60, fallback: LocalRateLimiter | None = None,
+                 prefix: str = "ratelimit", use_redis: bool = True):
+        self.limit = limit
+        self.window = window
+        self.prefix = prefix
+        self.use_redis = use_redis
+        self.fallback = fallback or LocalRateLimiter(limit, window)
+        self._script = None
+        self._script_client = None
+        self.stats = {"redis": 0, "fallback": 0, "denied": 0}
+
+    async def hit(self, key: str, cost: int = 1) -> RateLimitResult:
+        r = await cache.get_redis() if self.use_redis else None
+        if r is not None:
+            try:
+                result = await self._redis_hit(r, key, cost)
+            except Exception as e:
+                cache._on_redis_error(e)
+                logger.warning("rate_limit_redis_error", error=str(e))
+            else:
+                self.stats["redis"] += 1
+                if not result.allowed:
+                    self.stats["denied"] += 1
+                return result
+        self.stats["fallback"] += 1
+        result = self.fallback.hit(key, cost)
+        if not result.allowed:
+            self.stats["denied"] += 1
+        return result
+
+    async def _redis_hit(self, r, key: str, cost: int) -> RateLimitResult:
+        if self._script is None or self._script_client is not r:
+            self._script = r.register_script(_GCRA_LUA)
+            self._script_client = r
+        allowed, remaining, retry_ms, reset_ms = await self._script(
+            keys=[f"{self.prefix}:{key}"], args=[cost, self.limit, self.window * 1000],
+        )
+        return RateLimitResult(bool(allowed), self.limit, int(remaining), retry_ms / 1000, reset_ms / 1000)
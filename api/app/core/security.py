@@ -1,37 +1,96 @@
 """Security middleware — rate limiting, input sanitization."""
 
-import time
-from collections import defaultdict
+import math
 
-from fastapi import Request, HTTPException
-from starlette.middleware.base import BaseHTTPMiddleware
+from jose import JWTError
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
+from app.core.auth import decode_token
+from app.core.config import settings
+from app.core.rate_limit import (
+    LocalRateLimiter,
+    RateLimitResult,
+    RedisRateLimiter,
+    route_cost,
+)
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    """Simple in-memory rate limiter. Production should use Redis."""
 
-    def __init__(self, app, max_requests: int = 60, window: int = 60):
-        super().__init__(app)
-        self.max_requests = max_requests
-        self.window = window
-        self._requests: dict[str, list[float]] = defaultdict(list)
+def rate_limit_key(authorization: str | None, ip: str) -> str:
+    """Limit signed-in users by account (shared across their IPs) and everyone else by IP.
+
+    The token is verified first, so a forged `sub` cannot be used to dodge the IP limit.
+    """
+    if authorization and authorization.startswith("Bearer "):
+        try:
+            user_id = decode_token(authorization[7:]).get("sub")
+        except JWTError:
+            user_id = None
+        if user_id:
+            return f"user:{user_id}"
+    return f"ip:{ip}"
+
+
+class RateLimitMiddleware:
+    """GCRA rate limiter shared across workers via Redis (per-process fallback).
+
+    A plain ASGI middleware: responses stream straight through, every limited
+    response carries X-RateLimit-Limit/Remaining/Reset, and rejected requests
+    get a 429 with Retry-After. Expensive routes cost more
+    (settings.rate_limit_costs).
+    """
+
+    def __init__(self, app: ASGIApp, max_requests: int = 60, window: int = 60, costs: dict[str, int] | None = None):
+        self.app = app
+        self.limiter = RedisRateLimiter(
+            limit=max_requests,
+            window=window,
+            fallback=LocalRateLimiter(limit=max_requests, window=window, max_keys=settings.rate_limit_max_keys),
+            use_redis=settings.rate_limit_redis,
+        )
+        self.costs = settings.rate_limit_costs if costs is None else costs
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
 
-    async def dispatch(self, request: Request, call_next):
         # Skip rate limiting for test clients and health checks
-        ip = request.client.host if request.client else "unknown"
-        if ip in ("testclient", "127.0.0.1", "localhost") or request.url.path == "/health":
-            return await call_next(request)
+        client = scope.get("client")
+        ip = client[0] if client else "unknown"
+        if ip in ("testclient", "127.0.0.1", "localhost") or scope["path"] == "/health":
+            return await self.app(scope, receive, send)
+
+        authorization = None
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                authorization = value.decode("latin-1")
+                break
+        key = rate_limit_key(authorization, ip)
+        cost = route_cost(self.costs, scope["method"], scope["path"])
+        result = await self.limiter.hit(key, cost)
+        headers = _rate_limit_headers(result)
+
+        if not result.allowed:
+            headers["Retry-After"] = str(math.ceil(result.retry_after))
+            response = JSONResponse({"detail": "Rate limit exceeded"}, status_code=429, headers=headers)
+            return await response(scope, receive, send)
+
+        raw_headers = [(k.lower().encode(), v.encode()) for k, v in headers.items()]
 
-        now = time.time()
+        async def send_with_headers(message: Message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), *raw_headers]
+            await send(message)
 
-        # Cleanup expired entries
-        self._requests[ip] = [t for t in self._requests[ip] if now - t < self.window]
+        await self.app(scope, receive, send_with_headers)
 
-        if len(self._requests[ip]) >= self.max_requests:
-            raise HTTPException(status_code=429, detail="Rate limit exceeded")
 
-        self._requests[ip].append(now)
-        return await call_next(request)
+def _rate_limit_headers(result: RateLimitResult) -> dict[str, str]:
+    return {
+        "X-RateLimit-Limit": str(result.limit),
+        "X-RateLimit-Remaining": str(result.remaining),
+        "X-RateLimit-Reset": str(math.ceil(result.reset_after)),
+    }
 
 
 # Tightened CORS origins for production
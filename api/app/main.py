@@ -1,20 +1,32 @@
 import os
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
-from app.core.security import RateLimitMiddleware, ALLOWED_ORIGINS
-from app.routers import health, predictions, users, leaderboard, studio, exchange, drift
+from app.core.security import ALLOWED_ORIGINS, RateLimitMiddleware
+from app.routers import drift, exchange, health, leaderboard, predictions, studio, users
+from app.services.jobs import ensure_embedded_worker, stop_embedded_worker
 
 VERSION = "1.5.0"
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Runs queued pipelines in this process (in-memory backend or JOBS_EMBEDDED_WORKER)
+    ensure_embedded_worker()
+    yield
+    await stop_embedded_worker()
+
+
 app = FastAPI(
     title=settings.app_name,
     version=VERSION,
     description="FutureOS — Future Computation Engine API",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 # Security: Rate limiting
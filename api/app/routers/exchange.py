@@ -1,16 +1,19 @@
 """Exchange API routes — prediction market."""
 
+import copy
 import uuid
-from typing import Optional
+
 from fastapi import APIRouter, Depends, HTTPException, Query
 
 from app.core.auth import get_current_user
-from app.schemas.exchange import MarketCreate, PositionCreate, MarketResolve
-from app.services.exchange.signal_fusion import SignalFusion
+from app.core.cache import cached, invalidate_tag
+from app.schemas.exchange import MarketCreate, MarketResolve, PositionCreate
 from app.services.exchange.reputation import (
-    INITIAL_POINTS, calculate_potential_profit, calculate_payout,
-    calculate_brier_score, calculate_reputation_score,
+    INITIAL_POINTS,
+    calculate_payout,
+    calculate_potential_profit,
 )
+from app.services.exchange.signal_fusion import SignalFusion
 
 router = APIRouter(prefix="/api/v1/exchange", tags=["exchange"])
 
@@ -33,9 +36,9 @@ def _get_balance(user_id: str) -> float:
 
 @router.get("/markets")
 async def list_markets(
-    category: Optional[str] = Query(None),
-    sort: Optional[str] = Query("newest"),
-    status: Optional[str] = Query(None),
+    category: str | None = Query(None),
+    sort: str | None = Query("newest"),
+    status: str | None = Query(None),
 ):
     """List markets with optional filtering."""
     markets = list(_markets.values())
@@ -91,7 +94,7 @@ async def get_market(market_id: str):
     # Compute signals
     fusion = SignalFusion()
     ai_signal = market.get("ai_signal", {"outcomes": []})
-    crowd_signal = _compute_crowd_signal(market_id)
+    crowd_signal = await _compute_crowd_signal(market_id)
     rep_signal = _compute_reputation_signal(market_id)
     fused = fusion.compute(ai_signal, crowd_signal, rep_signal)
 
@@ -139,7 +142,7 @@ async def place_bet(market_id: str, body: PositionCreate, user: dict = Depends(g
         raise HTTPException(status_code=400, detail=f"Insufficient balance: {balance}")
 
     # Current price = current crowd probability for this outcome
-    crowd = _compute_crowd_signal(market_id)
+    crowd = await _compute_crowd_signal(market_id)
     price = next(
         (o["probability"] for o in crowd.get("outcomes", []) if o["name"] == body.outcome_name),
         0.5,
@@ -157,6 +160,7 @@ async def place_bet(market_id: str, body: PositionCreate, user: dict = Depends(g
     _positions[position_id] = position
     _user_balances[user["id"]] = balance - body.amount
     market["position_count"] = market.get("position_count", 0) + 1
+    await invalidate_tag(f"market:{market_id}")
 
     potential_profit = calculate_potential_profit(body.amount, price)
 
@@ -194,7 +198,7 @@ async def get_signals(market_id: str):
 
     fusion = SignalFusion()
     ai_signal = market.get("ai_signal", {"outcomes": []})
-    crowd_signal = _compute_crowd_signal(market_id)
+    crowd_signal = await _compute_crowd_signal(market_id)
     rep_signal = _compute_reputation_signal(market_id)
     result = fusion.compute(ai_signal, crowd_signal, rep_signal)
     return result
@@ -260,12 +264,15 @@ async def get_portfolio(user: dict = Depends(get_current_user)):
 
 # ─── Helper functions ───
 
-def _compute_crowd_signal(market_id: str) -> dict:
-    """Compute crowd probability from bet distribution."""
+# Positions live in this process only, so the signal is not shared through Redis
+@cached("crowd", ttl=300, tags=("market:{market_id}",), local_only=True)
+async def _compute_crowd_signal(market_id: str) -> dict:
+    """Compute crowd probability from bet distribution (cached until the next bet)."""
     positions = [p for p in _positions.values() if p["market_id"] == market_id]
     if not positions:
         market = _markets.get(market_id, {})
-        return market.get("ai_signal", {"outcomes": [{"name": "Yes", "probability": 0.5}, {"name": "No", "probability": 0.5}]})
+        signal = market.get("ai_signal", {"outcomes": [{"name": "Yes", "probability": 0.5}, {"name": "No", "probability": 0.5}]})
+        return copy.deepcopy(signal)
 
     volumes: dict[str, float] = {}
     for p in positions:
@@ -1,9 +1,13 @@
-import time
-
 from fastapi import APIRouter
 
-from app.core.llm import get_cost_log, get_uptime_seconds
-from app.core.cache import get_redis
+from app.core.auth import get_token_cache_stats
+from app.core.cache import get_cache_stats, get_redis
+from app.core.llm import get_cost_tracker, get_llm_stats, get_uptime_seconds
+from app.services.jobs import (
+    JobQueueUnavailableError,
+    get_embedded_worker,
+    get_job_queue,
+)
 
 router = APIRouter(tags=["health"])
 
@@ -37,35 +41,39 @@ async def health_check():
 
 @router.get("/api/v1/admin/costs")
 async def get_costs():
-    """LLM cost tracking dashboard."""
-    log = get_cost_log()
-    now = time.time()
-
-    day_ago = now - 86400
-    week_ago = now - 604800
-
-    today_calls = [c for c in log if c["timestamp"] > day_ago]
-    week_calls = [c for c in log if c["timestamp"] > week_ago]
-
-    def _summarize(calls: list) -> dict:
-        by_model: dict[str, dict] = {}
-        for c in calls:
-            m = c["model"]
-            if m not in by_model:
-                by_model[m] = {"calls": 0, "tokens_in": 0, "tokens_out": 0, "total_elapsed": 0}
-            by_model[m]["calls"] += 1
-            by_model[m]["tokens_in"] += c.get("tokens_in", 0)
-            by_model[m]["tokens_out"] += c.get("tokens_out", 0)
-            by_model[m]["total_elapsed"] += c.get("elapsed", 0)
-        return {
-            "calls": len(calls),
-            "total_tokens_in": sum(c.get("tokens_in", 0) for c in calls),
-            "total_tokens_out": sum(c.get("tokens_out", 0) for c in calls),
-            "by_model": by_model,
-        }
-
+    """LLM cost tracking dashboard (hourly buckets; all-time since process start)."""
+    tracker = get_cost_tracker()
     return {
-        "today": _summarize(today_calls),
-        "this_week": _summarize(week_calls),
-        "all_time": _summarize(log),
+        "today": tracker.window(86400).summary(),
+        "this_week": tracker.window(604800).summary(),
+        "all_time": tracker.all_time.summary(),
     }
+
+
+@router.get("/api/v1/admin/llm")
+async def get_llm_metrics():
+    """LLM wrapper metrics (response cache)."""
+    return get_llm_stats()
+
+
+@router.get("/api/v1/admin/cache")
+async def get_cache_metrics():
+    """Two-tier cache metrics (L1 size, Redis state, per-prefix hit rates)."""
+    return get_cache_stats()
+
+
+@router.get("/api/v1/admin/auth")
+async def get_auth_metrics():
+    """Verified-JWT cache metrics."""
+    return get_token_cache_stats()
+
+
+@router.get("/api/v1/admin/jobs")
+async def get_job_metrics():
+    """Job queue depth and wait time, plus this process's worker if it runs one."""
+    try:
+        queue = await get_job_queue().stats()
+    except JobQueueUnavailableError as e:
+        queue = {"error": str(e)}
+    worker = get_embedded_worker()
+    return {"queue": queue, "worker": worker.stats() if worker else None}
@@ -2,12 +2,20 @@
 
 from fastapi import APIRouter
 
+from app.core.cache import cached
+
 router = APIRouter(prefix="/api/v1", tags=["leaderboard"])
 
 
 @router.get("/leaderboard")
 async def get_leaderboard():
     """Get top users ranked by reputation score."""
+    return await _ranked_users()
+
+
+@cached("leaderboard", ttl=60, tags=("leaderboard",))
+async def _ranked_users() -> list[dict]:
+    """Top 50 profiles by reputation (invalidated when a profile changes)."""
     from app.routers.users import _user_profiles
 
     users = list(_user_profiles.values())
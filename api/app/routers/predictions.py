@@ -1,65 +1,182 @@
 """Prediction API routes."""
 
-import asyncio
+import copy
 import json
 import uuid
-import time
-from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 
 from app.core.auth import get_current_user
-from app.schemas.prediction import PredictionCreate, PredictionResponse, PredictionUpdate, VariableRerun
+from app.core.config import settings
+from app.core.llm import Priority, llm_priority
+from app.schemas.prediction import (
+    PredictionBatchCreate,
+    PredictionBatchItem,
+    PredictionBatchResponse,
+    PredictionCreate,
+    PredictionResponse,
+    PredictionUpdate,
+    VariableRerun,
+)
+from app.services.checkpoints import load_checkpoints
+from app.services.dedup import find_reusable, query_fingerprint, remember
+from app.services.jobs import (
+    CANCELLED,
+    COMPLETED,
+    FAILED,
+    FINISHED,
+    RUNNING,
+    JobPriority,
+    JobQueueUnavailableError,
+    ensure_embedded_worker,
+    get_job_queue,
+)
+from app.services.rerun_sessions import get_rerun_session
 
 router = APIRouter(prefix="/api/v1/predictions", tags=["predictions"])
 
 # In-memory store for MVP (will be replaced by Supabase)
 _predictions: dict[str, dict] = {}
 _results: dict[str, dict] = {}
+_batches: dict[str, dict] = {}
 
 
-async def _update_prediction_status(prediction_id: str, status: str):
-    """Update prediction status (MVP: in-memory, production: Supabase)."""
-    if prediction_id in _predictions:
-        _predictions[prediction_id]["status"] = status
-
-
-async def _run_pipeline_background(prediction_id: str, query: str):
-    """Run the prediction pipeline in the background."""
-    from app.services.prediction_pipeline import run_prediction_pipeline
+async def _sync_from_job(prediction_id: str):
+    """Copy status, partial output and the result from the prediction's job.
 
-    start = time.time()
+    Pipelines run on the job queue (possibly in another process), so the job
+    record is the source of truth until the prediction reaches a final state.
+    A deduplicated prediction follows the job of the run it reuses.
+    """
+    pred = _predictions.get(prediction_id)
+    if pred is None or pred["status"] in FINISHED:
+        return
     try:
-        result = await run_prediction_pipeline(
-            prediction_id=prediction_id,
-            query=query,
-            update_status=_update_prediction_status,
-        )
-        result["metadata"]["total_time_seconds"] = round(time.time() - start, 1)
+        job = await get_job_queue().get(pred.get("job_id", prediction_id))
+        if job is not None and job.status == COMPLETED and job.result.get("reused_from"):
+            pred["job_id"] = pred["reused_from"] = job.result["reused_from"]
+            job = await get_job_queue().get(pred["job_id"])
+    except JobQueueUnavailableError:
+        return
+    if job is None:
+        return
+    if job.partial:
+        pred["partial"] = job.partial
+    if job.status == RUNNING and job.stage:
+        pred["status"] = job.stage
+    elif job.status == COMPLETED:
+        # Each prediction owns its stored result: a variable rerun edits it in
+        # place and must not reach the job record that later reuses copy from
+        result = copy.deepcopy(job.result)
+        if job.id != prediction_id:
+            # Another user's run: keep its answer, not its wording or id
+            result = {**result, "prediction_id": prediction_id, "query": pred["query"],
+                      "metadata": {**result["metadata"], "reused_from": job.id}}
         _results[prediction_id] = result
-        _predictions[prediction_id]["status"] = "completed"
-    except Exception as e:
-        _predictions[prediction_id]["status"] = "failed"
-        _predictions[prediction_id]["error"] = str(e)
+        pred["status"] = "completed"
+        pred.pop("partial", None)
+    elif job.status in FINISHED:
+        pred["status"] = job.status
+        if job.error:
+            pred["error"] = job.error
 
 
-@router.post("/create", response_model=PredictionResponse)
-async def create_prediction(
-    body: PredictionCreate,
-    background_tasks: BackgroundTasks,
-    user: dict = Depends(get_current_user),
-):
+async def _submit_prediction(
+    user: dict, query: str, options: dict | None = None, force_fresh: bool = False,
+    priority: int = JobPriority.NORMAL, batch_id: str | None = None,
+) -> PredictionResponse:
+    """Create a prediction and queue its run, or link it to a reusable one."""
     prediction_id = str(uuid.uuid4())
     _predictions[prediction_id] = {
         "id": prediction_id,
         "user_id": user["id"],
-        "query": body.query,
+        "query": query,
         "status": "processing",
-        "options": body.options or {},
+        "options": options or {},
     }
-    background_tasks.add_task(_run_pipeline_background, prediction_id, body.query)
+    if batch_id:
+        _predictions[prediction_id]["batch_id"] = batch_id
+    fingerprint = query_fingerprint(query)
+    try:
+        source = None if force_fresh else await find_reusable(fingerprint)
+        if source:
+            # Same question answered recently or being answered now: share that run
+            _predictions[prediction_id].update(job_id=source, reused_from=source)
+            await _sync_from_job(prediction_id)
+            status = _predictions[prediction_id]["status"]
+            return PredictionResponse(
+                id=prediction_id, status=status, estimated_seconds=0 if status == "completed" else 120,
+                reused_from=source,
+            )
+        payload = {"query": query, "force_fresh": force_fresh}
+        if batch_id:
+            payload["batch_id"] = batch_id
+        await get_job_queue().enqueue("prediction", payload, priority=priority, job_id=prediction_id)
+    except JobQueueUnavailableError:
+        del _predictions[prediction_id]
+        raise HTTPException(status_code=503, detail="Prediction queue unavailable, try again shortly")
+    await remember(fingerprint, prediction_id)
+    ensure_embedded_worker()
     return PredictionResponse(id=prediction_id, status="processing", estimated_seconds=120)
 
 
+@router.post("/create", response_model=PredictionResponse)
+async def create_prediction(
+    body: PredictionCreate,
+    user: dict = Depends(get_current_user),
+):
+    return await _submit_prediction(user, body.query, body.options, body.force_fresh)
+
+
+async def _batch_response(batch_id: str) -> PredictionBatchResponse:
+    batch = _batches[batch_id]
+    items = []
+    for query, prediction_id in batch["items"]:
+        await _sync_from_job(prediction_id)
+        pred = _predictions.get(prediction_id, {})
+        items.append(PredictionBatchItem(
+            query=query, prediction_id=prediction_id,
+            status=pred.get("status", "unknown"), reused_from=pred.get("reused_from"),
+        ))
+    counts: dict[str, int] = {}
+    for item in items:
+        key = item.status if item.status in FINISHED else "processing"
+        counts[key] = counts.get(key, 0) + 1
+    status = "processing" if counts.get("processing") else "completed"
+    return PredictionBatchResponse(id=batch_id, status=status, counts=counts, items=items)
+
+
+@router.post("/batch", response_model=PredictionBatchResponse)
+async def create_prediction_batch(
+    body: PredictionBatchCreate,
+    user: dict = Depends(get_current_user),
+):
+    """Submit many queries at once.
+
+    Items run as low-priority jobs whose LLM calls yield to interactive and
+    single-prediction traffic. Repeated queries share one run, and items
+    of the same region share one data collection.
+    """
+    if len(body.queries) > settings.batch_max_items:
+        raise HTTPException(status_code=422, detail=f"At most {settings.batch_max_items} queries per batch")
+    batch_id = str(uuid.uuid4())
+    _batches[batch_id] = {"id": batch_id, "user_id": user["id"], "items": []}
+    for query in body.queries:
+        created = await _submit_prediction(
+            user, query, force_fresh=body.force_fresh, priority=JobPriority.LOW, batch_id=batch_id,
+        )
+        _batches[batch_id]["items"].append((query, created.id))
+    return await _batch_response(batch_id)
+
+
+@router.get("/batch/{batch_id}", response_model=PredictionBatchResponse)
+async def get_prediction_batch(batch_id: str):
+    if batch_id not in _batches:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return await _batch_response(batch_id)
+
+
 @router.get("/trending")
 async def get_trending():
     """Get trending/public predictions. No auth required."""
@@ -94,8 +211,8 @@ async def get_trending():
 
 @router.get("/explore")
 async def explore_predictions(
-    category: Optional[str] = Query(None),
-    sort: Optional[str] = Query("newest"),
+    category: str | None = Query(None),
+    sort: str | None = Query("newest"),
     page: int = Query(1, ge=1),
 ):
     """Get public predictions with filtering and sorting."""
@@ -121,14 +238,72 @@ async def explore_predictions(
 
 @router.get("/{prediction_id}")
 async def get_prediction(prediction_id: str):
+    await _sync_from_job(prediction_id)
     pred = _predictions.get(prediction_id)
     if not pred:
         raise HTTPException(status_code=404, detail="Prediction not found")
     return pred
 
 
+SSE_KEEPALIVE_SECONDS = 15
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def _prediction_events(prediction_id: str, request: Request):
+    pred = _predictions[prediction_id]
+    queue = get_job_queue()
+    try:
+        # A deduplicated prediction can switch to another run's job mid-stream
+        first = True
+        while pred["status"] not in FINISHED:
+            job_id = pred.get("job_id", prediction_id)
+            async with queue.subscribe(job_id) as events:
+                # Snapshot after subscribing so no event falls between the two
+                await _sync_from_job(prediction_id)
+                if first:
+                    yield _sse("status", {"status": pred["status"], "partial": pred.get("partial", {})})
+                    first = False
+                while pred["status"] not in FINISHED and pred.get("job_id", prediction_id) == job_id:
+                    event = await events.next(SSE_KEEPALIVE_SECONDS)
+                    if event is None:
+                        if await request.is_disconnected():
+                            return
+                        yield ": keepalive\n\n"
+                    elif event["type"] == "finished":
+                        await _sync_from_job(prediction_id)
+                    else:
+                        yield _sse(event["type"], {k: v for k, v in event.items() if k != "type"})
+    except JobQueueUnavailableError:
+        yield _sse("error", {"detail": "Prediction queue unavailable"})
+        return
+    if first:
+        yield _sse("status", {"status": pred["status"], "partial": {}})
+    yield _sse("done", {"status": pred["status"], "error": pred.get("error"), "reused_from": pred.get("reused_from")})
+
+
+@router.get("/{prediction_id}/events")
+async def stream_prediction_events(prediction_id: str, request: Request):
+    """Server-sent events for a prediction's progress (replaces status polling).
+
+    Sends a `status` snapshot on connect, then `started`, `stage` (stage_N_done)
+    and `partial` (engine output as it streams in) events, and a final `done`.
+    """
+    await _sync_from_job(prediction_id)
+    if prediction_id not in _predictions:
+        raise HTTPException(status_code=404, detail="Prediction not found")
+    return StreamingResponse(
+        _prediction_events(prediction_id, request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/{prediction_id}/result")
 async def get_prediction_result(prediction_id: str):
+    await _sync_from_job(prediction_id)
     result = _results.get(prediction_id)
     if not result:
         pred = _predictions.get(prediction_id)
@@ -153,6 +328,7 @@ async def get_prediction_result(prediction_id: str):
 @router.get("/{prediction_id}/agents")
 async def get_prediction_agents(prediction_id: str):
     """Get agent simulation data for visualization."""
+    await _sync_from_job(prediction_id)
     result = _results.get(prediction_id)
     if not result:
         raise HTTPException(status_code=404, detail="Result not found")
@@ -170,28 +346,113 @@ async def rerun_prediction(
     body: VariableRerun,
     user: dict = Depends(get_current_user),
 ):
+    await _sync_from_job(prediction_id)
     result = _results.get(prediction_id)
     if not result:
         raise HTTPException(status_code=404, detail="Result not found")
 
     from app.services.prediction_pipeline import rerun_with_variables
 
-    try:
-        new_result = await rerun_with_variables(
-            task=result["task"],
-            original_data=result["data"],
-            got_result={"outcomes": result["outcomes"], "dimensions": result["reasoning"].get("got_tree", [])},
-            new_variables=body.variables,
-        )
-        # Update stored result
+    async def _run():
+        # Read at run time: a debounced request sees the latest stored result
+        current = _results[prediction_id]
+        # Stages 2-4 are reused from the original run rather than recomputed
+        checkpoints = await load_checkpoints(_predictions.get(prediction_id, {}).get("job_id", prediction_id))
+        # A user is waiting on this one: jump ahead of background pipelines
+        with llm_priority(Priority.INTERACTIVE):
+            return await rerun_with_variables(
+                task=current["task"],
+                original_data=current["data"],
+                got_result={"outcomes": current["outcomes"], "dimensions": current["reasoning"].get("got_tree", [])},
+                new_variables=body.variables,
+                sim_result=checkpoints.get("simulation"),
+                previous=current,
+                mode=body.mode,
+            )
+
+    def _store(new_result: dict):
         _results[prediction_id]["outcomes"] = new_result["outcomes"]
         _results[prediction_id]["causal_graph"] = new_result["causal_graph"]
         _results[prediction_id]["reasoning"] = new_result["reasoning"]
-        return new_result
+
+    # Rapid slider changes are debounced and superseded reruns cancelled;
+    # numeric reruns make no LLM calls, so they run immediately
+    debounce = 0.0 if body.mode == "numeric" else settings.rerun_debounce_seconds
+    try:
+        return await get_rerun_session(prediction_id).submit(_run, on_result=_store, debounce=debounce)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Rerun failed: {str(e)}")
 
 
+@router.post("/{prediction_id}/cancel")
+async def cancel_prediction(
+    prediction_id: str,
+    user: dict = Depends(get_current_user),
+):
+    """Cancel a queued or running prediction.
+
+    A run shared through reuse is only cancelled once no other prediction
+    follows it; until then the caller's prediction just stops following it.
+    """
+    pred = _predictions.get(prediction_id)
+    if not pred:
+        raise HTTPException(status_code=404, detail="Prediction not found")
+    if pred.get("user_id") != user["id"]:
+        raise HTTPException(status_code=403, detail="Not your prediction")
+    await _sync_from_job(prediction_id)
+    if pred["status"] in FINISHED:
+        raise HTTPException(status_code=409, detail=f"Prediction already {pred['status']}")
+    job_id = pred.get("job_id", prediction_id)
+    if _followers(job_id, exclude=prediction_id):
+        pred["status"] = CANCELLED
+        return {"id": prediction_id, "status": CANCELLED}
+    try:
+        cancelled = await get_job_queue().cancel(job_id)
+    except JobQueueUnavailableError:
+        raise HTTPException(status_code=503, detail="Prediction queue unavailable, try again shortly")
+    if not cancelled:
+        raise HTTPException(status_code=409, detail=f"Prediction already {pred['status']}")
+    await _sync_from_job(prediction_id)
+    # A running pipeline stops at its worker's next check
+    return {"id": prediction_id, "status": pred["status"] if pred["status"] == CANCELLED else "cancelling"}
+
+
+def _followers(job_id: str, exclude: str) -> list[str]:
+    """Unfinished predictions other than `exclude` that follow the job `job_id`."""
+    return [
+        pid for pid, p in _predictions.items()
+        if pid != exclude and p["status"] not in FINISHED and p.get("job_id", pid) == job_id
+    ]
+
+
+@router.post("/{prediction_id}/retry")
+async def retry_prediction(
+    prediction_id: str,
+    user: dict = Depends(get_current_user),
+):
+    """Re-queue a failed or cancelled prediction; checkpointed stages are not rerun."""
+    pred = _predictions.get(prediction_id)
+    if not pred:
+        raise HTTPException(status_code=404, detail="Prediction not found")
+    if pred.get("user_id") != user["id"]:
+        raise HTTPException(status_code=403, detail="Not your prediction")
+    await _sync_from_job(prediction_id)
+    if pred["status"] not in (FAILED, CANCELLED):
+        raise HTTPException(status_code=409, detail=f"Prediction is {pred['status']}")
+    try:
+        job = await get_job_queue().get(prediction_id)
+        # Cancelled while others still followed it: the run is still going, rejoin it
+        if job is None or job.status in FINISHED:
+            await get_job_queue().enqueue("prediction", {"query": pred["query"]}, job_id=prediction_id)
+    except JobQueueUnavailableError:
+        raise HTTPException(status_code=503, detail="Prediction queue unavailable, try again shortly")
+    ensure_embedded_worker()
+    pred["status"] = "processing"
+    for key in ("error", "job_id", "reused_from"):
+        pred.pop(key, None)
+    return PredictionResponse(id=prediction_id, status="processing", estimated_seconds=120)
+
+
 @router.patch("/{prediction_id}")
 async def update_prediction(
     prediction_id: str,
@@ -1,10 +1,11 @@
 """User API routes."""
 
-from fastapi import APIRouter, Depends, HTTPException
+
+from fastapi import APIRouter, Depends
 from pydantic import BaseModel
-from typing import Optional
 
 from app.core.auth import get_current_user
+from app.core.cache import invalidate_tag
 
 router = APIRouter(prefix="/api/v1/users", tags=["users"])
 
@@ -13,8 +14,8 @@ _user_profiles: dict[str, dict] = {}
 
 
 class UserUpdate(BaseModel):
-    display_name: Optional[str] = None
-    avatar_url: Optional[str] = None
+    display_name: str | None = None
+    avatar_url: str | None = None
 
 
 @router.get("/me")
@@ -49,6 +50,7 @@ async def update_me(body: UserUpdate, user: dict = Depends(get_current_user)):
     if body.avatar_url is not None:
         profile["avatar_url"] = body.avatar_url
     _user_profiles[uid] = profile
+    await invalidate_tag("leaderboard")
     return profile
 
 
@@ -1,24 +1,49 @@
+from typing import Annotated, Literal
+
 from pydantic import BaseModel, Field
-from typing import Optional
 
 
 class PredictionCreate(BaseModel):
     query: str = Field(..., min_length=3, max_length=1000)
-    options: Optional[dict] = None
+    options: dict | None = None
+    # Skip reuse of a recent or in-flight run of the same question
+    force_fresh: bool = False
 
 
 class PredictionResponse(BaseModel):
     id: str
     status: str
     estimated_seconds: int = 120
+    reused_from: str | None = None
+
+
+class PredictionBatchCreate(BaseModel):
+    queries: list[Annotated[str, Field(min_length=3, max_length=1000)]] = Field(..., min_length=1)
+    force_fresh: bool = False
+
+
+class PredictionBatchItem(BaseModel):
+    query: str
+    prediction_id: str
+    status: str
+    reused_from: str | None = None
+
+
+class PredictionBatchResponse(BaseModel):
+    id: str
+    status: str
+    counts: dict[str, int]
+    items: list[PredictionBatchItem]
 
 
 class PredictionUpdate(BaseModel):
-    is_public: Optional[bool] = None
+    is_public: bool | None = None
 
 
 class VariableRerun(BaseModel):
     variables: dict[str, float]
+    # "numeric" re-aggregates the existing engine outputs without LLM calls
+    mode: Literal["incremental", "numeric"] = "incremental"
 
 
 class OutcomeProbability(BaseModel):
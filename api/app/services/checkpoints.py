@@ -0,0 +1,107 @@
+"""
+Stage checkpoints for prediction pipelines.
+
+Each finished stage's output is stored under (prediction id, stage name) so a
+retried or resumed run skips the stages that already completed, and a variable
+rerun can reuse the population and simulation instead of recomputing them.
+
+Checkpoints live in a Redis hash per prediction (one field per stage, encoded
+with CacheCodec) and expire after settings.pipeline_checkpoint_ttl. While Redis
+is unavailable they are kept in-process, encoded the same way, for the most
+recent predictions that fit in settings.pipeline_checkpoint_local_bytes.
+"""
+
+from collections import OrderedDict
+from typing import Any
+
+import structlog
+
+from app.core import cache
+from app.core.cache_codec import CacheCodec
+from app.core.config import settings
+
+logger = structlog.get_logger()
+
+_codec = CacheCodec(settings.cache_compress_threshold, settings.cache_compress_level)
+# prediction id -> {stage: encoded output}, least recently written first
+_local: OrderedDict[str, dict[str, bytes]] = OrderedDict()
+_local_bytes = 0
+
+
+def _key(prediction_id: str) -> str:
+    return f"checkpoint:{prediction_id}"
+
+
+def _save_local(prediction_id: str, stage: str, data: bytes):
+    global _local_bytes
+    stages = _local.setdefault(prediction_id, {})
+    _local_bytes += len(data) - len(stages.get(stage, b""))
+    stages[stage] = data
+    _local.move_to_end(prediction_id)
+    while _local_bytes > settings.pipeline_checkpoint_local_bytes:
+        evicted = next(iter(_local))
+        _drop_local(evicted)
+        logger.info("checkpoint_local_evicted", prediction_id=evicted)
+
+
+def _drop_local(prediction_id: str):
+    global _local_bytes
+    _local_bytes -= sum(len(d) for d in _local.pop(prediction_id, {}).values())
+
+
+async def save_checkpoint(prediction_id: str, stage: str, value: Any):
+    """Persist one stage's output. Failures are logged, never raised."""
+    try:
+        data = _codec.encode(value)
+    except Exception as e:
+        logger.warning("checkpoint_encode_failed", prediction_id=prediction_id, stage=stage, error=str(e))
+        return
+    r = await cache.get_redis()
+    if r is not None:
+        try:
+            async with r.pipeline(transaction=True) as pipe:
+                pipe.hset(_key(prediction_id), stage, data)
+                pipe.expire(_key(prediction_id), settings.pipeline_checkpoint_ttl)
+                await pipe.execute()
+            return
+        except Exception as e:
+            cache._on_redis_error(e)
+            logger.warning("checkpoint_save_failed", prediction_id=prediction_id, stage=stage, error=str(e))
+    _save_local(prediction_id, stage, data)
+
+
+async def load_checkpoints(prediction_id: str) -> dict[str, Any]:
+    """All checkpointed stage outputs for a prediction, by stage name."""
+    raw = dict(_local.get(prediction_id, {}))
+    r = await cache.get_redis()
+    if r is not None:
+        try:
+            raw.update(await r.hgetall(_key(prediction_id)))
+        except Exception as e:
+            cache._on_redis_error(e)
+            logger.warning("checkpoint_load_failed", prediction_id=prediction_id, error=str(e))
+    found = {}
+    for stage, data in raw.items():
+        stage = stage.decode() if isinstance(stage, bytes) else stage
+        try:
+            found[stage] = _codec.decode(data)
+        except Exception as e:
+            logger.warning("checkpoint_decode_failed", prediction_id=prediction_id, stage=stage, error=str(e))
+    return found
+
+
+async def clear_checkpoints(prediction_id: str):
+    _drop_local(prediction_id)
+    r = await cache.get_redis()
+    if r is not None:
+        try:
+            await r.delete(_key(prediction_id))
+        except Exception as e:
+            cache._on_redis_error(e)
+
+
+def reset_checkpoint_state():
+    """Drop in-process checkpoints (tests)."""
+    global _local_bytes
+    _local.clear()
+    _local_bytes = 0
@@ -2,12 +2,16 @@
 News sentiment — uses NewsData.io when API key available, otherwise LLM fallback.
 """
 
-import httpx
 import os
 
+import httpx
+
+from app.core.cache import cached
+
 NEWSDATA_API_KEY = os.environ.get("NEWSDATA_API_KEY", "")
 
 
+@cached("news", ttl=1800, cache_if=lambda r: r.get("source") != "fallback")
 async def get_news_sentiment(query: str, country: str = "my", count: int = 10) -> dict:
     """Fetch news articles and analyze sentiment."""
     articles = await _fetch_news(query, country, count)
@@ -5,6 +5,8 @@ Free, no API key required.
 
 import httpx
 
+from app.core.cache import cached
+
 BASE_URL = "https://api.worldbank.org/v2"
 
 
@@ -28,6 +30,8 @@ async def get_inflation(country_code: str = "MYS", years: int = 5) -> list:
     return await _fetch_indicator(country_code, "FP.CPI.TOTL.ZG", years)
 
 
+# Indicators are published annually; failed fetches return [] and are not cached
+@cached("worldbank", ttl=24 * 3600, cache_if=bool)
 async def _fetch_indicator(country_code: str, indicator: str, years: int) -> list:
     """Generic World Bank indicator fetch."""
     url = f"{BASE_URL}/country/{country_code}/indicator/{indicator}"
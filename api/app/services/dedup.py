@@ -0,0 +1,68 @@
+"""
+Prediction deduplication: identical questions share one pipeline run.
+
+Two fingerprints point at the prediction that last answered a question:
+
+    query fingerprint  the normalized query text, checked by create_prediction
+                       before anything is queued
+    task fingerprint   the structured task from stage_intent_parse, checked by
+                       the job once intent is known, so differently worded
+                       queries for the same question also match
+
+A fingerprint is registered when a run starts (so later requests join the
+in-flight run), kept for settings.dedup_freshness_seconds after it completes,
+and dropped if the run fails. Entries are stored through the shared cache.
+"""
+
+import hashlib
+import json
+import re
+
+from app.core.cache import cache_delete, cache_get, cache_set
+from app.core.config import settings
+from app.services.jobs import CANCELLED, FAILED, get_job_queue
+
+_NON_WORD = re.compile(r"[^\w]+")
+
+
+def query_fingerprint(query: str) -> str:
+    normalized = " ".join(_NON_WORD.sub(" ", query.lower()).split())
+    return "q:" + hashlib.md5(normalized.encode()).hexdigest()
+
+
+def task_fingerprint(task: dict) -> str:
+    """Fingerprint of what is being predicted; key_variables vary run to run and are ignored."""
+    canonical = {
+        "type": str(task.get("type", "")).lower(),
+        "region": str(task.get("region", "")).upper(),
+        "timeframe": str(task.get("timeframe", "")).upper(),
+        "outcomes": sorted(str(o).strip().lower() for o in task.get("outcomes", [])),
+    }
+    return "t:" + hashlib.md5(json.dumps(canonical, sort_keys=True).encode()).hexdigest()
+
+
+async def find_reusable(fingerprint: str, exclude: str | None = None) -> str | None:
+    """Id of a completed or in-flight prediction for `fingerprint`, if still usable."""
+    if not settings.dedup_enabled:
+        return None
+    prediction_id = await cache_get(f"dedup:{fingerprint}")
+    if not prediction_id or prediction_id == exclude:
+        return None
+    job = await get_job_queue().get(prediction_id)
+    if job is None or job.status in (FAILED, CANCELLED):
+        return None
+    if job.result and job.result.get("reused_from"):
+        # Follow links so every reuse points at the run that did the work
+        return job.result["reused_from"]
+    return prediction_id
+
+
+async def remember(fingerprint: str, prediction_id: str):
+    if settings.dedup_enabled:
+        await cache_set(f"dedup:{fingerprint}", prediction_id, ttl=settings.dedup_freshness_seconds)
+
+
+async def forget(fingerprint: str, prediction_id: str):
+    """Drop the entry if it still points at `prediction_id` (its run failed)."""
+    if await cache_get(f"dedup:{fingerprint}") == prediction_id:
+        await cache_delete(f"dedup:{fingerprint}")
@@ -5,8 +5,8 @@ Roles: Optimist, Pessimist, Contrarian, Historian, Judge
 
 import asyncio
 import json
+
 import structlog
-from typing import Any
 
 from app.core.llm import call_llm_json
 
@@ -75,7 +75,11 @@ class DebateEngine:
     """Multi-role structured debate engine."""
 
     async def run(self, context: dict, outcomes: list[str]) -> dict:
-        """Run 3-round debate and return results."""
+        """Run 3-round debate and return results.
+
+        Cancelling the calling task cancels every debater's in-flight LLM call;
+        the per-role fallbacks only cover call failures, not cancellation.
+        """
         query = context.get("query", "")
         data_summary = context.get("data_summary", "")
         debate_log: list[dict] = []
@@ -5,6 +5,7 @@ Weights: GoT 40% + Simulation 25% + MCTS 20% + Debate 15%
 """
 
 import math
+
 import structlog
 
 logger = structlog.get_logger()
@@ -31,11 +32,7 @@ class EnsembleAggregator:
         outcomes: ["outcome1", "outcome2", ...]
         """
         # Collect per-engine probabilities
-        engine_probs: dict[str, dict[str, float]] = {}
-        for engine_name, result in engine_results.items():
-            probs = self._extract_probs(engine_name, result, outcomes)
-            if probs:
-                engine_probs[engine_name] = probs
+        engine_probs = self.engine_probabilities(engine_results, outcomes)
 
         if not engine_probs:
             # No valid engine results
@@ -118,6 +115,15 @@ class EnsembleAggregator:
             "consensus": round(consensus, 4),
         }
 
+    def engine_probabilities(self, engine_results: dict, outcomes: list[str]) -> dict[str, dict[str, float]]:
+        """Per-engine outcome probabilities, for engines that produced any."""
+        engine_probs: dict[str, dict[str, float]] = {}
+        for engine_name, result in engine_results.items():
+            probs = self._extract_probs(engine_name, result, outcomes)
+            if probs:
+                engine_probs[engine_name] = probs
+        return engine_probs
+
     def _extract_probs(
         self, engine_name: str, result: dict, outcomes: list[str]
     ) -> dict[str, float]:
@@ -5,9 +5,10 @@ Explores reasoning paths via UCB1 selection + LLM evaluation.
 
 import math
 import random
-import structlog
 from typing import Optional
 
+import structlog
+
 from app.core.llm import call_llm_json
 
 logger = structlog.get_logger()
@@ -24,7 +25,7 @@ class MCTSNode:
     ):
         self.state = state
         self.parent = parent
-        self.children: list["MCTSNode"] = []
+        self.children: list[MCTSNode] = []
         self.visits: int = 0
         self.value: float = 0.0
         self.action = action
@@ -63,7 +64,11 @@ class MCTSEngine:
         self.max_depth = max_depth
 
     async def search(self, context: dict) -> dict:
-        """Run MCTS search over reasoning paths."""
+        """Run MCTS search over reasoning paths.
+
+        Cancelling the calling task stops the search at its current LLM call;
+        no partial result is returned.
+        """
         query = context.get("query", "")
         outcomes = context.get("outcomes", [])
         data_summary = context.get("data_summary", "")
@@ -0,0 +1,47 @@
+"""Durable job queue and worker pool for long-running prediction work."""
+
+from app.services.jobs.queue import (
+    CANCELLED,
+    COMPLETED,
+    FAILED,
+    FINISHED,
+    QUEUED,
+    RUNNING,
+    InMemoryJobQueue,
+    Job,
+    JobPriority,
+    JobQueue,
+    JobQueueUnavailableError,
+    RedisJobQueue,
+    get_job_queue,
+    set_job_queue,
+)
+from app.services.jobs.worker import (
+    JobWorker,
+    ensure_embedded_worker,
+    get_embedded_worker,
+    reset_job_state,
+    stop_embedded_worker,
+)
+
+__all__ = [
+    "CANCELLED",
+    "COMPLETED",
+    "FAILED",
+    "FINISHED",
+    "QUEUED",
+    "RUNNING",
+    "InMemoryJobQueue",
+    "Job",
+    "JobPriority",
+    "JobQueue",
+    "JobQueueUnavailableError",
+    "RedisJobQueue",
+    "get_job_queue",
+    "set_job_queue",
+    "JobWorker",
+    "ensure_embedded_worker",
+    "get_embedded_worker",
+    "reset_job_state",
+    "stop_embedded_worker",
+]
@@ -0,0 +1,3 @@
+from app.services.jobs.worker import main
+
+main()
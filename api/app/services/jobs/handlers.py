@@ -0,0 +1,104 @@
+"""Job handlers by kind. Each takes (job, queue) and returns the job's result."""
+
+import time
+from contextlib import nullcontext
+
+from app.core.cache import cache_get_or_set, make_cache_key
+from app.core.llm import Priority, llm_cost_scope, llm_priority
+from app.core.llm_costs import CostScope
+from app.services.jobs.queue import Job, JobQueue
+from app.services.pipeline_dag import stage_timing
+
+BATCH_DATA_TTL = 3600
+
+
+async def run_prediction_job(job: Job, queue: JobQueue) -> dict:
+    """Run the prediction pipeline, reporting stages and partial output on the job.
+
+    Unless the job asks for force_fresh, the parsed task is looked up first and a
+    recent or in-flight run of the same question is reused; the result is then
+    just {"reused_from": <prediction id>}.
+
+    Batch items (payload["batch_id"]) share data collection per region with the
+    rest of their batch and make their LLM calls at Priority.BATCH.
+    """
+    batch_id = job.payload.get("batch_id")
+    with llm_priority(Priority.BATCH) if batch_id else nullcontext():
+        return await _run_prediction(job, queue, batch_id)
+
+
+async def _run_prediction(job: Job, queue: JobQueue, batch_id: str | None) -> dict:
+    from app.services import dedup
+    from app.services.checkpoints import load_checkpoints, save_checkpoint
+    from app.services.prediction_pipeline import (
+        _fallback_intent,
+        run_prediction_pipeline,
+        stage_data_sources,
+        stage_intent_parse,
+    )
+
+    async def update_status(prediction_id: str, stage: str):
+        await queue.progress(job.id, stage=stage)
+
+    async def update_partial(prediction_id: str, event: dict):
+        await queue.progress(job.id, partial={event["engine"]: {event["field"]: event["value"]}})
+
+    query = job.payload["query"]
+    force_fresh = job.payload.get("force_fresh")
+    fingerprints = [dedup.query_fingerprint(query)]
+    # Stages run here belong to this attempt: timed and charged like the pipeline's own
+    precomputed: dict[str, dict] = {}
+    cost = CostScope()
+    if not force_fresh or batch_id:
+        done = await load_checkpoints(job.id)
+        task = done.get("intent")
+        if task is None:
+            await update_status(job.id, "stage_1_done")
+            started = time.time()
+            with llm_cost_scope(cost):
+                task = await stage_intent_parse(query)
+            precomputed["intent"] = stage_timing(started, time.time())
+            await save_checkpoint(job.id, "intent", task)
+        # The rule-based fallback says nothing about the query; never match on it
+        if not force_fresh and task != _fallback_intent():
+            fingerprint = dedup.task_fingerprint(task)
+            source = await dedup.find_reusable(fingerprint, exclude=job.id)
+            if source:
+                await dedup.remember(fingerprints[0], source)
+                return {"reused_from": source}
+            fingerprints.append(fingerprint)
+        if batch_id and "data" not in done:
+            # Items of one batch for the same region collect data once
+            key = make_cache_key("batchdata", batch_id, task.get("region", "MY"), task.get("query", ""))
+            started = time.time()
+            with llm_cost_scope(cost):
+                data = await cache_get_or_set(key, lambda: stage_data_sources(task), ttl=BATCH_DATA_TTL)
+            precomputed["data"] = stage_timing(started, time.time())
+            await save_checkpoint(job.id, "data", data)
+    for fingerprint in fingerprints:
+        await dedup.remember(fingerprint, job.id)
+
+    start = time.time()
+    try:
+        result = await run_prediction_pipeline(
+            prediction_id=job.id,
+            query=query,
+            update_status=update_status,
+            update_partial=update_partial,
+            precomputed=precomputed,
+            cost=cost,
+        )
+    except BaseException:
+        for fingerprint in fingerprints:
+            await dedup.forget(fingerprint, job.id)
+        raise
+    result["metadata"]["total_time_seconds"] = round(time.time() - start, 1)
+    # Freshness runs from completion
+    for fingerprint in fingerprints:
+        await dedup.remember(fingerprint, job.id)
+    return result
+
+
+HANDLERS = {
+    "prediction": run_prediction_job,
+}
@@ -0,0 +1,541 @@
+"""
+Job queue for long-running work (prediction pipelines).
+
+Two backends share one interface:
+
+    InMemoryJobQueue  in-process heap; jobs run inside the API process and are
+                      lost on restart (development, tests)
+    RedisJobQueue     one Redis Stream per priority with a consumer group, so
+                      jobs survive restarts and are shared by every worker
+
+A job's state (status, current stage, partial output, result) lives in the
+queue rather than in the web process, so the API can report progress for a job
+running in a separate worker process.
+"""
+
+import asyncio
+import heapq
+import itertools
+import json
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+import structlog
+
+from app.core import cache
+from app.core.config import settings
+
+logger = structlog.get_logger()
+
+
+class JobPriority:
+    """Queue priority (lower value = claimed first)."""
+
+    HIGH = 0  # a user is actively waiting
+    NORMAL = 1  # single prediction runs
+    LOW = 2  # bulk / batch submissions
+
+    ALL = (HIGH, NORMAL, LOW)
+
+
+QUEUED, RUNNING, COMPLETED, FAILED, CANCELLED = "queued", "running", "completed", "failed", "cancelled"
+FINISHED = (COMPLETED, FAILED, CANCELLED)
+
+
+class JobQueueUnavailableError(Exception):
+    """The queue backend cannot accept or hand out jobs right now."""
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    payload: dict
+    priority: int = JobPriority.NORMAL
+    status: str = QUEUED
+    enqueued_at: float = 0.0
+    started_at: float | None = None
+    finished_at: float | None = None
+    attempts: int = 0
+    cancel_requested: bool = False
+    stage: str | None = None
+    partial: dict = field(default_factory=dict)
+    result: Any = None
+    error: str | None = None
+
+    @property
+    def wait_seconds(self) -> float | None:
+        """Time spent queued before a worker picked the job up."""
+        if self.started_at is None:
+            return None
+        return self.started_at - self.enqueued_at
+
+
+def _merge_partial(partial: dict, update: dict):
+    # Partial output is {engine: {field: value}}; merge one level deep
+    for key, value in update.items():
+        if isinstance(value, dict) and isinstance(partial.get(key), dict):
+            partial[key].update(value)
+        else:
+            partial[key] = value
+
+
+class JobQueue:
+    """Interface shared by the queue backends."""
+
+    async def enqueue(self, kind: str, payload: dict, priority: int = JobPriority.NORMAL,
+                      job_id: str | None = None) -> Job:
+        raise NotImplementedError
+
+    async def claim(self, consumer: str) -> Job | None:
+        """Hand the highest-priority queued job to `consumer` (None if idle)."""
+        raise NotImplementedError
+
+    async def wait_for_jobs(self, timeout: float):
+        """Return once new work may be available, or after `timeout` seconds."""
+        await asyncio.sleep(timeout)
+
+    async def heartbeat(self, job: Job):
+        """Tell the queue `job` is still being worked on."""
+
+    async def progress(self, job_id: str, stage: str | None = None, partial: dict | None = None):
+        raise NotImplementedError
+
+    async def finish(self, job: Job, status: str, result: Any = None, error: str | None = None):
+        raise NotImplementedError
+
+    async def cancel(self, job_id: str) -> bool:
+        """Cancel a queued job, or ask the worker to stop a running one.
+
+        Returns False if the job is unknown or already finished.
+        """
+        raise NotImplementedError
+
+    async def get(self, job_id: str) -> Job | None:
+        raise NotImplementedError
+
+    async def stats(self) -> dict:
+        raise NotImplementedError
+
+    async def publish(self, job_id: str, event: dict):
+        """Push a progress event to current subscribers of `job_id` (best effort).
+
+        Events: {"type": "started"}, {"type": "stage", "stage": ...},
+        {"type": "partial", "partial": {engine: {field: value}}} and
+        {"type": "finished", "status": ..., "error": ...}.
+        """
+        raise NotImplementedError
+
+    def subscribe(self, job_id: str):
+        """Async context manager whose `next(timeout)` returns the next event or None."""
+        raise NotImplementedError
+
+
+class _LocalSubscription:
+    def __init__(self, subscribers: set, maxsize: int = 256):
+        self._subscribers = subscribers
+        self._events: asyncio.Queue = asyncio.Queue(maxsize)
+
+    async def __aenter__(self):
+        self._subscribers.add(self._events)
+        return self
+
+    async def __aexit__(self, *exc):
+        self._subscribers.discard(self._events)
+
+    async def next(self, timeout: float) -> dict | None:
+        try:
+            return await asyncio.wait_for(self._events.get(), timeout)
+        except TimeoutError:
+            return None
+
+
+def _deliver(events: asyncio.Queue, event: dict):
+    if events.full():
+        # A slow reader loses the oldest events, never blocks the job
+        events.get_nowait()
+    events.put_nowait(event)
+
+
+# ─── In-process backend ──────────────────────────────────────
+
+
+class InMemoryJobQueue(JobQueue):
+    """Single-process queue; finished jobs are kept (bounded) for status lookups."""
+
+    def __init__(self, max_finished: int = 1000):
+        self.max_finished = max_finished
+        self._jobs: dict[str, Job] = {}
+        self._finished: OrderedDict[str, None] = OrderedDict()
+        self._heap: list[tuple[int, int, str]] = []
+        self._seq = itertools.count()
+        self._waiters: set[asyncio.Future] = set()
+        self._subscribers: dict[str, set[asyncio.Queue]] = {}
+
+    async def enqueue(self, kind, payload, priority=JobPriority.NORMAL, job_id=None) -> Job:
+        job = Job(job_id or str(uuid.uuid4()), kind, payload, priority, enqueued_at=time.time())
+        self._jobs[job.id] = job
+        heapq.heappush(self._heap, (priority, next(self._seq), job.id))
+        for waiter in self._waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+        return job
+
+    async def wait_for_jobs(self, timeout: float):
+        if self._heap:
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.add(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except TimeoutError:
+            pass
+        finally:
+            self._waiters.discard(waiter)
+
+    async def claim(self, consumer: str) -> Job | None:
+        while self._heap:
+            _, _, job_id = heapq.heappop(self._heap)
+            job = self._jobs.get(job_id)
+            # Cancelled jobs stay in the heap until popped
+            if job is None or job.status != QUEUED:
+                continue
+            job.status = RUNNING
+            job.started_at = time.time()
+            job.attempts += 1
+            await self.publish(job.id, {"type": "started"})
+            return job
+        return None
+
+    async def progress(self, job_id, stage=None, partial=None):
+        job = self._jobs.get(job_id)
+        if job is None:
+            return
+        if stage is not None:
+            job.stage = stage
+            await self.publish(job_id, {"type": "stage", "stage": stage})
+        if partial:
+            _merge_partial(job.partial, partial)
+            await self.publish(job_id, {"type": "partial", "partial": partial})
+
+    async def finish(self, job, status, result=None, error=None):
+        stored = self._jobs.get(job.id, job)
+        stored.status = status
+        stored.result = result
+        stored.error = error
+        stored.finished_at = time.time()
+        self._remember_finished(stored.id)
+        await self.publish(job.id, {"type": "finished", "status": status, "error": error})
+
+    async def cancel(self, job_id) -> bool:
+        job = self._jobs.get(job_id)
+        if job is None or job.status in FINISHED:
+            return False
+        job.cancel_requested = True
+        if job.status == QUEUED:
+            job.status = CANCELLED
+            job.finished_at = time.time()
+            self._remember_finished(job_id)
+            await self.publish(job_id, {"type": "finished", "status": CANCELLED, "error": None})
+        return True
+
+    async def get(self, job_id) -> Job | None:
+        return self._jobs.get(job_id)
+
+    async def publish(self, job_id, event):
+        for events in self._subscribers.get(job_id, ()):
+            _deliver(events, event)
+
+    def subscribe(self, job_id):
+        return _LocalSubscription(self._subscribers.setdefault(job_id, set()))
+
+    async def stats(self) -> dict:
+        now = time.time()
+        queued = [j for j in self._jobs.values() if j.status == QUEUED]
+        return {
+            "backend": "memory",
+            "depth": len(queued),
+            "depth_by_priority": {p: sum(1 for j in queued if j.priority == p) for p in JobPriority.ALL},
+            "running": sum(1 for j in self._jobs.values() if j.status == RUNNING),
+            "oldest_wait_seconds": round(max((now - j.enqueued_at for j in queued), default=0.0), 3),
+        }
+
+    def _remember_finished(self, job_id: str):
+        self._finished[job_id] = None
+        self._finished.move_to_end(job_id)
+        while len(self._finished) > self.max_finished:
+            old, _ = self._finished.popitem(last=False)
+            self._jobs.pop(old, None)
+            if not self._subscribers.get(old):
+                self._subscribers.pop(old, None)
+
+
+# ─── Redis Streams backend ───────────────────────────────────
+
+_GROUP = "workers"
+
+# Job hash fields are stored JSON-encoded so one field can be updated without
+# rewriting (and racing on) the rest of the record.
+_FIELDS = tuple(f for f in Job.__dataclass_fields__)
+
+
+def _encode_fields(values: dict) -> dict:
+    return {k: json.dumps(v, default=str) for k, v in values.items()}
+
+
+def _decode_job(raw: dict) -> Job | None:
+    if not raw:
+        return None
+    values = {}
+    for k, v in raw.items():
+        k = k.decode() if isinstance(k, bytes) else k
+        if k in _FIELDS:
+            values[k] = json.loads(v)
+    return Job(**values)
+
+
+class RedisJobQueue(JobQueue):
+    """Durable queue on Redis Streams.
+
+    Each priority has its own stream read through the consumer group
+    "workers". An entry stays pending until its job finishes; running workers
+    refresh their entries on every heartbeat, and entries left idle longer than
+    `visibility_timeout` (their worker died) are claimed by another worker.
+    """
+
+    def __init__(self, prefix: str = "jobs", visibility_timeout: float = 120.0, result_ttl: int = 86400,
+                 max_attempts: int = 3):
+        self.prefix = prefix
+        self.visibility_timeout = visibility_timeout
+        self.result_ttl = result_ttl
+        self.max_attempts = max_attempts
+        self._groups_ready = False
+        self._entries: dict[str, tuple[str, Any, str]] = {}  # job id -> (stream, entry id, consumer)
+
+    def _stream(self, priority: int) -> str:
+        return f"{self.prefix}:stream:{priority}"
+
+    def _job_key(self, job_id: str) -> str:
+        return f"{self.prefix}:job:{job_id}"
+
+    async def _redis(self):
+        r = await cache.get_redis()
+        if r is None:
+            raise JobQueueUnavailableError("Redis is unavailable")
+        if not self._groups_ready:
+            for p in JobPriority.ALL:
+                try:
+                    await r.xgroup_create(self._stream(p), _GROUP, id="0", mkstream=True)
+                except Exception as e:
+                    if "BUSYGROUP" not in str(e):
+                        raise
+            self._groups_ready = True
+        return r
+
+    async def enqueue(self, kind, payload, priority=JobPriority.NORMAL, job_id=None) -> Job:
+        r = await self._redis()
+        job = Job(job_id or str(uuid.uuid4()), kind, payload, priority, enqueued_at=time.time())
+        async with r.pipeline(transaction=True) as pipe:
+            pipe.hset(self._job_key(job.id), mapping=_encode_fields(asdict(job)))
+            pipe.expire(self._job_key(job.id), self.result_ttl)
+            pipe.xadd(self._stream(priority), {"job_id": job.id})
+            await pipe.execute()
+        return job
+
+    async def claim(self, consumer: str) -> Job | None:
+        r = await self._redis()
+        for p in JobPriority.ALL:
+            stream = self._stream(p)
+            # Jobs abandoned by a dead worker come first, then new ones
+            _, entries, *_ = await r.xautoclaim(
+                stream, _GROUP, consumer, min_idle_time=int(self.visibility_timeout * 1000), count=1,
+            )
+            if not entries:
+                reply = await r.xreadgroup(_GROUP, consumer, {stream: ">"}, count=1)
+                entries = reply[0][1] if reply else []
+            for entry_id, fields in entries:
+                job = await self._start(r, stream, entry_id, fields, consumer)
+                if job is not None:
+                    return job
+        return None
+
+    async def _start(self, r, stream: str, entry_id, fields: dict, consumer: str) -> Job | None:
+        job_id = (fields.get(b"job_id") or fields.get("job_id") or b"").decode() if fields else ""
+        job = _decode_job(await r.hgetall(self._job_key(job_id))) if job_id else None
+        if job is None or job.status in FINISHED:
+            await self._ack(r, stream, entry_id)
+            return None
+        if job.cancel_requested or job.attempts >= self.max_attempts:
+            job.status = CANCELLED if job.cancel_requested else FAILED
+            job.error = None if job.cancel_requested else f"Gave up after {job.attempts} attempts"
+            job.finished_at = time.time()
+            await r.hset(self._job_key(job.id), mapping=_encode_fields(
+                {"status": job.status, "error": job.error, "finished_at": job.finished_at},
+            ))
+            await self._ack(r, stream, entry_id)
+            return None
+        job.status = RUNNING
+        job.started_at = time.time()
+        job.attempts += 1
+        await r.hset(self._job_key(job.id), mapping=_encode_fields(
+            {"status": RUNNING, "started_at": job.started_at, "attempts": job.attempts},
+        ))
+        self._entries[job.id] = (stream, entry_id, consumer)
+        await self.publish(job.id, {"type": "started"})
+        return job
+
+    async def _ack(self, r, stream: str, entry_id):
+        async with r.pipeline(transaction=True) as pipe:
+            pipe.xack(stream, _GROUP, entry_id)
+            pipe.xdel(stream, entry_id)
+            await pipe.execute()
+
+    async def heartbeat(self, job: Job):
+        entry = self._entries.get(job.id)
+        if entry is None:
+            return
+        r = await self._redis()
+        # Re-claiming our own entry resets its idle time
+        stream, entry_id, consumer = entry
+        await r.xclaim(stream, _GROUP, consumer, min_idle_time=0, message_ids=[entry_id], justid=True)
+
+    async def progress(self, job_id, stage=None, partial=None):
+        r = await self._redis()
+        updates = {}
+        if stage is not None:
+            updates["stage"] = stage
+        if partial:
+            # Only the worker running the job writes partial output
+            raw = await r.hget(self._job_key(job_id), "partial")
+            current = json.loads(raw) if raw else {}
+            _merge_partial(current, partial)
+            updates["partial"] = current
+        if updates:
+            await r.hset(self._job_key(job_id), mapping=_encode_fields(updates))
+        if stage is not None:
+            await self.publish(job_id, {"type": "stage", "stage": stage})
+        if partial:
+            await self.publish(job_id, {"type": "partial", "partial": partial})
+
+    async def finish(self, job, status, result=None, error=None):
+        r = await self._redis()
+        await r.hset(self._job_key(job.id), mapping=_encode_fields(
+            {"status": status, "result": result, "error": error, "finished_at": time.time()},
+        ))
+        entry = self._entries.pop(job.id, None)
+        if entry is not None:
+            await self._ack(r, entry[0], entry[1])
+        await self.publish(job.id, {"type": "finished", "status": status, "error": error})
+
+    async def cancel(self, job_id) -> bool:
+        r = await self._redis()
+        job = _decode_job(await r.hgetall(self._job_key(job_id)))
+        if job is None or job.status in FINISHED:
+            return False
+        updates = {"cancel_requested": True}
+        if job.status == QUEUED:
+            # The stream entry is dropped when a worker reaches it
+            updates.update(status=CANCELLED, finished_at=time.time())
+        await r.hset(self._job_key(job_id), mapping=_encode_fields(updates))
+        if job.status == QUEUED:
+            await self.publish(job_id, {"type": "finished", "status": CANCELLED, "error": None})
+        return True
+
+    async def get(self, job_id) -> Job | None:
+        r = await self._redis()
+        return _decode_job(await r.hgetall(self._job_key(job_id)))
+
+    def _channel(self, job_id: str) -> str:
+        return f"{self.prefix}:events:{job_id}"
+
+    async def publish(self, job_id, event):
+        try:
+            r = await self._redis()
+            await r.publish(self._channel(job_id), json.dumps(event, default=str))
+        except Exception as e:
+            logger.warning("job_event_publish_failed", job_id=job_id, error=str(e))
+
+    def subscribe(self, job_id):
+        return _RedisSubscription(self, self._channel(job_id))
+
+    async def stats(self) -> dict:
+        r = await self._redis()
+        now = time.time()
+        depth_by_priority, running, oldest = {}, 0, 0.0
+        for p in JobPriority.ALL:
+            stream = self._stream(p)
+            groups = await r.xinfo_groups(stream)
+            group = next((g for g in groups if g["name"] in (_GROUP, _GROUP.encode())), None)
+            pending = group["pending"] if group else 0
+            depth_by_priority[p] = max(0, await r.xlen(stream) - pending)
+            running += pending
+            if group and depth_by_priority[p]:
+                last = group["last-delivered-id"]
+                last = last.decode() if isinstance(last, bytes) else last
+                nxt = await r.xrange(stream, min=f"({last}", count=1)
+                if nxt:
+                    entry_id = nxt[0][0]
+                    entry_id = entry_id.decode() if isinstance(entry_id, bytes) else entry_id
+                    oldest = max(oldest, now - int(entry_id.split("-")[0]) / 1000)
+        return {
+            "backend": "redis",
+            "depth": sum(depth_by_priority.values()),
+            "depth_by_priority": depth_by_priority,
+            "running": running,
+            "oldest_wait_seconds": round(oldest, 3),
+        }
+
+
+class _RedisSubscription:
+    def __init__(self, queue: RedisJobQueue, channel: str):
+        self._queue = queue
+        self._channel = channel
+        self._pubsub = None
+
+    async def __aenter__(self):
+        r = await self._queue._redis()
+        self._pubsub = r.pubsub()
+        await self._pubsub.subscribe(self._channel)
+        return self
+
+    async def __aexit__(self, *exc):
+        try:
+            await self._pubsub.unsubscribe(self._channel)
+        finally:
+            await self._pubsub.aclose()
+
+    async def next(self, timeout: float) -> dict | None:
+        deadline = time.monotonic() + timeout
+        while (remaining := deadline - time.monotonic()) > 0:
+            # Short reads stay under the client's socket timeout
+            message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=min(remaining, 0.5))
+            if message is not None and message.get("type") == "message":
+                return json.loads(message["data"])
+        return None
+
+
+# ─── Configured queue ────────────────────────────────────────
+
+_queue: JobQueue | None = None
+
+
+def get_job_queue() -> JobQueue:
+    """The process-wide queue selected by settings.jobs_backend."""
+    global _queue
+    if _queue is None:
+        if settings.jobs_backend == "redis":
+            _queue = RedisJobQueue(
+                visibility_timeout=settings.jobs_visibility_timeout, result_ttl=settings.jobs_result_ttl,
+            )
+        else:
+            _queue = InMemoryJobQueue()
+    return _queue
+
+
+def set_job_queue(queue: JobQueue | None):
+    """Install a queue (tests); None goes back to the configured backend."""
+    global _queue
+    _queue = queue
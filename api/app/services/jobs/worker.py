@@ -0,0 +1,227 @@
+"""
+Job worker: pulls jobs off the queue and runs them with a concurrency cap.
+
+Run standalone next to the API (Procfile `worker`):
+
+    python -m app.services.jobs
+
+With the in-memory backend (or JOBS_EMBEDDED_WORKER=true) the API process runs
+one itself, see ensure_embedded_worker().
+"""
+
+import asyncio
+import os
+import signal
+import socket
+from collections import deque
+
+import structlog
+
+from app.core.config import settings
+from app.services.jobs.handlers import HANDLERS
+from app.services.jobs.queue import (
+    CANCELLED,
+    COMPLETED,
+    FAILED,
+    Job,
+    JobQueue,
+    get_job_queue,
+    set_job_queue,
+)
+
+logger = structlog.get_logger()
+
+
+class JobWorker:
+    """Runs up to `concurrency` jobs at once.
+
+    While a job runs the worker heartbeats it and checks for a cancellation
+    request every `heartbeat_interval` seconds.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        handlers: dict | None = None,
+        concurrency: int = 4,
+        name: str | None = None,
+        poll_interval: float = 1.0,
+        heartbeat_interval: float = 1.0,
+    ):
+        self.queue = queue
+        self.handlers = HANDLERS if handlers is None else handlers
+        self.concurrency = concurrency
+        self.name = name or f"{socket.gethostname()}-{os.getpid()}"
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self._running: dict[str, asyncio.Task] = {}
+        self._stopping = False
+        self._waits: deque[float] = deque(maxlen=500)
+        self.stats_counts = {"claimed": 0, COMPLETED: 0, FAILED: 0, CANCELLED: 0}
+
+    async def run(self):
+        """Claim and run jobs until stop() is called."""
+        slots = asyncio.Semaphore(self.concurrency)
+        self._stopping = False
+        logger.info("job_worker_started", worker=self.name, concurrency=self.concurrency)
+        while not self._stopping:
+            await slots.acquire()
+            try:
+                job = await self.queue.claim(self.name)
+            except Exception as e:
+                logger.warning("job_claim_failed", worker=self.name, error=str(e))
+                job = None
+            if job is None:
+                slots.release()
+                await self.queue.wait_for_jobs(self.poll_interval)
+                continue
+            self.stats_counts["claimed"] += 1
+            task = asyncio.create_task(self._execute(job))
+            self._running[job.id] = task
+
+            def _done(_, job_id=job.id):
+                self._running.pop(job_id, None)
+                slots.release()
+
+            task.add_done_callback(_done)
+
+    async def stop(self, grace: float = 30.0):
+        """Stop claiming, give running jobs `grace` seconds, then cancel them.
+
+        Cancelled jobs stay pending in a durable queue and are picked up again
+        once their visibility timeout passes.
+        """
+        self._stopping = True
+        running = list(self._running.values())
+        if running:
+            _, still = await asyncio.wait(running, timeout=grace)
+            for task in still:
+                task.cancel()
+            await asyncio.gather(*still, return_exceptions=True)
+
+    async def _execute(self, job: Job):
+        wait = job.wait_seconds or 0.0
+        self._waits.append(wait)
+        handler = self.handlers.get(job.kind)
+        if handler is None:
+            await self._finish(job, FAILED, error=f"No handler for job kind {job.kind!r}")
+            return
+        logger.info("job_started", job_id=job.id, kind=job.kind, wait_seconds=round(wait, 3), attempt=job.attempts)
+
+        work = asyncio.create_task(handler(job, self.queue))
+        try:
+            while not work.done():
+                await asyncio.wait({work}, timeout=self.heartbeat_interval)
+                if not work.done() and await self._cancel_requested(job):
+                    work.cancel()
+                    await asyncio.gather(work, return_exceptions=True)
+        except asyncio.CancelledError:
+            # Worker shutdown: leave the job for the queue to hand out again
+            work.cancel()
+            raise
+
+        if work.cancelled():
+            await self._finish(job, CANCELLED)
+        elif work.exception() is not None:
+            await self._finish(job, FAILED, error=str(work.exception()))
+        else:
+            await self._finish(job, COMPLETED, result=work.result())
+
+    async def _cancel_requested(self, job: Job) -> bool:
+        try:
+            await self.queue.heartbeat(job)
+            current = await self.queue.get(job.id)
+        except Exception as e:
+            logger.warning("job_heartbeat_failed", job_id=job.id, error=str(e))
+            return False
+        return current is not None and current.cancel_requested
+
+    async def _finish(self, job: Job, status: str, result=None, error: str | None = None):
+        self.stats_counts[status] += 1
+        logger.info("job_finished", job_id=job.id, kind=job.kind, status=status, error=error)
+        try:
+            await self.queue.finish(job, status, result=result, error=error)
+        except Exception as e:
+            logger.error("job_finish_failed", job_id=job.id, status=status, error=str(e))
+
+    def stats(self) -> dict:
+        waits = sorted(self._waits)
+        return {
+            "name": self.name,
+            "concurrency": self.concurrency,
+            "running": len(self._running),
+            **self.stats_counts,
+            "wait_seconds": {
+                "avg": round(sum(waits) / len(waits), 3) if waits else 0.0,
+                "p95": round(waits[int(0.95 * (len(waits) - 1))], 3) if waits else 0.0,
+                "max": round(waits[-1], 3) if waits else 0.0,
+            },
+        }
+
+
+# ─── Worker inside the API process ───────────────────────────
+
+_embedded: JobWorker | None = None
+_embedded_task: asyncio.Task | None = None
+
+
+def embedded_worker_enabled() -> bool:
+    # The in-memory queue is only visible to this process, so it always needs one
+    return settings.jobs_backend != "redis" or settings.jobs_embedded_worker
+
+
+def ensure_embedded_worker() -> JobWorker | None:
+    """Start the in-process worker on the running loop if it isn't already."""
+    global _embedded, _embedded_task
+    if not embedded_worker_enabled():
+        return None
+    loop = asyncio.get_running_loop()
+    if _embedded_task is None or _embedded_task.done() or _embedded_task.get_loop() is not loop:
+        _embedded = JobWorker(get_job_queue(), concurrency=settings.jobs_max_concurrency, poll_interval=settings.jobs_poll_interval)
+        _embedded_task = loop.create_task(_embedded.run())
+    return _embedded
+
+
+async def stop_embedded_worker(grace: float = 30.0):
+    global _embedded, _embedded_task
+    if _embedded is not None and _embedded_task is not None and not _embedded_task.done():
+        await _embedded.stop(grace)
+        _embedded_task.cancel()
+        await asyncio.gather(_embedded_task, return_exceptions=True)
+    _embedded = _embedded_task = None
+
+
+def get_embedded_worker() -> JobWorker | None:
+    return _embedded
+
+
+def reset_job_state():
+    """Forget the configured queue and embedded worker (tests)."""
+    global _embedded, _embedded_task
+    set_job_queue(None)
+    _embedded = _embedded_task = None
+
+
+# ─── Standalone worker ───────────────────────────────────────
+
+
+async def _serve():
+    worker = JobWorker(
+        get_job_queue(), concurrency=settings.jobs_max_concurrency, poll_interval=settings.jobs_poll_interval,
+    )
+    loop = asyncio.get_running_loop()
+    runner = asyncio.create_task(worker.run())
+    stop = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await stop.wait()
+    logger.info("job_worker_stopping", worker=worker.name, running=len(worker._running))
+    await worker.stop()
+    runner.cancel()
+    await asyncio.gather(runner, return_exceptions=True)
+
+
+def main():
+    if settings.jobs_backend != "redis":
+        logger.warning("job_worker_memory_backend", hint="set JOBS_BACKEND=redis to share jobs with the API")
+    asyncio.run(_serve())
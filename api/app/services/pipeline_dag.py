@@ -0,0 +1,137 @@
+"""
+Stage DAG scheduler for the prediction pipeline.
+Each stage starts as soon as the stages it depends on have finished, so
+independent work (e.g. the LLM gap fill and population synthesis) overlaps.
+"""
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
+
+import structlog
+
+logger = structlog.get_logger()
+
+
+class StageTimeoutError(Exception):
+    """A stage exceeded its time budget and has no fallback."""
+
+    def __init__(self, stage: str, timeout: float):
+        super().__init__(f"Stage {stage} timed out after {timeout}s")
+        self.stage = stage
+        self.timeout = timeout
+
+
+@dataclass
+class Stage:
+    """One unit of pipeline work.
+
+    `run(results)` receives the outputs of finished stages by name. On timeout
+    the stage's `fallback(results)` is used if given; otherwise the run fails.
+    `status` is reported through on_start when the stage begins.
+    """
+
+    name: str
+    run: Callable[[dict], Awaitable[Any]]
+    deps: tuple[str, ...] = ()
+    timeout: float | None = None
+    fallback: Callable[[dict], Any] | None = None
+    status: str | None = None
+
+
+def stage_timing(started: float, ended: float) -> dict:
+    """One stage's entry in the timings returned by run_stages."""
+    return {
+        "started_at": round(started, 3),
+        "ended_at": round(ended, 3),
+        "seconds": round(ended - started, 3),
+    }
+
+
+def _check_graph(stages: list[Stage]):
+    names = {s.name for s in stages}
+    if len(names) != len(stages):
+        raise ValueError("Duplicate stage names")
+    for s in stages:
+        missing = set(s.deps) - names
+        if missing:
+            raise ValueError(f"Stage {s.name} depends on unknown stages: {sorted(missing)}")
+    # Kahn's algorithm: every stage must become ready eventually
+    remaining = {s.name: set(s.deps) for s in stages}
+    while remaining:
+        ready = [n for n, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Stage graph has a cycle among: {sorted(remaining)}")
+        for n in ready:
+            del remaining[n]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+
+async def run_stages(
+    stages: list[Stage],
+    on_start: Callable[[Stage], Awaitable[None]] | None = None,
+    results: dict | None = None,
+    on_finish: Callable[[Stage, Any], Awaitable[None]] | None = None,
+) -> tuple[dict, dict]:
+    """Run `stages` respecting dependencies, as concurrently as the graph allows.
+
+    Returns (results, timings) where timings[name] has started_at / ended_at
+    (epoch seconds) and seconds. Stages already present in `results` are
+    treated as done and skipped. on_finish(stage, output) is awaited for each
+    stage that completes on its own (not for timeout fallbacks). If any stage
+    fails, the others are cancelled and the error is raised.
+    """
+    _check_graph(stages)
+    results = {} if results is None else results
+    timings: dict[str, dict] = {}
+    pending = [s for s in stages if s.name not in results]
+    running: dict[asyncio.Task, Stage] = {}
+
+    async def _run_one(stage: Stage):
+        if on_start and stage.status:
+            await on_start(stage)
+        started = time.time()
+        timed_out = False
+        try:
+            if stage.timeout:
+                try:
+                    value = await asyncio.wait_for(stage.run(results), timeout=stage.timeout)
+                except TimeoutError:
+                    if stage.fallback is None:
+                        raise StageTimeoutError(stage.name, stage.timeout)
+                    logger.warning("pipeline_stage_timeout", stage=stage.name, timeout=stage.timeout)
+                    timed_out = True
+                    value = stage.fallback(results)
+            else:
+                value = await stage.run(results)
+        finally:
+            timings[stage.name] = stage_timing(started, time.time())
+        if timed_out:
+            timings[stage.name]["timed_out"] = True
+        elif on_finish:
+            await on_finish(stage, value)
+        return value
+
+    def _launch_ready():
+        for stage in list(pending):
+            if all(d in results for d in stage.deps):
+                pending.remove(stage)
+                running[asyncio.create_task(_run_one(stage))] = stage
+
+    _launch_ready()
+    try:
+        while running:
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                stage = running.pop(task)
+                results[stage.name] = task.result()
+            _launch_ready()
+    finally:
+        for task in running:
+            task.cancel()
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+    return results, timings
@@ -0,0 +1,153 @@
+"""
+Vectorized synthetic population for the prediction pipeline.
+
+Agents are stored column-wise, one NumPy array per attribute. Categorical
+attributes (ethnicity, region, income, education) are small integer codes into
+Population.categories, so an agent costs about 15 bytes instead of a dict.
+
+Attributes are drawn in bulk from the census: ethnicity from
+ethnic_composition, urban from urban_ratio, region uniformly over regions.
+The social network keeps the original homophily rule: each agent may link to
+the next `window - 1` agents by index, with probability 0.05, plus 0.15 for a
+shared region and 0.1 for a shared ethnicity. Candidate pairs are drawn one
+index offset at a time across the whole population, so building the network
+is O(n * window) array work. All draws come from one numpy Generator, so a seed
+reproduces a population exactly.
+
+Between pipeline stages (and in checkpoints) a population travels as the plain
+payload dict from to_payload(); CacheCodec writes its arrays as JSON lists and
+from_payload() accepts either form.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+INCOMES = ["low", "medium", "high"]
+EDUCATIONS = ["secondary", "tertiary", "postgraduate"]
+MIN_AGE, MAX_AGE = 21, 75
+NETWORK_WINDOW = 10
+
+AGENT_COLUMNS = {
+    "age": np.uint8,
+    "ethnicity": np.int8,
+    "region": np.int16,
+    "income": np.int8,
+    "education": np.int8,
+    "urban": np.bool_,
+    "stance": np.float32,  # -1 = opposition, +1 = government
+    "influence": np.float32,
+}
+EDGE_COLUMNS = {"source": np.int32, "target": np.int32, "weight": np.float32}
+_CATEGORICAL = ("ethnicity", "region", "income", "education")
+
+
+@dataclass
+class Population:
+    """Agents and their social network as parallel arrays; agent ids are row indices."""
+
+    agents: dict[str, np.ndarray]
+    edges: dict[str, np.ndarray]
+    categories: dict[str, list[str]]
+
+    def __len__(self) -> int:
+        return len(self.agents["stance"])
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.edges["source"])
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in self.agents.values()) + sum(a.nbytes for a in self.edges.values())
+
+    def with_stance(self, stance) -> "Population":
+        """The same agents and network with stances replaced (e.g. after a simulation)."""
+        agents = {**self.agents, "stance": np.asarray(stance, dtype=AGENT_COLUMNS["stance"])}
+        return Population(agents=agents, edges=self.edges, categories=self.categories)
+
+    def agent_records(self, limit: int | None = None) -> list[dict]:
+        """The first `limit` agents (all by default) as dicts with decoded labels."""
+        n = len(self) if limit is None else min(limit, len(self))
+        cols = {name: self.agents[name][:n].tolist() for name in AGENT_COLUMNS}
+        for name in _CATEGORICAL:
+            labels = self.categories[name]
+            cols[name] = [labels[code] for code in cols[name]]
+        return [{"id": i, **dict(zip(cols, row))} for i, row in enumerate(zip(*cols.values()))]
+
+    def edge_records(self, limit: int | None = None) -> list[dict]:
+        """Edges as dicts, restricted to edges between the first `limit` agents."""
+        source, target, weight = (self.edges[name] for name in EDGE_COLUMNS)
+        if limit is not None and limit < len(self):
+            keep = (source < limit) & (target < limit)
+            source, target, weight = source[keep], target[keep], weight[keep]
+        return [
+            {"source": s, "target": t, "weight": w}
+            for s, t, w in zip(source.tolist(), target.tolist(), weight.tolist())
+        ]
+
+    def to_payload(self) -> dict:
+        return {
+            "agent_count": len(self),
+            "categories": self.categories,
+            "agents": dict(self.agents),
+            "edges": dict(self.edges),
+        }
+
+    @classmethod
+    def from_payload(cls, payload: dict) -> "Population":
+        """Read a to_payload() dict, or one decoded from a checkpoint (lists instead of arrays)."""
+        return cls(
+            agents={name: np.asarray(payload["agents"][name], dtype=dtype) for name, dtype in AGENT_COLUMNS.items()},
+            edges={name: np.asarray(payload["edges"][name], dtype=dtype) for name, dtype in EDGE_COLUMNS.items()},
+            categories=payload["categories"],
+        )
+
+
+def synthesize_population(
+    census: dict, agent_count: int, seed: int | None = None, window: int = NETWORK_WINDOW,
+) -> Population:
+    """Draw `agent_count` agents from `census` and link them with the homophily network."""
+    rng = np.random.default_rng(seed)
+    n = agent_count
+    composition = census["ethnic_composition"]
+    ethnicities = list(composition)
+    weights = np.asarray([composition[e] for e in ethnicities], dtype=np.float64)
+    regions = list(census["regions"])
+
+    agents = {
+        "age": rng.integers(MIN_AGE, MAX_AGE + 1, n, dtype=np.uint8),
+        "ethnicity": rng.choice(len(ethnicities), n, p=weights / weights.sum()).astype(np.int8),
+        "region": rng.integers(0, len(regions), n, dtype=np.int16),
+        "income": rng.integers(0, len(INCOMES), n, dtype=np.int8),
+        "education": rng.integers(0, len(EDUCATIONS), n, dtype=np.int8),
+        "urban": rng.random(n, dtype=np.float32) < census["urban_ratio"],
+        "stance": rng.random(n, dtype=np.float32) * 2 - 1,
+        "influence": rng.random(n, dtype=np.float32) * np.float32(0.9) + np.float32(0.1),
+    }
+    source, target = _homophily_pairs(agents["region"], agents["ethnicity"], window, rng)
+    edges = {
+        "source": source,
+        "target": target,
+        "weight": rng.random(len(source), dtype=np.float32) * np.float32(0.7) + np.float32(0.3),
+    }
+    categories = {"ethnicity": ethnicities, "region": regions, "income": INCOMES, "education": EDUCATIONS}
+    return Population(agents=agents, edges=edges, categories=categories)
+
+
+def _homophily_pairs(
+    region: np.ndarray, ethnicity: np.ndarray, window: int, rng: np.random.Generator,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Sample (i, i + offset) links for every offset in 1..window-1."""
+    n = len(region)
+    sources, targets = [], []
+    for offset in range(1, min(window, n)):
+        prob = np.full(n - offset, 0.05, dtype=np.float32)
+        prob += np.float32(0.15) * (region[:-offset] == region[offset:])
+        prob += np.float32(0.1) * (ethnicity[:-offset] == ethnicity[offset:])
+        i = np.flatnonzero(rng.random(n - offset, dtype=np.float32) < prob).astype(np.int32)
+        sources.append(i)
+        targets.append(i + np.int32(offset))
+    if not sources:
+        return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32)
+    return np.concatenate(sources), np.concatenate(targets)
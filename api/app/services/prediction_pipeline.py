@@ -4,17 +4,24 @@ MVP: Mock data + real LLM for GoT reasoning
 """
 
 import asyncio
+import hashlib
 import json
 import random
-import math
-import uuid
-import structlog
 from typing import Any
 
-from app.core.llm import call_llm, call_llm_json
-from app.services.engines.mcts_engine import MCTSEngine
+import structlog
+
+from app.core.cache import cache_get_or_set, make_cache_key
+from app.core.config import settings
+from app.core.llm import call_llm_json, call_llm_json_stream, llm_cost_scope
+from app.core.llm_costs import CostScope
+from app.services.checkpoints import load_checkpoints, save_checkpoint
 from app.services.engines.debate_engine import DebateEngine
 from app.services.engines.ensemble import EnsembleAggregator
+from app.services.engines.mcts_engine import MCTSEngine
+from app.services.pipeline_dag import Stage, run_stages
+from app.services.population import Population, synthesize_population
+from app.services.simulation import StanceSimulation
 
 logger = structlog.get_logger()
 
@@ -70,14 +77,18 @@ async def stage_intent_parse(query: str) -> dict:
         return result
     except Exception as e:
         logger.warning("intent_parse_fallback", error=str(e))
-        # Fallback: rule-based parsing
-        return {
-            "type": "election",
-            "region": "MY",
-            "timeframe": "P6M",
-            "outcomes": ["PH wins", "PN wins", "Hung parliament"],
-            "key_variables": ["GDP growth", "Oil price", "Scandal exposure", "Youth turnout", "Urban sentiment"],
-        }
+        return _fallback_intent()
+
+
+def _fallback_intent() -> dict:
+    """Rule-based task used when intent parsing fails."""
+    return {
+        "type": "election",
+        "region": "MY",
+        "timeframe": "P6M",
+        "outcomes": ["PH wins", "PN wins", "Hung parliament"],
+        "key_variables": ["GDP growth", "Oil price", "Scandal exposure", "Youth turnout", "Urban sentiment"],
+    }
 
 
 # ─── Stage 2: Data Collection (Real APIs + fallback) ─────────
@@ -88,6 +99,13 @@ REGION_TO_NEWS_CODE = {"MY": "my", "US": "us", "CN": "cn", "SG": "sg", "ID": "id
 
 async def stage_data_collection(task: dict) -> dict:
     """Collect real data from World Bank + News APIs, with fallback to mock."""
+    data = await stage_data_sources(task)
+    data["gap_fills"] = await stage_gap_fill(task, data)
+    return data
+
+
+async def stage_data_sources(task: dict) -> dict:
+    """Assemble census, economic and sentiment data (no LLM)."""
     region = task.get("region", "MY")
     query = task.get("query", "")
     logger.info("data_collection", region=region)
@@ -97,7 +115,7 @@ async def stage_data_collection(task: dict) -> dict:
 
     # Try real data sources in parallel
     try:
-        from app.services.data_providers import worldbank, news, malaysia
+        from app.services.data_providers import malaysia, news, worldbank
 
         wb_gdp, wb_pop, wb_unemp, wb_inflation, news_data = await asyncio.gather(
             worldbank.get_gdp(wb_code),
@@ -151,7 +169,11 @@ async def stage_data_collection(task: dict) -> dict:
         logger.warning("data_collection_real_failed", error=str(e))
         data = {**MALAYSIA_SAMPLE_DATA, "data_sources": ["mock_only"]}
 
-    # LLM gap fill
+    return data
+
+
+async def stage_gap_fill(task: dict, data: dict) -> list:
+    """Ask the LLM for 2-3 missing data points useful for the prediction."""
     try:
         messages = [
             {
@@ -161,92 +183,33 @@ async def stage_data_collection(task: dict) -> dict:
             {"role": "user", "content": f"Task: {json.dumps(task)}\nData: {json.dumps(data, default=str)[:2000]}"},
         ]
         gaps = await call_llm_json("data_gap_fill", messages)
-        data["gap_fills"] = gaps.get("gap_fills", [])
+        return gaps.get("gap_fills", [])
     except Exception:
-        data["gap_fills"] = []
-
-    return data
+        return []
 
 
 # ─── Stage 3: Population Synthesizer ─────────────────────────
 
-async def stage_pop_synthesizer(data: dict, agent_count: int = 100) -> dict:
-    """Generate synthetic agent population. MVP: random with constraints."""
-    agents = []
-    ethnicities = ["Malay", "Chinese", "Indian", "Others"]
-    ethnic_weights = [0.62, 0.21, 0.06, 0.11]
-    regions = data["census"]["regions"]
-
-    for i in range(agent_count):
-        ethnicity = random.choices(ethnicities, weights=ethnic_weights, k=1)[0]
-        agent = {
-            "id": i,
-            "age": random.randint(21, 75),
-            "ethnicity": ethnicity,
-            "region": random.choice(regions),
-            "income": random.choice(["low", "medium", "high"]),
-            "education": random.choice(["secondary", "tertiary", "postgraduate"]),
-            "urban": random.random() < data["census"]["urban_ratio"],
-            "stance": random.uniform(-1, 1),  # -1=opposition, +1=government
-            "influence": random.uniform(0.1, 1.0),
-        }
-        agents.append(agent)
-
-    # Build simple social network
-    edges = []
-    for i in range(agent_count):
-        for j in range(i + 1, min(i + 10, agent_count)):
-            # Same region/ethnicity → higher connection probability
-            same_region = agents[i]["region"] == agents[j]["region"]
-            same_ethnicity = agents[i]["ethnicity"] == agents[j]["ethnicity"]
-            prob = 0.05 + (0.15 if same_region else 0) + (0.1 if same_ethnicity else 0)
-            if random.random() < prob:
-                edges.append({"source": i, "target": j, "weight": random.uniform(0.3, 1.0)})
+async def stage_pop_synthesizer(data: dict, agent_count: int = 100, seed: int | None = None) -> dict:
+    """Generate the synthetic agent population from the census (see app.services.population).
 
-    logger.info("pop_synthesized", agent_count=len(agents), edge_count=len(edges))
-    return {"agents": agents, "network": {"edges": edges}}
+    Returns a Population payload; read it back with Population.from_payload().
+    """
+    pop = await asyncio.to_thread(synthesize_population, data["census"], agent_count, seed)
+    logger.info("pop_synthesized", agent_count=len(pop), edge_count=pop.edge_count)
+    return pop.to_payload()
 
 
 # ─── Stage 4: Simulation ─────────────────────────────────────
 
-async def stage_simulation(pop: dict, ticks: int = 30) -> dict:
-    """Run agent-based simulation. MVP: rule-based, no LLM."""
-    agents = pop["agents"]
-    edges = pop["network"]["edges"]
-
-    # Build adjacency: agent_id -> list of (neighbor_id, weight)
-    adj: dict[int, list[tuple[int, float]]] = {a["id"]: [] for a in agents}
-    for e in edges:
-        adj[e["source"]].append((e["target"], e["weight"]))
-        adj[e["target"]].append((e["source"], e["weight"]))
-
-    tick_data = []
-    for t in range(ticks):
-        for agent in agents:
-            neighbors = adj.get(agent["id"], [])
-            if neighbors:
-                neighbor_influence = sum(
-                    agents[nid]["stance"] * w for nid, w in neighbors
-                ) / max(sum(w for _, w in neighbors), 0.01)
-                # 70% self + 30% neighbor
-                agent["stance"] = 0.7 * agent["stance"] + 0.3 * neighbor_influence
-            # Random noise
-            if random.random() < 0.02:
-                agent["stance"] += random.uniform(-0.3, 0.3)
-            agent["stance"] = max(-1, min(1, agent["stance"]))
-
-        # Record aggregate
-        avg_stance = sum(a["stance"] for a in agents) / len(agents)
-        gov_pct = sum(1 for a in agents if a["stance"] > 0) / len(agents)
-        tick_data.append({"tick": t, "avg_stance": round(avg_stance, 4), "gov_support": round(gov_pct, 4)})
-
-    final_distribution = {
-        "government_support": tick_data[-1]["gov_support"],
-        "opposition_support": 1 - tick_data[-1]["gov_support"],
-    }
+async def stage_simulation(pop: dict, ticks: int = 30, seed: int | None = None) -> dict:
+    """Run agent-based simulation (see app.services.simulation). Rule-based, no LLM.
 
-    logger.info("simulation_done", ticks=ticks, final=final_distribution)
-    return {"ticks": tick_data, "final_distribution": final_distribution, "agent_count": len(agents)}
+    The population payload is left unchanged.
+    """
+    result = await asyncio.to_thread(lambda: StanceSimulation(Population.from_payload(pop), seed=seed).run(ticks))
+    logger.info("simulation_done", ticks=ticks, agent_count=result["agent_count"], final=result["final_distribution"])
+    return result
 
 
 # ─── Stage 5: GoT Reasoning (REAL LLM — Core IP) ─────────────
@@ -281,9 +244,9 @@ Return ONLY valid JSON in this exact format:
 }"""
 
 
-async def stage_got_reasoning(task: dict, data: dict, sim_result: dict) -> dict:
-    """Graph of Thought reasoning. Uses real LLM (Opus via OpenRouter)."""
-    context = f"""
+def _got_context(task: dict, data: dict, sim_result: dict) -> str:
+    """The GoT prompt body; everything GoT consumes from task, data and simulation."""
+    return f"""
 Prediction Task: {json.dumps(task)}
 
 Data Summary:
@@ -302,12 +265,31 @@ Possible Outcomes: {json.dumps(task.get('outcomes', []))}
 Key Variables: {json.dumps(task.get('key_variables', []))}
 """
 
+
+async def stage_got_reasoning(task: dict, data: dict, sim_result: dict, on_field=None) -> dict:
+    """Graph of Thought reasoning. Uses real LLM (Opus via OpenRouter).
+
+    With `on_field`, the response is streamed and each top-level field
+    (dimensions, outcomes, causal_graph, ...) is reported as soon as it is complete.
+    A failing `on_field` is logged; it never replaces the result with the fallback.
+    """
+    context = _got_context(task, data, sim_result)
+
+    async def _report(key, value):
+        try:
+            await on_field(key, value)
+        except Exception as e:
+            logger.warning("got_partial_report_failed", field=key, error=str(e))
+
     try:
         messages = [
             {"role": "system", "content": GOT_SYSTEM_PROMPT},
             {"role": "user", "content": context},
         ]
-        result = await call_llm_json("got_reasoning", messages)
+        if on_field:
+            result = await call_llm_json_stream("got_reasoning", messages, on_field=_report)
+        else:
+            result = await call_llm_json("got_reasoning", messages)
         logger.info("got_reasoning_done", outcomes=len(result.get("outcomes", [])))
         return result
     except Exception as e:
@@ -316,7 +298,7 @@ Key Variables: {json.dumps(task.get('key_variables', []))}
 
 
 def _fallback_got_result(task: dict) -> dict:
-    """Fallback GoT result when LLM fails."""
+    """Fallback GoT result when LLM fails; marked with "source": "fallback"."""
     outcomes = task.get("outcomes", ["Outcome A", "Outcome B", "Outcome C"])
     n = len(outcomes)
     probs = [random.uniform(0.15, 0.5) for _ in range(n)]
@@ -324,6 +306,7 @@ def _fallback_got_result(task: dict) -> dict:
     probs = [p / total for p in probs]
 
     return {
+        "source": "fallback",
         "dimensions": [
             {"name": "Economic", "analysis": "GDP growth provides moderate stability", "impact": {o: random.uniform(-0.2, 0.3) for o in outcomes}},
             {"name": "Political", "analysis": "Incumbent advantage from governance record", "impact": {o: random.uniform(-0.2, 0.3) for o in outcomes}},
@@ -394,35 +377,36 @@ async def stage_explanation(task: dict, got_result: dict) -> dict:
         return result
     except Exception as e:
         logger.warning("explanation_fallback", error=str(e))
-        return {
-            "explanation_text": (
-                f"Based on comprehensive analysis of {task.get('region', 'the region')}, "
-                f"our multi-dimensional reasoning engine evaluated {len(got_result.get('outcomes', []))} possible outcomes. "
-                "Economic factors, political dynamics, and social sentiment were the primary drivers. "
-                "The simulation of agent interactions revealed polarization patterns that influence the final probabilities."
-            ),
-            "shap_factors": [
-                {"name": "Economic Growth", "impact": 0.35, "direction": "positive"},
-                {"name": "Government Approval", "impact": 0.25, "direction": "positive"},
-                {"name": "Cost of Living", "impact": -0.30, "direction": "negative"},
-                {"name": "Corruption Perception", "impact": -0.22, "direction": "negative"},
-                {"name": "Youth Engagement", "impact": 0.18, "direction": "positive"},
-                {"name": "Ethnic Coalition", "impact": 0.15, "direction": "positive"},
-            ],
-        }
+        return _fallback_explanation(task, got_result)
+
+
+def _fallback_explanation(task: dict, got_result: dict) -> dict:
+    """Template explanation used when the LLM call fails or times out."""
+    return {
+        "source": "fallback",
+        "explanation_text": (
+            f"Based on comprehensive analysis of {task.get('region', 'the region')}, "
+            f"our multi-dimensional reasoning engine evaluated {len(got_result.get('outcomes', []))} possible outcomes. "
+            "Economic factors, political dynamics, and social sentiment were the primary drivers. "
+            "The simulation of agent interactions revealed polarization patterns that influence the final probabilities."
+        ),
+        "shap_factors": [
+            {"name": "Economic Growth", "impact": 0.35, "direction": "positive"},
+            {"name": "Government Approval", "impact": 0.25, "direction": "positive"},
+            {"name": "Cost of Living", "impact": -0.30, "direction": "negative"},
+            {"name": "Corruption Perception", "impact": -0.22, "direction": "negative"},
+            {"name": "Youth Engagement", "impact": 0.18, "direction": "positive"},
+            {"name": "Ethnic Coalition", "impact": 0.15, "direction": "positive"},
+        ],
+    }
 
 
 # ─── Stage 5 (upgraded): Three-Engine Parallel Reasoning ─────
 
-async def stage_three_engine_reasoning(
-    task: dict, data: dict, sim_result: dict, pop: dict,
-    update_substage=None, prediction_id: str = "",
-) -> dict:
-    """Run GoT + MCTS + Debate in parallel, then ensemble aggregate."""
+def _engine_context(task: dict, data: dict) -> dict:
+    """Shared MCTS / Debate input; everything those engines consume."""
     outcomes = task.get("outcomes", [])
-
-    # Build shared context for engines
-    context = {
+    return {
         "query": task.get("type", "") + ": " + ", ".join(outcomes),
         "outcomes": outcomes,
         "data_summary": (
@@ -433,10 +417,55 @@ async def stage_three_engine_reasoning(
         ),
     }
 
+
+def _sim_summary(sim_result: dict) -> dict:
+    """The simulation as stored with the engine results, without the per-agent stances."""
+    return {k: v for k, v in sim_result.items() if k != "final_stance"}
+
+
+def _fingerprint(value: Any) -> str:
+    return hashlib.md5(json.dumps(value, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def engine_input_fingerprints(task: dict, data: dict, sim_result: dict) -> dict[str, str]:
+    """Fingerprint of the inputs each engine actually consumed, by engine name."""
+    context = _fingerprint(_engine_context(task, data))
+    return {"got": _fingerprint(_got_context(task, data, sim_result)), "mcts": context, "debate": context}
+
+
+async def stage_three_engine_reasoning(
+    task: dict, data: dict, sim_result: dict, pop: dict,
+    update_substage=None, prediction_id: str = "",
+) -> dict:
+    """Run GoT + MCTS + Debate in parallel, then ensemble aggregate.
+
+    `update_substage(prediction_id, event)` receives partial engine output as it
+    streams in, e.g. {"engine": "got", "field": "outcomes", "value": [...]}.
+    """
+    outcomes = task.get("outcomes", [])
+
+    # Build shared context for engines
+    context = _engine_context(task, data)
+
+    async def _got_field(key: str, value):
+        await update_substage(prediction_id, {"engine": "got", "field": key, "value": value})
+
+    async def _report(engine: str, coro):
+        # Each engine's completion is reported as soon as it happens
+        try:
+            result = await coro
+        except Exception:
+            if update_substage:
+                await update_substage(prediction_id, {"engine": engine, "field": "status", "value": "failed"})
+            raise
+        if update_substage:
+            await update_substage(prediction_id, {"engine": engine, "field": "status", "value": "completed"})
+        return result
+
     # Run all three in parallel
-    got_coro = stage_got_reasoning(task, data, sim_result)
-    mcts_coro = MCTSEngine(iterations=80).search(context)
-    debate_coro = DebateEngine().run(context, outcomes)
+    got_coro = _report("got", stage_got_reasoning(task, data, sim_result, on_field=_got_field if update_substage else None))
+    mcts_coro = _report("mcts", MCTSEngine(iterations=80).search(context))
+    debate_coro = _report("debate", DebateEngine().run(context, outcomes))
 
     got_result, mcts_result, debate_result = await asyncio.gather(
         got_coro, mcts_coro, debate_coro,
@@ -467,7 +496,7 @@ async def stage_three_engine_reasoning(
 
     # Add simulation results
     if sim_result and "final_distribution" in sim_result:
-        engine_results["simulation"] = sim_result
+        engine_results["simulation"] = _sim_summary(sim_result)
 
     if not engine_results:
         raise RuntimeError("All engines failed")
@@ -489,6 +518,7 @@ async def stage_three_engine_reasoning(
             "debate": debate_result if not isinstance(debate_result, Exception) else None,
             "ensemble": {"weights": final.get("engine_weights", {}), "consensus": final.get("consensus", 0)},
         },
+        "engine_inputs": engine_input_fingerprints(task, data, sim_result),
     }
 
 
@@ -496,33 +526,128 @@ async def stage_three_engine_reasoning(
 
 # ─── Variable Rerun ───────────────────────────────────────────
 
-async def rerun_with_variables(
-    task: dict, original_data: dict, got_result: dict, new_variables: dict[str, float]
-) -> dict:
-    """Re-run three-engine reasoning with modified variables."""
-    modified_data = {**original_data}
-    econ = {**modified_data.get("economic", {})}
+# Rerun engine outputs are cached by input fingerprint, so dragging a slider
+# back to an earlier position costs nothing.
+RERUN_CACHE_TTL = 3600
+
+
+def _not_fallback(value) -> bool:
+    """cache_if for rerun outputs: an LLM outage must not be served from cache for an hour."""
+    return not (isinstance(value, dict) and value.get("source") == "fallback")
+RERUN_MCTS_ITERATIONS = 30
+
+
+def _apply_variables(data: dict, new_variables: dict[str, float]) -> dict:
+    econ = {**data.get("economic", {})}
     for var_name, var_value in new_variables.items():
         key = var_name.lower().replace(" ", "_")
         if key in econ:
             econ[key] = var_value
-    modified_data["economic"] = econ
+    return {**data, "economic": econ}
+
+
+def _variable_shift(variables: list[dict], new_variables: dict[str, float]) -> float:
+    """Net probability shift towards the first outcome from slider moves.
 
-    sim_placeholder = {"agent_count": 100, "ticks": [], "final_distribution": {"government_support": 0.5, "opposition_support": 0.5}}
-    pop_placeholder = {"agents": [], "network": {"edges": []}}
+    Each move counts in proportion to its distance across the variable's range
+    and its impact; a higher value favours the first outcome.
+    """
+    shift = 0.0
+    for var in variables:
+        if var["name"] not in new_variables:
+            continue
+        low, high = var.get("range", [0, 1])
+        span = (high - low) or 1
+        shift += var.get("impact", 0) * (new_variables[var["name"]] - var.get("current", 0)) / span
+    return shift
 
-    # Run three engines (MCTS with reduced iterations for speed)
-    context = {
-        "query": json.dumps(task.get("outcomes", [])),
-        "outcomes": task.get("outcomes", []),
-        "data_summary": f"GDP: {econ.get('gdp_growth', 0)}%, Unemployment: {econ.get('unemployment', 0)}%",
+
+def _shift_probs(probs: dict[str, float], outcomes: list[str], shift: float) -> dict[str, float]:
+    first = outcomes[0]
+    p = min(0.99, max(0.01, probs.get(first, 0) + shift))
+    rest = sum(v for k, v in probs.items() if k != first)
+    scale = (1 - p) / rest if rest > 0 else 0
+    shifted = {k: v * scale for k, v in probs.items() if k != first}
+    shifted[first] = p
+    return shifted
+
+
+def _numeric_rerun(
+    task: dict, previous: dict, new_variables: dict[str, float], sim_result: dict | None,
+) -> dict:
+    """Re-aggregate the previous engine outputs with their probabilities perturbed."""
+    outcomes = task.get("outcomes", [])
+    engine_results = {k: v for k, v in previous.get("engines", {}).items() if k != "ensemble" and v}
+    if sim_result and "final_distribution" in sim_result:
+        engine_results["simulation"] = _sim_summary(sim_result)
+
+    aggregator = EnsembleAggregator()
+    shift = _variable_shift(previous.get("variables", []), new_variables)
+    perturbed = {
+        name: {"outcome_probabilities": _shift_probs(probs, outcomes, shift) if outcomes else probs}
+        for name, probs in aggregator.engine_probabilities(engine_results, outcomes).items()
+    }
+    final = aggregator.aggregate(perturbed, outcomes)
+    return {
+        "outcomes": final["outcomes"],
+        "causal_graph": (engine_results.get("got") or previous).get("causal_graph", {"nodes": [], "edges": []}),
+        "reasoning": previous.get("reasoning", {}),
+        "engines": {
+            **previous.get("engines", {}),
+            "ensemble": {"weights": final.get("engine_weights", {}), "consensus": final.get("consensus", 0)},
+        },
+        "mode": "numeric",
+        "approximate": True,
+        "reused_engines": sorted(k for k in engine_results if k != "simulation"),
     }
 
-    got_coro = stage_got_reasoning(task, modified_data, sim_placeholder)
-    mcts_coro = MCTSEngine(iterations=30).search(context)
-    debate_coro = DebateEngine().run(context, task.get("outcomes", []))
 
-    got_r, mcts_r, debate_r = await asyncio.gather(got_coro, mcts_coro, debate_coro, return_exceptions=True)
+async def rerun_with_variables(
+    task: dict, original_data: dict, got_result: dict, new_variables: dict[str, float],
+    sim_result: dict | None = None, previous: dict | None = None, mode: str = "incremental",
+) -> dict:
+    """Re-run three-engine reasoning with modified variables.
+
+    `sim_result` is the original run's simulation (from its checkpoint); without
+    it GoT sees a neutral placeholder distribution.
+
+    `previous` is the stored result being explored. In "incremental" mode an
+    engine whose inputs (see engine_input_fingerprints) are unchanged keeps its
+    previous output, and recomputed outputs are cached by input, so only engines
+    a slider actually reaches are rerun. "numeric" mode makes no LLM calls: it
+    shifts each engine's probabilities by the moved variables' impact and
+    re-aggregates, returning an approximate result in milliseconds.
+    """
+    previous = previous or {"engines": {"got": got_result}}
+    if mode == "numeric":
+        return _numeric_rerun(task, previous, new_variables, sim_result)
+
+    outcomes = task.get("outcomes", [])
+    modified_data = _apply_variables(original_data, new_variables)
+    sim = sim_result or {"agent_count": 100, "ticks": [], "final_distribution": {"government_support": 0.5, "opposition_support": 0.5}}
+    context = _engine_context(task, modified_data)
+    fingerprints = engine_input_fingerprints(task, modified_data, sim)
+    previous_inputs = previous.get("metadata", {}).get("engine_inputs", {})
+    previous_engines = previous.get("engines", {})
+
+    runners = {
+        "got": lambda: stage_got_reasoning(task, modified_data, sim),
+        "mcts": lambda: MCTSEngine(iterations=RERUN_MCTS_ITERATIONS).search(context),
+        "debate": lambda: DebateEngine().run(context, outcomes),
+    }
+    reused = sorted(
+        name for name in runners
+        if previous_engines.get(name) and previous_inputs.get(name) == fingerprints[name]
+    )
+
+    async def _engine(name: str):
+        if name in reused:
+            return previous_engines[name]
+        return await cache_get_or_set(
+            make_cache_key("rerun", name, fingerprints[name]), runners[name], ttl=RERUN_CACHE_TTL, cache_if=_not_fallback,
+        )
+
+    got_r, mcts_r, debate_r = await asyncio.gather(*(_engine(name) for name in runners), return_exceptions=True)
 
     engine_results = {}
     got_data = None
@@ -537,12 +662,19 @@ async def rerun_with_variables(
     if not engine_results:
         engine_results["got"] = _fallback_got_result(task)
         got_data = engine_results["got"]
+    if sim_result and "final_distribution" in sim_result:
+        engine_results["simulation"] = _sim_summary(sim_result)
 
-    outcomes = task.get("outcomes", [])
     final = EnsembleAggregator().aggregate(engine_results, outcomes)
     causal_graph = got_data.get("causal_graph", {"nodes": [], "edges": []}) if got_data else {"nodes": [], "edges": []}
 
-    new_explanation = await stage_explanation(task, got_data or {"outcomes": final["outcomes"]})
+    # The explanation only reads GoT's output, so it is cached by GoT's inputs
+    new_explanation = await cache_get_or_set(
+        make_cache_key("rerun", "explanation", fingerprints["got"]),
+        lambda: stage_explanation(task, got_data or {"outcomes": final["outcomes"]}),
+        ttl=RERUN_CACHE_TTL,
+        cache_if=_not_fallback,
+    )
 
     return {
         "outcomes": final["outcomes"],
@@ -556,87 +688,188 @@ async def rerun_with_variables(
             "got": got_data,
             "mcts": mcts_r if not isinstance(mcts_r, Exception) else None,
             "debate": debate_r if not isinstance(debate_r, Exception) else None,
-            "ensemble": {"weights": final.get("engine_weights", {})},
+            "ensemble": {"weights": final.get("engine_weights", {}), "consensus": final.get("consensus", 0)},
         },
+        "mode": "incremental",
+        "reused_engines": reused,
     }
 
 
 # ─── Full Pipeline Runner ────────────────────────────────────
 
+# Per-stage time budgets (seconds); settings.pipeline_stage_timeouts overrides.
+# Stages with a fallback degrade on timeout, the rest fail the run.
+STAGE_TIMEOUTS = {
+    "intent": 60,
+    "data": 60,
+    "gap_fill": 60,
+    "population": 30,
+    "simulation": 60,
+    "reasoning": 300,
+    "explanation": 90,
+}
+
+
+# The result keeps this many agents (and the edges between them) for the 2D view
+VISUALIZED_AGENTS = 1000
+
+
+def _stage_seed(prediction_id: str, stage: str) -> int:
+    """A retried run of the same prediction draws the same population and simulation noise."""
+    return int(hashlib.md5(f"{prediction_id}:{stage}".encode()).hexdigest()[:8], 16)
+
+
+def build_pipeline_stages(prediction_id: str, query: str, update_partial: Any = None) -> list[Stage]:
+    """The prediction pipeline as a stage graph.
+
+    The gap fill only feeds the stored result, so it runs alongside population
+    synthesis, simulation and reasoning instead of in front of them.
+    """
+    timeouts = {**STAGE_TIMEOUTS, **settings.pipeline_stage_timeouts}
+
+    def _got_or_outcomes(r: dict) -> dict:
+        got_data = r["reasoning"].get("engines", {}).get("got") or {}
+        return got_data if got_data else {"outcomes": r["reasoning"]["outcomes"]}
+
+    return [
+        Stage(
+            "intent", lambda r: stage_intent_parse(query),
+            timeout=timeouts["intent"], fallback=lambda r: _fallback_intent(), status="stage_1_done",
+        ),
+        Stage(
+            "data", lambda r: stage_data_sources(r["intent"]), deps=("intent",),
+            timeout=timeouts["data"], status="stage_2_done",
+        ),
+        Stage(
+            "gap_fill", lambda r: stage_gap_fill(r["intent"], r["data"]), deps=("intent", "data"),
+            timeout=timeouts["gap_fill"], fallback=lambda r: [],
+        ),
+        Stage(
+            "population",
+            lambda r: stage_pop_synthesizer(r["data"], agent_count=settings.pipeline_agent_count, seed=_stage_seed(prediction_id, "population")),
+            deps=("data",),
+            timeout=timeouts["population"], status="stage_3_done",
+        ),
+        Stage(
+            "simulation",
+            lambda r: stage_simulation(r["population"], ticks=30, seed=_stage_seed(prediction_id, "simulation")),
+            deps=("population",),
+            timeout=timeouts["simulation"], status="stage_4_done",
+        ),
+        Stage(
+            "reasoning",
+            lambda r: stage_three_engine_reasoning(
+                r["intent"], r["data"], r["simulation"], r["population"],
+                update_substage=update_partial, prediction_id=prediction_id,
+            ),
+            deps=("intent", "data", "simulation"),
+            timeout=timeouts["reasoning"], status="stage_5_done",
+        ),
+        Stage(
+            "explanation", lambda r: stage_explanation(r["intent"], _got_or_outcomes(r)), deps=("intent", "reasoning"),
+            timeout=timeouts["explanation"], status="stage_6_done",
+            fallback=lambda r: _fallback_explanation(r["intent"], _got_or_outcomes(r)),
+        ),
+    ]
+
+
 async def run_prediction_pipeline(
     prediction_id: str,
     query: str,
     update_status: Any = None,
+    update_partial: Any = None,
+    resume: bool = True,
+    precomputed: dict[str, dict] | None = None,
+    cost: CostScope | None = None,
 ) -> dict:
-    """Run the complete 7-stage prediction pipeline."""
+    """Run the complete 7-stage prediction pipeline.
+
+    Stages run as a dependency graph (see build_pipeline_stages); per-stage
+    start/end times are recorded in metadata["stage_timings"].
+    update_status(prediction_id, stage) is awaited as each stage starts;
+    update_partial(prediction_id, event) receives partial stage 5 output.
+
+    Each stage's output is checkpointed under the prediction id. With resume,
+    stages checkpointed by an earlier attempt are skipped.
+
+    A caller that ran and checkpointed some stages itself in this attempt passes
+    their timings (stage name -> stage_timing) as `precomputed`, and the cost
+    scope it charged them to as `cost`. Those stages are reported in
+    stage_timings rather than resumed_stages, and their calls in cost_usd.
+    """
 
     async def _update(stage: str):
         if update_status:
             await update_status(prediction_id, stage)
         logger.info("pipeline_stage", prediction_id=prediction_id, stage=stage)
 
-    # Stage 1: Intent Parse
-    await _update("stage_1_done")
-    task = await stage_intent_parse(query)
+    async def _on_start(stage: Stage):
+        await _update(stage.status)
 
-    # Stage 2: Data Collection
-    await _update("stage_2_done")
-    data = await stage_data_collection(task)
+    async def _checkpoint(stage: Stage, output: Any):
+        await save_checkpoint(prediction_id, stage.name, output)
 
-    # Stage 3: Population Synthesis
-    await _update("stage_3_done")
-    pop = await stage_pop_synthesizer(data, agent_count=100)
+    done = await load_checkpoints(prediction_id) if resume else {}
+    precomputed = {name: t for name, t in (precomputed or {}).items() if name in done}
+    resumed = sorted(set(done) - set(precomputed))
+    if resumed:
+        logger.info("pipeline_resume", prediction_id=prediction_id, stages=resumed)
 
-    # Stage 4: Simulation
-    await _update("stage_4_done")
-    sim = await stage_simulation(pop, ticks=30)
-
-    # Stage 5: Three-Engine Parallel Reasoning (GoT + MCTS + Debate → Ensemble)
-    await _update("stage_5_done")
-    three_engine = await stage_three_engine_reasoning(task, data, sim, pop)
-
-    # Stage 6: Explanation
-    await _update("stage_6_done")
-    got_data = three_engine.get("engines", {}).get("got") or {}
-    explanation = await stage_explanation(task, got_data if got_data else {"outcomes": three_engine["outcomes"]})
-
-    # Combine results
-    variables = [
-        {"name": v, "current": data["economic"].get(v.lower().replace(" ", "_"), 0), "range": [-10, 100], "impact": random.uniform(0.1, 0.5)}
-        for v in task.get("key_variables", [])[:5]
-    ]
+    # Every LLM call below (including engine fan-out) is charged to this run
+    with llm_cost_scope(cost) as cost:
+        r, timings = await run_stages(
+            build_pipeline_stages(prediction_id, query, update_partial),
+            on_start=_on_start, results=dict(done), on_finish=_checkpoint,
+        )
+        task, pop, three_engine, explanation = r["intent"], r["population"], r["reasoning"], r["explanation"]
+        data = {**r["data"], "gap_fills": r["gap_fill"]}
+        got_data = three_engine.get("engines", {}).get("got") or {}
+
+        # Combine results
+        variables = [
+            {"name": v, "current": data["economic"].get(v.lower().replace(" ", "_"), 0), "range": [-10, 100], "impact": random.uniform(0.1, 0.5)}
+            for v in task.get("key_variables", [])[:5]
+        ]
 
-    # Store agent histories for Agent 2D visualization
-    agent_histories = [
-        {"id": a["id"], "age": a["age"], "region": a["region"], "ethnicity": a["ethnicity"], "stance": a["stance"], "influence": a["influence"]}
-        for a in pop.get("agents", [])
-    ]
+        # Store agent histories for Agent 2D visualization
+        population = Population.from_payload(pop)
+        if "final_stance" in r["simulation"]:
+            # Show where the agents ended up, not where they started
+            population = population.with_stance(r["simulation"]["final_stance"])
+        agent_histories = [
+            {"id": a["id"], "age": a["age"], "region": a["region"], "ethnicity": a["ethnicity"], "stance": a["stance"], "influence": a["influence"]}
+            for a in population.agent_records(limit=VISUALIZED_AGENTS)
+        ]
 
-    result = {
-        "prediction_id": prediction_id,
-        "query": query,
-        "task": task,
-        "data": data,
-        "outcomes": three_engine["outcomes"],
-        "causal_graph": three_engine.get("causal_graph", {"nodes": [], "edges": []}),
-        "reasoning": {
-            "got_tree": got_data.get("dimensions", []) if got_data else [],
-            "shap_factors": explanation.get("shap_factors", []),
-            "explanation_text": explanation.get("explanation_text", ""),
-        },
-        "engines": three_engine.get("engines", {}),
-        "variables": variables,
-        "metadata": {
-            "agent_count": 100,
-            "simulation_ticks": 30,
-            "reasoning_engines": ["got", "mcts", "debate"],
-            "engine_consensus": three_engine.get("consensus", 0),
-            "total_time_seconds": 0,
-            "cost_usd": 0,
-            "agent_histories": agent_histories,
-            "network_edges": pop.get("network", {}).get("edges", []),
-        },
-    }
+        result = {
+            "prediction_id": prediction_id,
+            "query": query,
+            "task": task,
+            "data": data,
+            "outcomes": three_engine["outcomes"],
+            "causal_graph": three_engine.get("causal_graph", {"nodes": [], "edges": []}),
+            "reasoning": {
+                "got_tree": got_data.get("dimensions", []) if got_data else [],
+                "shap_factors": explanation.get("shap_factors", []),
+                "explanation_text": explanation.get("explanation_text", ""),
+            },
+            "engines": three_engine.get("engines", {}),
+            "variables": variables,
+            "metadata": {
+                "agent_count": len(population),
+                "simulation_ticks": 30,
+                "reasoning_engines": ["got", "mcts", "debate"],
+                "engine_consensus": three_engine.get("consensus", 0),
+                "total_time_seconds": 0,
+                "stage_timings": {**precomputed, **timings},
+                "resumed_stages": resumed,
+                "engine_inputs": three_engine.get("engine_inputs", {}),
+                "cost_usd": round(cost.cost_usd, 4),
+                "llm_calls": cost.calls,
+                "agent_histories": agent_histories,
+                "network_edges": population.edge_records(limit=VISUALIZED_AGENTS),
+            },
+        }
 
     await _update("completed")
     return result
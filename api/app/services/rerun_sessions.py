@@ -0,0 +1,106 @@
+"""
+Per-prediction rerun sessions for the what-if variable sliders.
+
+A user dragging a slider sends a burst of reruns for one prediction. Each
+prediction gets a RerunSession that serializes them:
+
+    debounce        a rerun starts only after `debounce` seconds without a
+                    newer request, so intermediate slider positions never
+                    reach the engines
+    cancellation    a newer request cancels the superseded rerun's task; the
+                    cancellation propagates through the engines into call_llm,
+                    which stops its provider call
+    last-write-wins only the newest request's result is applied; requests it
+                    superseded resolve with that same result
+
+Sessions live in-process and are dropped once idle.
+"""
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+import structlog
+
+logger = structlog.get_logger()
+
+_sessions: dict[str, "RerunSession"] = {}
+
+
+class RerunSession:
+    """Debounces, cancels and orders the reruns of one prediction."""
+
+    def __init__(self, prediction_id: str):
+        self.prediction_id = prediction_id
+        self._seq = 0
+        self._applied = 0
+        self._task: asyncio.Task | None = None
+        # (seq, future) of requests still waiting for a result
+        self._waiters: list[tuple[int, asyncio.Future]] = []
+
+    async def submit(
+        self,
+        run: Callable[[], Awaitable[dict]],
+        on_result: Callable[[dict], Any] | None = None,
+        debounce: float = 0.0,
+    ) -> dict:
+        """Queue `run` as the newest rerun and return the result that wins.
+
+        `on_result` is called with the winning result before any waiter sees
+        it, so stored state is only ever written in request order. A result
+        returned to a superseded request carries `"superseded": True`.
+        """
+        self._seq += 1
+        seq = self._seq
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append((seq, future))
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            logger.info("rerun_superseded", prediction_id=self.prediction_id, seq=seq - 1)
+        self._task = asyncio.ensure_future(self._run(seq, run, on_result, debounce))
+        return await asyncio.shield(future)
+
+    async def _run(self, seq: int, run, on_result, debounce: float):
+        try:
+            if debounce > 0:
+                await asyncio.sleep(debounce)
+            result = await run()
+        except asyncio.CancelledError:
+            if self._task is asyncio.current_task():
+                # Cancelled from outside rather than superseded: nothing will answer
+                for _, future in self._waiters:
+                    future.cancel()
+                self._waiters = []
+            raise
+        except Exception as e:
+            self._resolve(seq, error=e)
+        else:
+            if seq > self._applied:
+                self._applied = seq
+                if on_result is not None:
+                    on_result(result)
+            self._resolve(seq, result=result)
+        finally:
+            idle = not self._waiters and self._task is asyncio.current_task()
+            if idle and _sessions.get(self.prediction_id) is self:
+                del _sessions[self.prediction_id]
+
+    def _resolve(self, seq: int, result: dict | None = None, error: Exception | None = None):
+        """Settle every waiter up to `seq`; later requests keep waiting for their own run."""
+        pending = []
+        for waiter_seq, future in self._waiters:
+            if waiter_seq > seq:
+                pending.append((waiter_seq, future))
+            elif not future.done():
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result if waiter_seq == seq else {**result, "superseded": True})
+        self._waiters = pending
+
+
+def get_rerun_session(prediction_id: str) -> RerunSession:
+    session = _sessions.get(prediction_id)
+    if session is None:
+        session = _sessions[prediction_id] = RerunSession(prediction_id)
+    return session
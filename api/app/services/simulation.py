@@ -0,0 +1,86 @@
+"""
+Sparse stance propagation for the simulation stage.
+
+The social network is turned once into a CSR adjacency (both directions of
+every edge) whose weights are pre-divided by each agent's total edge weight,
+so a tick is one sparse matrix-vector product:
+
+    neighbour[i] = sum_j w[i, j] * stance[j] / max(sum_j w[i, j], 0.01)
+    stance       = 0.7 * stance + 0.3 * neighbour     (agents with neighbours)
+    stance      += uniform(-0.3, 0.3) for a random 2% of agents
+    stance       = clip(stance, -1, 1)
+
+All agents update together from the previous tick's stances. The CSR product
+uses np.add.reduceat over the non-empty rows, so no scipy is needed. Noise
+comes from a seeded numpy Generator and the population is never modified.
+"""
+
+import numpy as np
+
+from app.services.population import Population
+
+SELF_WEIGHT = 0.7
+NOISE_RATE = 0.02
+NOISE_SCALE = 0.3
+MIN_WEIGHT_SUM = 0.01
+
+
+class StanceSimulation:
+    """Runs ticks of stance propagation over one population; `stance` holds the current state."""
+
+    def __init__(self, population: Population, seed: int | None = None):
+        n = len(population)
+        self.rng = np.random.default_rng(seed)
+        self.stance = population.agents["stance"].astype(np.float32)  # a copy
+
+        source, target, weight = (population.edges[c] for c in ("source", "target", "weight"))
+        rows = np.concatenate([source, target])
+        order = np.argsort(rows, kind="stable")
+        counts = np.bincount(rows, minlength=n)
+        row_sums = np.bincount(rows, weights=np.concatenate([weight, weight]), minlength=n)
+
+        self.indices = np.concatenate([target, source])[order]
+        self.indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.indptr[1:])
+        scale = (1 / np.maximum(row_sums, MIN_WEIGHT_SUM)).astype(np.float32)
+        self.data = np.concatenate([weight, weight])[order] * np.repeat(scale, counts)
+
+        self.has_neighbors = counts > 0
+        # reduceat over the starts of non-empty rows sums exactly those rows
+        self._row_starts = self.indptr[:-1][self.has_neighbors]
+
+    def neighbor_influence(self) -> np.ndarray:
+        """Weighted mean neighbour stance of each agent with neighbours (CSR matrix-vector product)."""
+        if not len(self.indices):
+            return np.empty(0, dtype=np.float32)
+        return np.add.reduceat(self.data * self.stance[self.indices], self._row_starts)
+
+    def step(self):
+        influence = self.neighbor_influence()
+        linked = self.stance[self.has_neighbors]
+        self.stance[self.has_neighbors] = SELF_WEIGHT * linked + (1 - SELF_WEIGHT) * influence
+
+        noisy = np.flatnonzero(self.rng.random(len(self.stance), dtype=np.float32) < NOISE_RATE)
+        self.stance[noisy] += self.rng.uniform(-NOISE_SCALE, NOISE_SCALE, len(noisy)).astype(np.float32)
+        np.clip(self.stance, -1, 1, out=self.stance)
+
+    def run(self, ticks: int) -> dict:
+        """Advance `ticks` ticks; same output as stage_simulation.
+
+        `final_stance` is every agent's stance after the last tick, by agent id.
+        """
+        n = len(self.stance)
+        tick_data = []
+        for t in range(ticks):
+            self.step()
+            avg_stance = float(self.stance.mean(dtype=np.float64)) if n else 0.0
+            gov_pct = float(np.count_nonzero(self.stance > 0) / n) if n else 0.0
+            tick_data.append({"tick": t, "avg_stance": round(avg_stance, 4), "gov_support": round(gov_pct, 4)})
+
+        gov_support = tick_data[-1]["gov_support"] if tick_data else 0.5
+        return {
+            "ticks": tick_data,
+            "final_distribution": {"government_support": gov_support, "opposition_support": 1 - gov_support},
+            "agent_count": n,
+            "final_stance": self.stance.copy(),
+        }
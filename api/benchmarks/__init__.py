@@ -0,0 +1 @@
+"""Offline micro-benchmarks. Run from api/: python -m benchmarks.<name>"""
@@ -0,0 +1,85 @@
+"""
+Cache serialization benchmark: stdlib JSON text (the old cache_set format)
+versus CacheCodec, on a real run_prediction_pipeline result.
+
+The pipeline runs against the offline ReplayBackend, so no API keys are needed:
+
+    python -m benchmarks.bench_cache_codec [--repeat 200]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import structlog
+
+from app.core.cache_codec import CacheCodec, orjson
+from app.core.llm import set_llm_backend
+from app.core.llm_backends import ReplayBackend
+from app.services.prediction_pipeline import run_prediction_pipeline
+
+QUERY = "Who will win the 2026 Malaysian General Election?"
+
+
+async def _pipeline_result() -> dict:
+    set_llm_backend(ReplayBackend(seed=7))
+    try:
+        return await run_prediction_pipeline("bench-codec", QUERY)
+    finally:
+        set_llm_backend(None)
+
+
+def _time(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def _bench(label: str, value, repeat: int):
+    rows = []
+
+    text = json.dumps(value, default=str)
+    rows.append((
+        "json text (old)",
+        len(text.encode()),
+        _time(lambda: json.dumps(value, default=str), repeat),
+        _time(lambda: json.loads(text), repeat),
+    ))
+    for name, codec in [
+        ("codec, no compression", CacheCodec(compress_threshold=0)),
+        ("codec, zlib >= 1 KiB", CacheCodec(compress_threshold=1024, compress_level=1)),
+        ("codec, zlib level 6", CacheCodec(compress_threshold=1024, compress_level=6)),
+    ]:
+        payload = codec.encode(value)
+        assert codec.decode(payload) == json.loads(text)
+        rows.append((
+            name,
+            len(payload),
+            _time(lambda c=codec: c.encode(value), repeat),
+            _time(lambda c=codec, p=payload: c.decode(p), repeat),
+        ))
+
+    print(f"\n{label}")
+    print(f"{'format':<24}{'bytes':>10}{'encode µs':>12}{'decode µs':>12}")
+    base = rows[0][1]
+    for name, size, enc, dec in rows:
+        print(f"{name:<24}{size:>10}{enc:>12.1f}{dec:>12.1f}   ({size / base:.0%} of json)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(40))
+    result = asyncio.run(_pipeline_result())
+
+    print(f"JSON backend: {'orjson' if orjson is not None else 'stdlib json'}")
+    _bench("run_prediction_pipeline result", result, args.repeat)
+    _bench("batch of 20 results", [result] * 20, max(1, args.repeat // 10))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Population synthesis benchmark: the previous per-agent dict synthesizer versus
+the vectorized synthesize_population, in time and memory per agent.
+
+    python -m benchmarks.bench_population [--agents 1000000] [--window 40]
+
+The old synthesizer is only run up to --legacy-max agents; beyond that it is
+too slow to be worth waiting for.
+"""
+
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+
+from app.services.population import NETWORK_WINDOW, synthesize_population
+from app.services.prediction_pipeline import MALAYSIA_SAMPLE_DATA
+
+CENSUS = MALAYSIA_SAMPLE_DATA["census"]
+
+
+def legacy_synthesize(census: dict, agent_count: int) -> dict:
+    """stage_pop_synthesizer as it was before vectorizing, for comparison."""
+    agents = []
+    ethnicities = ["Malay", "Chinese", "Indian", "Others"]
+    ethnic_weights = [0.62, 0.21, 0.06, 0.11]
+    regions = census["regions"]
+    for i in range(agent_count):
+        agents.append({
+            "id": i,
+            "age": random.randint(21, 75),
+            "ethnicity": random.choices(ethnicities, weights=ethnic_weights, k=1)[0],
+            "region": random.choice(regions),
+            "income": random.choice(["low", "medium", "high"]),
+            "education": random.choice(["secondary", "tertiary", "postgraduate"]),
+            "urban": random.random() < census["urban_ratio"],
+            "stance": random.uniform(-1, 1),
+            "influence": random.uniform(0.1, 1.0),
+        })
+    edges = []
+    for i in range(agent_count):
+        for j in range(i + 1, min(i + 10, agent_count)):
+            same_region = agents[i]["region"] == agents[j]["region"]
+            same_ethnicity = agents[i]["ethnicity"] == agents[j]["ethnicity"]
+            prob = 0.05 + (0.15 if same_region else 0) + (0.1 if same_ethnicity else 0)
+            if random.random() < prob:
+                edges.append({"source": i, "target": j, "weight": random.uniform(0.3, 1.0)})
+    return {"agents": agents, "network": {"edges": edges}}
+
+
+def _measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    value = fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return value, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--agents", type=int, default=1_000_000)
+    parser.add_argument("--window", type=int, default=40, help=f"network window (pipeline uses {NETWORK_WINDOW})")
+    parser.add_argument("--legacy-max", type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(f"{'synthesizer':<14}{'agents':>10}{'edges':>11}{'seconds':>10}{'peak MiB':>10}{'B/agent':>9}")
+    sizes = sorted({n for n in (10_000, args.legacy_max, args.agents) if n <= args.agents})
+    for n in sizes:
+        if n <= args.legacy_max:
+            pop, elapsed, peak = _measure(lambda: legacy_synthesize(CENSUS, n))
+            edges = len(pop["network"]["edges"])
+            print(f"{'dicts (old)':<14}{n:>10}{edges:>11}{elapsed:>10.2f}{peak / 2**20:>10.1f}{peak / n:>9.0f}")
+            del pop
+        pop, elapsed, peak = _measure(lambda: synthesize_population(CENSUS, n, seed=0, window=args.window))
+        print(f"{'vectorized':<14}{n:>10}{pop.edge_count:>11}{elapsed:>10.2f}{peak / 2**20:>10.1f}{peak / n:>9.0f}")
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
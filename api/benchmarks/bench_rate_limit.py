@@ -0,0 +1,93 @@
+"""
+Rate-limit middleware benchmark: the previous BaseHTTPMiddleware implementation
+versus the pure ASGI RateLimitMiddleware, driving the ASGI app in-process (no
+sockets) so the numbers isolate middleware overhead.
+
+    python -m benchmarks.bench_rate_limit [--requests 5000]
+"""
+
+import argparse
+import asyncio
+import time
+
+import structlog
+from fastapi import FastAPI, HTTPException, Request
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.core.config import settings
+from app.core.rate_limit import LocalRateLimiter, route_cost
+from app.core.security import RateLimitMiddleware
+from app.routers import health, predictions
+
+PATHS = ["/health", "/api/v1/predictions/trending"]
+CLIENT = ("10.1.2.3", 5000)
+
+
+class BaseHTTPRateLimitMiddleware(BaseHTTPMiddleware):
+    """The limiter as it was before moving to raw ASGI, for comparison."""
+
+    def __init__(self, app, max_requests: int = 60, window: int = 60):
+        super().__init__(app)
+        self.limiter = LocalRateLimiter(limit=max_requests, window=window)
+
+    async def dispatch(self, request: Request, call_next):
+        ip = request.client.host if request.client else "unknown"
+        if ip in ("testclient", "127.0.0.1", "localhost") or request.url.path == "/health":
+            return await call_next(request)
+        if not self.limiter.hit(ip, route_cost({}, request.method, request.url.path)).allowed:
+            raise HTTPException(status_code=429, detail="Rate limit exceeded")
+        return await call_next(request)
+
+
+def _build(middleware) -> FastAPI:
+    app = FastAPI()
+    app.include_router(health.router)
+    app.include_router(predictions.router)
+    if middleware is not None:
+        app.add_middleware(middleware, max_requests=10**9, window=60)
+    return app
+
+
+async def _drive(app: FastAPI, path: str, n: int) -> float:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "root_path": "", "query_string": b"", "headers": [(b"host", b"bench")],
+        "client": CLIENT, "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            assert message["status"] == 200, message
+
+    for _ in range(min(n, 200)):  # warm-up
+        await app(dict(scope), receive, send)
+    start = time.perf_counter()
+    for _ in range(n):
+        await app(dict(scope), receive, send)
+    return n / (time.perf_counter() - start)
+
+
+async def main(n: int):
+    settings.rate_limit_redis = False
+    variants = [
+        ("no middleware", None),
+        ("BaseHTTPMiddleware (before)", BaseHTTPRateLimitMiddleware),
+        ("pure ASGI (after)", RateLimitMiddleware),
+    ]
+    print(f"{'middleware':<30}" + "".join(f"{p:>32}" for p in PATHS))
+    for label, middleware in variants:
+        app = _build(middleware)
+        rates = [await _drive(app, path, n) for path in PATHS]
+        print(f"{label:<30}" + "".join(f"{r:>26,.0f} req/s" for r in rates))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(40))
+    asyncio.run(main(args.requests))
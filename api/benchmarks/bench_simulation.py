@@ -0,0 +1,73 @@
+"""
+Simulation benchmark: the previous per-agent Python loop versus the sparse
+StanceSimulation, for 30 ticks over populations from synthesize_population.
+
+    python -m benchmarks.bench_simulation [--agents 1000000] [--ticks 30]
+
+The old loop is only run up to --legacy-max agents.
+"""
+
+import argparse
+import random
+import sys
+import time
+
+from app.services.population import synthesize_population
+from app.services.prediction_pipeline import MALAYSIA_SAMPLE_DATA
+from app.services.simulation import StanceSimulation
+
+CENSUS = MALAYSIA_SAMPLE_DATA["census"]
+
+
+def legacy_simulate(agents: list[dict], edges: list[dict], ticks: int) -> dict:
+    """stage_simulation as it was before the sparse engine, for comparison."""
+    adj: dict[int, list[tuple[int, float]]] = {a["id"]: [] for a in agents}
+    for e in edges:
+        adj[e["source"]].append((e["target"], e["weight"]))
+        adj[e["target"]].append((e["source"], e["weight"]))
+
+    tick_data = []
+    for t in range(ticks):
+        for agent in agents:
+            neighbors = adj.get(agent["id"], [])
+            if neighbors:
+                neighbor_influence = sum(
+                    agents[nid]["stance"] * w for nid, w in neighbors
+                ) / max(sum(w for _, w in neighbors), 0.01)
+                agent["stance"] = 0.7 * agent["stance"] + 0.3 * neighbor_influence
+            if random.random() < 0.02:
+                agent["stance"] += random.uniform(-0.3, 0.3)
+            agent["stance"] = max(-1, min(1, agent["stance"]))
+        gov_pct = sum(1 for a in agents if a["stance"] > 0) / len(agents)
+        tick_data.append({"tick": t, "gov_support": round(gov_pct, 4)})
+    return {"ticks": tick_data}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--agents", type=int, default=1_000_000)
+    parser.add_argument("--ticks", type=int, default=30)
+    parser.add_argument("--legacy-max", type=int, default=10_000)
+    args = parser.parse_args()
+
+    print(f"{'engine':<14}{'agents':>10}{'edges':>10}{'build s':>10}{'run s':>10}{'ms/tick':>10}")
+    sizes = sorted({n for n in (1_000, args.legacy_max, 100_000, args.agents) if n <= args.agents})
+    for n in sizes:
+        pop = synthesize_population(CENSUS, n, seed=0)
+        if n <= args.legacy_max:
+            agents, edges = pop.agent_records(), pop.edge_records()
+            start = time.perf_counter()
+            legacy_simulate(agents, edges, args.ticks)
+            elapsed = time.perf_counter() - start
+            print(f"{'loop (old)':<14}{n:>10}{pop.edge_count:>10}{0:>10.2f}{elapsed:>10.2f}{elapsed / args.ticks * 1e3:>10.1f}")
+        start = time.perf_counter()
+        sim = StanceSimulation(pop, seed=0)
+        built = time.perf_counter()
+        sim.run(args.ticks)
+        elapsed = time.perf_counter() - built
+        print(f"{'sparse':<14}{n:>10}{pop.edge_count:>10}{built - start:>10.2f}{elapsed:>10.2f}{elapsed / args.ticks * 1e3:>10.1f}")
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
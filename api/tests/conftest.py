@@ -1,12 +1,18 @@
 """Shared test fixtures for FutureOS API tests."""
 
+from unittest.mock import AsyncMock
+
 import pytest
 from httpx import ASGITransport, AsyncClient
 from jose import jwt
 
-from app.main import app
+from app.core.auth import clear_token_cache
+from app.core.cache import reset_cache_state
 from app.core.config import settings
-
+from app.core.llm import reset_llm_state
+from app.main import app
+from app.services.checkpoints import reset_checkpoint_state
+from app.services.jobs import reset_job_state
 
 TEST_USER_ID = "test-user-001"
 TEST_USER_EMAIL = "test@futureos.app"
@@ -38,6 +44,36 @@ def make_auth_headers(
     return {"Authorization": f"Bearer {token}"}
 
 
+@pytest.fixture(autouse=True)
+def _isolate_llm_state(monkeypatch):
+    """Keep cached responses, learned limits and latencies from leaking between tests."""
+    monkeypatch.setattr(settings, "llm_cache_enabled", False)
+    reset_llm_state()
+    yield
+    reset_llm_state()
+
+
+@pytest.fixture(autouse=True)
+def _isolate_cache(monkeypatch):
+    """Run every test against empty in-process caches, never a live Redis."""
+    monkeypatch.setattr("app.core.cache.get_redis", AsyncMock(return_value=None))
+    reset_cache_state()
+    clear_token_cache()
+    yield
+    reset_cache_state()
+    clear_token_cache()
+
+
+@pytest.fixture(autouse=True)
+def _isolate_jobs():
+    """Give every test a fresh in-memory job queue, no running worker and no checkpoints."""
+    reset_job_state()
+    reset_checkpoint_state()
+    yield
+    reset_job_state()
+    reset_checkpoint_state()
+
+
 @pytest.fixture
 async def client():
     """Async test client for FastAPI app."""
@@ -1,9 +1,13 @@
+import time
+from unittest.mock import patch
+
 import pytest
 from httpx import ASGITransport, AsyncClient
-from jose import jwt
+from jose import JWTError, jwt
 
-from app.main import app
+from app.core.auth import decode_token, get_current_user, get_token_cache_stats
 from app.core.config import settings
+from app.main import app
 
 
 @pytest.fixture
@@ -30,3 +34,67 @@ async def test_auth_missing_token(client: AsyncClient):
     """Endpoints requiring auth should return 401 without token."""
     response = await client.post("/api/v1/predictions/create", json={"query": "test"})
     assert response.status_code == 401
+
+
+class TestVerifiedTokenCache:
+    """decode_token skips re-verification for tokens it has already verified."""
+
+    @pytest.fixture(autouse=True)
+    def _secret(self, monkeypatch):
+        monkeypatch.setattr(settings, "supabase_anon_key", "cache-secret")
+
+    def _token(self, sub: str = "u1", exp: int | None = None) -> str:
+        payload = {"sub": sub, "aud": "authenticated", "role": "authenticated"}
+        if exp is not None:
+            payload["exp"] = exp
+        return jwt.encode(payload, "cache-secret", algorithm="HS256")
+
+    def test_repeat_decode_is_cached(self):
+        token = self._token(exp=int(time.time()) + 600)
+        with patch("app.core.auth.jwt.decode", wraps=jwt.decode) as spy:
+            assert decode_token(token)["sub"] == "u1"
+            assert decode_token(token)["sub"] == "u1"
+        assert spy.call_count == 1
+        stats = get_token_cache_stats()
+        assert stats["hits"] == 1 and stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    def test_entry_expires_with_token(self):
+        exp = int(time.time()) + 60
+        token = self._token(exp=exp)
+        decode_token(token)
+        with patch("app.core.auth.time.time", return_value=exp + 1), \
+             patch("app.core.auth.jwt.decode", side_effect=JWTError("Signature has expired")) as verify:
+            with pytest.raises(JWTError):
+                decode_token(token)
+        verify.assert_called_once()
+
+    def test_invalid_tokens_not_cached(self):
+        bad = jwt.encode({"sub": "x", "aud": "authenticated"}, "other", algorithm="HS256")
+        for _ in range(2):
+            with pytest.raises(JWTError):
+                decode_token(bad)
+        assert get_token_cache_stats()["entries"] == 0
+
+    def test_secret_rotation_drops_cache(self, monkeypatch):
+        token = self._token()
+        decode_token(token)
+        monkeypatch.setattr(settings, "supabase_anon_key", "rotated")
+        with pytest.raises(JWTError):
+            decode_token(token)
+
+    def test_bounded(self, monkeypatch):
+        monkeypatch.setattr(settings, "auth_token_cache_size", 3)
+        for i in range(5):
+            decode_token(self._token(sub=f"u{i}"))
+        stats = get_token_cache_stats()
+        assert stats["entries"] == 3
+        assert stats["evictions"] == 2
+
+    @pytest.mark.asyncio
+    async def test_get_current_user_uses_cache(self):
+        token = self._token(sub="studio-user", exp=int(time.time()) + 600)
+        for _ in range(3):
+            user = await get_current_user(token)
+        assert user["id"] == "studio-user"
+        assert get_token_cache_stats()["hits"] == 2
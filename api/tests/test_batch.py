@@ -0,0 +1,102 @@
+"""Verify batch submission, shared per-region data collection and batch priority."""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.core import llm
+from app.core.auth import get_current_user
+from app.core.config import settings
+from app.core.llm import Priority, set_llm_backend
+from app.core.llm_backends import ReplayBackend
+from app.main import app
+from app.services import prediction_pipeline
+
+QUERIES = [
+    "2026 Malaysian General Election outcome?",
+    "Will PH keep Selangor in 2026?",
+    "Youth turnout in Malaysia's next election?",
+]
+
+
+@pytest.fixture
+async def api():
+    app.dependency_overrides[get_current_user] = lambda: {"id": "batch-user"}
+    set_llm_backend(ReplayBackend())
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+    set_llm_backend(None)
+    app.dependency_overrides.pop(get_current_user, None)
+
+
+async def _wait_batch(api, batch_id, timeout=30.0):
+    for _ in range(int(timeout / 0.02)):
+        batch = (await api.get(f"/api/v1/predictions/batch/{batch_id}")).json()
+        if batch["status"] == "completed":
+            return batch
+        await asyncio.sleep(0.02)
+    raise AssertionError("batch did not finish")
+
+
+@pytest.mark.asyncio
+async def test_batch_runs_every_item(api):
+    resp = await api.post("/api/v1/predictions/batch", json={"queries": QUERIES + [QUERIES[0]]})
+    assert resp.status_code == 200
+    batch = resp.json()
+    assert [item["query"] for item in batch["items"]] == QUERIES + [QUERIES[0]]
+    # The repeated query joins the first one's run
+    assert batch["items"][3]["reused_from"] == batch["items"][0]["prediction_id"]
+
+    done = await _wait_batch(api, batch["id"])
+    assert done["counts"] == {"completed": 4}
+    for item in done["items"]:
+        result = await api.get(f"/api/v1/predictions/{item['prediction_id']}/result")
+        assert result.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_items_share_data_collection(api):
+    calls = []
+    original = prediction_pipeline.stage_data_sources
+
+    async def counting(task):
+        calls.append(task.get("region"))
+        return await original(task)
+
+    with patch("app.services.prediction_pipeline.stage_data_sources", counting):
+        batch = (await api.post("/api/v1/predictions/batch", json={"queries": QUERIES, "force_fresh": True})).json()
+        done = await _wait_batch(api, batch["id"])
+    assert done["counts"] == {"completed": 3}
+    assert all(item["reused_from"] is None for item in done["items"])
+    # One region across the batch: collected once
+    assert len(calls) == 1
+    for item in done["items"]:
+        metadata = (await api.get(f"/api/v1/predictions/{item['prediction_id']}/result")).json()["metadata"]
+        assert metadata["resumed_stages"] == []
+        assert {"intent", "data"} <= set(metadata["stage_timings"])
+
+
+@pytest.mark.asyncio
+async def test_batch_llm_calls_run_at_batch_priority(api):
+    seen = []
+    original = prediction_pipeline.stage_intent_parse
+
+    async def recording(query):
+        seen.append(llm._current_priority("intent_parse"))
+        return await original(query)
+
+    with patch("app.services.prediction_pipeline.stage_intent_parse", recording):
+        batch = (await api.post("/api/v1/predictions/batch", json={"queries": QUERIES[:1], "force_fresh": True})).json()
+        await _wait_batch(api, batch["id"])
+    assert seen == [Priority.BATCH]
+
+
+@pytest.mark.asyncio
+async def test_batch_limits(api, monkeypatch):
+    monkeypatch.setattr(settings, "batch_max_items", 2)
+    assert (await api.post("/api/v1/predictions/batch", json={"queries": QUERIES})).status_code == 422
+    assert (await api.post("/api/v1/predictions/batch", json={"queries": []})).status_code == 422
+    assert (await api.post("/api/v1/predictions/batch", json={"queries": ["ab"]})).status_code == 422
+    assert (await api.get("/api/v1/predictions/batch/missing")).status_code == 404
@@ -1,7 +1,31 @@
 """Verify Redis cache layer — graceful degradation when Redis unavailable."""
 
+import asyncio
+import json
+import time
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
 import pytest
-from app.core.cache import cache_set, cache_get, cache_delete, make_cache_key
+
+import app.core.cache as cache_module
+import app.core.cache_codec as cache_codec
+from app.core.cache import (
+    cache_delete,
+    cache_delete_many,
+    cache_get,
+    cache_get_many,
+    cache_get_or_set,
+    cache_set,
+    cache_set_many,
+    cached,
+    get_cache_stats,
+    get_redis,
+    invalidate_tag,
+    make_cache_key,
+)
+from app.core.cache_codec import FORMAT_JSON, FORMAT_JSON_ZLIB, CacheCodec
+from app.core.config import settings
 
 
 class TestCacheGraceful:
@@ -48,3 +72,411 @@ class TestCacheGraceful:
             assert result == {"hello": "world"}
             # Cleanup
             await cache_delete("roundtrip_test")
+
+
+class TestLocalTier:
+    """L1 serves reads without Redis and keeps per-prefix counters."""
+
+    @pytest.mark.asyncio
+    async def test_l1_roundtrip_without_redis(self):
+        await cache_set("wb:gdp", {"value": 4.2}, ttl=60)
+        assert await cache_get("wb:gdp") == {"value": 4.2}
+        await cache_delete("wb:gdp")
+        assert await cache_get("wb:gdp") is None
+
+    @pytest.mark.asyncio
+    async def test_l1_is_bounded(self, monkeypatch):
+        monkeypatch.setattr(settings, "cache_l1_max_entries", 3)
+        for i in range(5):
+            await cache_set(f"k:{i}", i, ttl=60)
+        assert await cache_get("k:0") is None
+        assert await cache_get("k:4") == 4
+        assert get_cache_stats()["l1_entries"] == 3
+
+    @pytest.mark.asyncio
+    async def test_l1_expires(self):
+        await cache_set("short:x", "v", ttl=60)
+        with patch("app.core.cache.time.time", return_value=time.time() + 61):
+            assert await cache_get("short:x") is None
+
+    @pytest.mark.asyncio
+    async def test_counters_grouped_by_prefix(self):
+        await cache_set(make_cache_key("worldbank", "MYS"), 1)
+        await cache_get(make_cache_key("worldbank", "MYS"))
+        await cache_get(make_cache_key("worldbank", "USA"))
+        await cache_get(make_cache_key("news", "MY"))
+        prefixes = get_cache_stats()["prefixes"]
+        assert prefixes["worldbank"]["l1_hits"] == 1
+        assert prefixes["worldbank"]["misses"] == 1
+        assert prefixes["worldbank"]["hit_rate"] == 0.5
+        assert prefixes["news"]["misses"] == 1
+
+    def test_key_carries_prefix(self):
+        assert make_cache_key("worldbank", "MYS", "gdp").startswith("worldbank:")
+
+
+class TestReconnect:
+    """A failed connection is retried after a backoff instead of disabling Redis forever."""
+
+    @pytest.mark.asyncio
+    async def test_retries_after_backoff(self, monkeypatch):
+        monkeypatch.setattr(cache_module, "_redis", None)
+        monkeypatch.setattr(cache_module, "_redis_retry_at", 0.0)
+        monkeypatch.setattr(cache_module, "_redis_failures", 0)
+        down = MagicMock()
+        down.ping = AsyncMock(side_effect=ConnectionError("refused"))
+        up = MagicMock()
+        up.ping = AsyncMock(return_value=True)
+
+        with patch("app.core.cache.redis.from_url", side_effect=[down, up]) as from_url:
+            assert await get_redis() is None
+            # Inside the backoff window no new connection is attempted
+            assert await get_redis() is None
+            assert from_url.call_count == 1
+            monkeypatch.setattr(cache_module, "_redis_retry_at", 0.0)
+            assert await get_redis() is up
+        assert cache_module._redis_failures == 0
+        monkeypatch.setattr(cache_module, "_redis", None)
+
+
+class TestGetOrSet:
+    """Stampede protection: one loader per key, early refresh before expiry."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_load_once(self):
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.02)
+            return {"rows": 3}
+
+        results = await asyncio.gather(*(cache_get_or_set("lb:top", loader, ttl=60) for _ in range(10)))
+        assert calls == 1
+        assert all(r == {"rows": 3} for r in results)
+        assert await cache_get_or_set("lb:top", loader, ttl=60) == {"rows": 3}
+        assert calls == 1
+
+    @pytest.mark.asyncio
+    async def test_late_caller_queues_behind_waiters(self):
+        """The key's lock outlives its holder while others still wait on it."""
+        running = peak = 0
+
+        async def loader():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.05)
+            running -= 1
+            return None
+
+        def call():
+            # Uncached results make every waiter load in turn
+            return cache_get_or_set("lb:uncached", loader, ttl=60, cache_if=lambda v: False)
+
+        first = [asyncio.ensure_future(call()) for _ in range(3)]
+        await asyncio.sleep(0.07)  # the first load is done, a waiter is loading
+        await asyncio.gather(*first, call())
+        assert peak == 1
+        assert cache_module._refresh_locks == {}
+
+    @pytest.mark.asyncio
+    async def test_callers_cannot_mutate_cached_values(self):
+        async def loader():
+            return {"rows": [1, 2]}
+
+        value = await cache_get_or_set("lb:mut", loader, ttl=60)
+        value["rows"].append(3)
+        again = await cache_get_or_set("lb:mut", loader, ttl=60)
+        again["rows"].append(4)
+        assert await cache_get_or_set("lb:mut", loader, ttl=60) == {"rows": [1, 2]}
+
+        stored = {"a": [1]}
+        await cache_set("plain:k", stored)
+        stored["a"].append(2)
+        (await cache_get("plain:k"))["a"].append(3)
+        assert await cache_get("plain:k") == {"a": [1]}
+
+    @pytest.mark.asyncio
+    async def test_early_refresh_near_expiry(self):
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return calls
+
+        assert await cache_get_or_set("slow:k", loader, ttl=60) == 1
+        # A second before expiry with a huge beta, XFetch always refreshes
+        with patch("app.core.cache.time.time", return_value=time.time() + 59):
+            assert await cache_get_or_set("slow:k", loader, ttl=60, beta=1e6) == 2
+
+    @pytest.mark.asyncio
+    async def test_stale_value_served_while_refreshing(self):
+        release = asyncio.Event()
+
+        async def slow_loader():
+            await release.wait()
+            return "new"
+
+        async def first():
+            await asyncio.sleep(0.01)
+            return "old"
+
+        await cache_get_or_set("feed:k", first, ttl=60)
+        with patch("app.core.cache.time.time", return_value=time.time() + 59):
+            refresher = asyncio.create_task(cache_get_or_set("feed:k", slow_loader, ttl=60, beta=1e6))
+            await asyncio.sleep(0.01)
+            assert await cache_get_or_set("feed:k", slow_loader, ttl=60, beta=1e6) == "old"
+            release.set()
+            assert await refresher == "new"
+
+
+@pytest.mark.asyncio
+async def test_admin_cache_endpoint(client):
+    resp = await client.get("/api/v1/admin/cache")
+    assert resp.status_code == 200
+    assert {"redis", "l1_entries", "prefixes"} <= resp.json().keys()
+
+
+class TestCachedDecorator:
+    """@cached derives keys from arguments and supports tag invalidation."""
+
+    @pytest.mark.asyncio
+    async def test_keys_follow_arguments(self):
+        calls = []
+
+        @cached("demo", ttl=60)
+        async def fetch(country: str, years: int = 5):
+            calls.append((country, years))
+            return [country, years]
+
+        assert await fetch("MYS") == ["MYS", 5]
+        assert await fetch("MYS", years=5) == ["MYS", 5]
+        assert await fetch(country="MYS") == ["MYS", 5]
+        assert await fetch("USA") == ["USA", 5]
+        assert calls == [("MYS", 5), ("USA", 5)]
+        assert fetch.cache_key("MYS").startswith("demo:")
+
+        await fetch.invalidate("MYS")
+        await fetch("MYS")
+        assert len(calls) == 3
+
+    @pytest.mark.asyncio
+    async def test_tag_invalidation(self):
+        calls = 0
+
+        @cached("signal", ttl=60, tags=("market:{market_id}",))
+        async def signal(market_id: str):
+            nonlocal calls
+            calls += 1
+            return {"market": market_id, "n": calls}
+
+        await signal("a")
+        await signal("b")
+        assert (await signal("a"))["n"] == 1
+
+        assert await invalidate_tag("market:a") == 1
+        assert (await signal("a"))["n"] == 3
+        assert (await signal("b"))["n"] == 2
+
+    @pytest.mark.asyncio
+    async def test_cache_if_skips_failures(self):
+        calls = 0
+
+        @cached("flaky", ttl=60, cache_if=bool)
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            return [] if calls == 1 else [1]
+
+        assert await fetch() == []
+        assert await fetch() == [1]
+        assert await fetch() == [1]
+        assert calls == 2
+
+
+    @pytest.mark.asyncio
+    async def test_local_only_never_reaches_redis(self, monkeypatch):
+        fake = _FakeRedis()
+        redis = AsyncMock(return_value=fake)
+        monkeypatch.setattr(cache_module, "get_redis", redis)
+        calls = 0
+
+        @cached("percpu", ttl=60, tags=("market:{market_id}",), local_only=True)
+        async def signal(market_id: str):
+            nonlocal calls
+            calls += 1
+            return {"n": calls}
+
+        assert await signal("m1") == {"n": 1}
+        assert await signal("m1") == {"n": 1}
+        assert redis.await_count == 0 and fake.data == {}
+        await invalidate_tag("market:m1")
+        assert await signal("m1") == {"n": 2}
+
+
+class TestCachedServices:
+    """Service functions wired to the cache invalidate on writes."""
+
+    @pytest.mark.asyncio
+    async def test_bet_invalidates_crowd_signal(self, client):
+        from app.core.auth import get_current_user
+        from app.main import app
+
+        app.dependency_overrides[get_current_user] = lambda: {"id": "cache-user", "email": "c@test.com"}
+        try:
+            market = (await client.post("/api/v1/exchange/markets", json={"title": "Cache test market"})).json()
+            signals_url = f"/api/v1/exchange/markets/{market['id']}/signals"
+            before = (await client.get(signals_url)).json()
+            await client.post(
+                f"/api/v1/exchange/markets/{market['id']}/positions",
+                json={"outcome_name": "Yes", "amount": 10},
+            )
+            after = (await client.get(signals_url)).json()
+        finally:
+            app.dependency_overrides.pop(get_current_user, None)
+        assert before["crowd"] != after["crowd"]
+        assert after["crowd"]["outcomes"] == [{"name": "Yes", "probability": 1.0}]
+
+
+    @pytest.mark.asyncio
+    async def test_crowd_signal_does_not_alias_market(self):
+        from app.routers.exchange import _compute_crowd_signal, _markets
+
+        _markets["alias-market"] = {"ai_signal": {"outcomes": [{"name": "Yes", "probability": 0.7}]}}
+        try:
+            signal = await _compute_crowd_signal("alias-market")
+            signal["outcomes"][0]["probability"] = 0.0
+            assert _markets["alias-market"]["ai_signal"]["outcomes"][0]["probability"] == 0.7
+            assert (await _compute_crowd_signal("alias-market"))["outcomes"][0]["probability"] == 0.7
+        finally:
+            del _markets["alias-market"]
+
+
+class TestCodec:
+    """Versioned binary encoding with compression above a threshold."""
+
+    VALUE = {"outcomes": [{"name": "PH", "probability": 0.41}], "graph": {"edges": list(range(500))}, "n": None}
+
+    def test_roundtrip_small_uncompressed(self):
+        codec = CacheCodec(compress_threshold=1024)
+        payload = codec.encode({"a": 1})
+        assert payload[0] == FORMAT_JSON
+        assert codec.decode(payload) == {"a": 1}
+
+    def test_large_values_compressed(self):
+        codec = CacheCodec(compress_threshold=256)
+        payload = codec.encode(self.VALUE)
+        assert payload[0] == FORMAT_JSON_ZLIB
+        assert len(payload) < len(json.dumps(self.VALUE))
+        assert codec.decode(payload) == self.VALUE
+
+    def test_reads_pre_codec_json_text(self):
+        codec = CacheCodec()
+        assert codec.decode(json.dumps(self.VALUE).encode()) == self.VALUE
+        assert codec.decode(b'"plain string"') == "plain string"
+
+    def test_unknown_format_rejected(self):
+        with pytest.raises(ValueError):
+            CacheCodec().decode(b"\x07garbage")
+
+    def test_stdlib_fallback_matches(self, monkeypatch):
+        fast = CacheCodec().encode(self.VALUE)
+        monkeypatch.setattr(cache_codec, "orjson", None)
+        slow = CacheCodec()
+        assert slow.decode(fast) == self.VALUE
+        assert slow.decode(slow.encode(self.VALUE)) == self.VALUE
+
+    def test_non_json_types_stringified(self):
+        codec = CacheCodec()
+        assert codec.decode(codec.encode({"when": datetime(2026, 1, 1)}))["when"].startswith("2026-01-01")
+
+
+class _FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.ops = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        def queue(*args):
+            self.ops.append((name, args))
+            return self
+        return queue
+
+    async def execute(self):
+        self.redis.round_trips += 1
+        return [await getattr(self.redis, name)(*args) for name, args in self.ops]
+
+
+class _FakeRedis:
+    """In-memory stand-in for the few commands the cache issues; counts round trips."""
+
+    def __init__(self):
+        self.data: dict[str, bytes] = {}
+        self.round_trips = 0
+
+    def pipeline(self, transaction=False):
+        return _FakePipeline(self)
+
+    async def mget(self, keys):
+        return [self.data.get(k) for k in keys]
+
+    async def pttl(self, key):
+        return 60_000 if key in self.data else -2
+
+    async def setex(self, key, ttl, value):
+        self.data[key] = value
+
+    async def delete(self, *keys):
+        self.round_trips += 1
+        return sum(self.data.pop(k, None) is not None for k in keys)
+
+
+class TestBatch:
+    """Multi-key helpers use one Redis round trip and degrade like the single-key ones."""
+
+    @pytest.mark.asyncio
+    async def test_get_many_without_redis(self):
+        await cache_set_many({"m:1": 1, "m:2": 2}, ttl=60)
+        assert await cache_get_many(["m:1", "m:2", "m:3"]) == {"m:1": 1, "m:2": 2}
+        await cache_delete_many(["m:1", "m:2"])
+        assert await cache_get_many(["m:1", "m:2"]) == {}
+
+    @pytest.mark.asyncio
+    async def test_single_round_trip(self, monkeypatch):
+        fake = _FakeRedis()
+        monkeypatch.setattr(cache_module, "get_redis", AsyncMock(return_value=fake))
+        await cache_set_many({f"mk:{i}": {"id": i} for i in range(20)}, ttl=60)
+        assert fake.round_trips == 1
+
+        cache_module.clear_local_cache()
+        found = await cache_get_many([f"mk:{i}" for i in range(25)])
+        assert fake.round_trips == 2
+        assert len(found) == 20 and found["mk:7"] == {"id": 7}
+        stats = get_cache_stats()["prefixes"]["mk"]
+        assert stats["l2_hits"] == 20 and stats["misses"] == 5
+
+        # Hits were copied into L1, so a repeat read never reaches Redis
+        await cache_get_many([f"mk:{i}" for i in range(20)])
+        assert fake.round_trips == 2
+
+        await cache_delete_many([f"mk:{i}" for i in range(20)])
+        assert fake.round_trips == 3
+        assert fake.data == {}
+
+    @pytest.mark.asyncio
+    async def test_redis_error_degrades(self, monkeypatch):
+        broken = MagicMock()
+        broken.pipeline.side_effect = RuntimeError("boom")
+        monkeypatch.setattr(cache_module, "get_redis", AsyncMock(return_value=broken))
+        assert await cache_get_many(["e:1"]) == {}
+        assert get_cache_stats()["prefixes"]["e"]["errors"] == 1
@@ -0,0 +1,155 @@
+"""Verify stage checkpoints, pipeline resume and checkpoint reuse on rerun."""
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.core.auth import get_current_user
+from app.core.config import settings
+from app.core.llm import set_llm_backend
+from app.core.llm_backends import ReplayBackend
+from app.main import app
+from app.services import checkpoints
+from app.services.checkpoints import (
+    clear_checkpoints,
+    load_checkpoints,
+    save_checkpoint,
+)
+from app.services.pipeline_dag import Stage, run_stages
+from app.services.prediction_pipeline import run_prediction_pipeline
+
+QUERY = "2026 Malaysian General Election outcome?"
+
+
+@pytest.fixture
+def replay():
+    set_llm_backend(ReplayBackend())
+    yield
+    set_llm_backend(None)
+
+
+class TestCheckpointStore:
+    @pytest.mark.asyncio
+    async def test_save_load_clear(self):
+        await save_checkpoint("p1", "intent", {"type": "election"})
+        await save_checkpoint("p1", "data", {"economic": {}})
+        assert await load_checkpoints("p1") == {"intent": {"type": "election"}, "data": {"economic": {}}}
+        assert await load_checkpoints("p2") == {}
+        await clear_checkpoints("p1")
+        assert await load_checkpoints("p1") == {}
+
+    @pytest.mark.asyncio
+    async def test_local_store_is_bounded_by_bytes(self, monkeypatch):
+        size = len(checkpoints._codec.encode({"text": "x" * 100}))
+        monkeypatch.setattr(settings, "pipeline_checkpoint_local_bytes", 2 * size)
+        for pid in ("a", "b", "c"):
+            await save_checkpoint(pid, "intent", {"text": "x" * 100})
+        assert await load_checkpoints("a") == {}
+        assert await load_checkpoints("c") == {"intent": {"text": "x" * 100}}
+        assert checkpoints._local_bytes == 2 * size
+
+        await clear_checkpoints("b")
+        await clear_checkpoints("c")
+        assert checkpoints._local_bytes == 0
+
+    @pytest.mark.asyncio
+    async def test_local_store_does_not_alias_outputs(self):
+        value = {"stance": [0.5]}
+        await save_checkpoint("p-alias", "simulation", value)
+        value["stance"][0] = -1.0
+        assert (await load_checkpoints("p-alias"))["simulation"] == {"stance": [0.5]}
+
+
+class TestStageHooks:
+    @pytest.mark.asyncio
+    async def test_on_finish_skips_timeout_fallbacks(self):
+        import asyncio
+
+        async def slow(results):
+            await asyncio.sleep(1)
+
+        async def fast(results):
+            return 1
+
+        finished = []
+
+        async def on_finish(stage, output):
+            finished.append((stage.name, output))
+
+        await run_stages(
+            [Stage("fast", fast), Stage("slow", slow, timeout=0.02, fallback=lambda r: "fallback")],
+            on_finish=on_finish,
+        )
+        assert finished == [("fast", 1)]
+
+
+class TestPipelineResume:
+    @pytest.mark.asyncio
+    async def test_every_stage_is_checkpointed(self, replay):
+        await run_prediction_pipeline("cp-all", QUERY)
+        saved = await load_checkpoints("cp-all")
+        assert set(saved) == {"intent", "data", "gap_fill", "population", "simulation", "reasoning", "explanation"}
+
+    @pytest.mark.asyncio
+    async def test_resume_skips_completed_stages(self, replay):
+        with patch("app.services.prediction_pipeline.stage_explanation", AsyncMock(side_effect=RuntimeError("crash"))), \
+             patch("app.services.prediction_pipeline._fallback_explanation", side_effect=RuntimeError("crash")):
+            with pytest.raises(RuntimeError):
+                await run_prediction_pipeline("cp-resume", QUERY)
+        saved = await load_checkpoints("cp-resume")
+        assert "reasoning" in saved and "explanation" not in saved
+
+        reasoning = AsyncMock(side_effect=AssertionError("stage 5 must not rerun"))
+        with patch("app.services.prediction_pipeline.stage_three_engine_reasoning", reasoning):
+            result = await run_prediction_pipeline("cp-resume", QUERY)
+        reasoning.assert_not_called()
+        assert result["outcomes"] == saved["reasoning"]["outcomes"]
+        assert set(result["metadata"]["stage_timings"]) == {"explanation"}
+        assert "reasoning" in result["metadata"]["resumed_stages"]
+
+    @pytest.mark.asyncio
+    async def test_resume_can_be_disabled(self, replay):
+        await save_checkpoint("cp-fresh", "intent", {"type": "bogus"})
+        result = await run_prediction_pipeline("cp-fresh", QUERY, resume=False)
+        assert result["task"]["type"] != "bogus"
+        assert result["metadata"]["resumed_stages"] == []
+
+
+class TestCheckpointApi:
+    @pytest.fixture
+    async def api(self, replay):
+        app.dependency_overrides[get_current_user] = lambda: {"id": "cp-user"}
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            yield client
+        app.dependency_overrides.pop(get_current_user, None)
+
+    @pytest.mark.asyncio
+    async def test_rerun_reuses_simulation(self, api):
+        from app.routers.predictions import _predictions, _results
+
+        result = await run_prediction_pipeline("cp-rerun", QUERY)
+        _predictions["cp-rerun"] = {"id": "cp-rerun", "user_id": "cp-user", "query": QUERY, "status": "completed"}
+        _results["cp-rerun"] = result
+        sim = (await load_checkpoints("cp-rerun"))["simulation"]
+
+        got = AsyncMock(return_value={"outcomes": [], "causal_graph": {"nodes": [], "edges": []}})
+        with patch("app.services.prediction_pipeline.stage_got_reasoning", got):
+            resp = await api.post("/api/v1/predictions/cp-rerun/rerun", json={"variables": {"GDP growth": 1.0}})
+        assert resp.status_code == 200
+        assert got.call_args.args[2] == sim
+        del _predictions["cp-rerun"], _results["cp-rerun"]
+
+    @pytest.mark.asyncio
+    async def test_retry_requeues_failed_prediction(self, api, monkeypatch):
+        from app.routers.predictions import _predictions
+
+        monkeypatch.setattr("app.routers.predictions.ensure_embedded_worker", lambda: None)
+        prediction_id = (await api.post("/api/v1/predictions/create", json={"query": QUERY})).json()["id"]
+        assert (await api.post(f"/api/v1/predictions/{prediction_id}/retry")).status_code == 409
+
+        await api.post(f"/api/v1/predictions/{prediction_id}/cancel")
+        resp = await api.post(f"/api/v1/predictions/{prediction_id}/retry")
+        assert resp.status_code == 200
+        assert (await api.get(f"/api/v1/predictions/{prediction_id}")).json()["status"] == "processing"
+        del _predictions[prediction_id]
@@ -0,0 +1,167 @@
+"""Verify query fingerprints and reuse of recent or in-flight prediction runs."""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.core.auth import get_current_user
+from app.core.llm import set_llm_backend
+from app.core.llm_backends import ReplayBackend
+from app.main import app
+from app.services.dedup import find_reusable, query_fingerprint, task_fingerprint
+from app.services.jobs import get_job_queue
+
+QUERY = "2026 Malaysian General Election outcome?"
+TASK = {"type": "election", "region": "MY", "timeframe": "P6M", "outcomes": ["PH wins", "PN wins"], "key_variables": ["GDP"]}
+
+
+class TestFingerprints:
+    def test_query_normalization(self):
+        assert query_fingerprint(QUERY) == query_fingerprint("  2026 malaysian general   election OUTCOME ")
+        assert query_fingerprint(QUERY) != query_fingerprint("2030 Malaysian General Election outcome?")
+
+    def test_task_ignores_variables_and_outcome_order(self):
+        reordered = {**TASK, "outcomes": ["pn wins", "PH wins"], "key_variables": ["Oil price"]}
+        assert task_fingerprint(TASK) == task_fingerprint(reordered)
+        assert task_fingerprint(TASK) != task_fingerprint({**TASK, "region": "SG"})
+
+
+async def _wait_completed(api, prediction_id, timeout=30.0):
+    for _ in range(int(timeout / 0.02)):
+        status = (await api.get(f"/api/v1/predictions/{prediction_id}")).json()["status"]
+        if status in ("completed", "failed"):
+            return status
+        await asyncio.sleep(0.02)
+    raise AssertionError("prediction did not finish")
+
+
+class TestPredictionReuse:
+    @pytest.fixture
+    async def api(self):
+        app.dependency_overrides[get_current_user] = lambda: {"id": "dedup-user"}
+        set_llm_backend(ReplayBackend())
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            yield client
+        set_llm_backend(None)
+        app.dependency_overrides.pop(get_current_user, None)
+
+    async def _create(self, api, query=QUERY, **extra):
+        resp = await api.post("/api/v1/predictions/create", json={"query": query, **extra})
+        assert resp.status_code == 200
+        return resp.json()
+
+    @pytest.mark.asyncio
+    async def test_completed_result_is_reused(self, api):
+        first = await self._create(api)
+        assert await _wait_completed(api, first["id"]) == "completed"
+
+        second = await self._create(api, query="2026 malaysian general election outcome")
+        assert second["status"] == "completed"
+        assert second["reused_from"] == first["id"]
+        result = (await api.get(f"/api/v1/predictions/{second['id']}/result")).json()
+        assert result["id"] == second["id"]
+        assert result["query"] == "2026 malaysian general election outcome"
+        from app.routers.predictions import _results
+        assert _results[second["id"]]["prediction_id"] == second["id"]
+        assert result["metadata"]["reused_from"] == first["id"]
+
+    @pytest.mark.asyncio
+    async def test_rerun_does_not_leak_into_reuse(self, api):
+        first = await self._create(api)
+        await _wait_completed(api, first["id"])
+        original = (await api.get(f"/api/v1/predictions/{first['id']}/result")).json()
+        variable = original["variables"][0]
+        rerun = await api.post(
+            f"/api/v1/predictions/{first['id']}/rerun",
+            json={"variables": {variable["name"]: variable["range"][1]}, "mode": "numeric"},
+        )
+        assert rerun.status_code == 200
+        assert rerun.json()["outcomes"] != original["outcomes"]
+
+        reused = await self._create(api)
+        assert reused["reused_from"] == first["id"]
+        result = (await api.get(f"/api/v1/predictions/{reused['id']}/result")).json()
+        assert result["outcomes"] == original["outcomes"]
+
+    @pytest.mark.asyncio
+    async def test_handler_intent_is_not_reported_as_resumed(self, api):
+        from app.core.llm_costs import charge_current_scope
+        from app.services import prediction_pipeline
+
+        real_parse = prediction_pipeline.stage_intent_parse
+
+        async def charged_parse(query):
+            charge_current_scope({"tokens_in": 0, "tokens_out": 0, "cost_usd": 1.0})
+            return await real_parse(query)
+
+        with patch("app.services.prediction_pipeline.stage_intent_parse", charged_parse):
+            first = await self._create(api)
+            assert await _wait_completed(api, first["id"]) == "completed"
+        metadata = (await api.get(f"/api/v1/predictions/{first['id']}/result")).json()["metadata"]
+        assert metadata["resumed_stages"] == []
+        assert "intent" in metadata["stage_timings"]
+        assert metadata["cost_usd"] >= 1.0
+
+    @pytest.mark.asyncio
+    async def test_force_fresh_runs_again(self, api):
+        first = await self._create(api)
+        await _wait_completed(api, first["id"])
+        fresh = await self._create(api, force_fresh=True)
+        assert fresh["reused_from"] is None
+        assert await _wait_completed(api, fresh["id"]) == "completed"
+        result = (await api.get(f"/api/v1/predictions/{fresh['id']}/result")).json()
+        assert "reused_from" not in result["metadata"]
+
+    @pytest.mark.asyncio
+    async def test_in_flight_run_is_joined(self, api, monkeypatch):
+        monkeypatch.setattr("app.routers.predictions.ensure_embedded_worker", lambda: None)
+        first = await self._create(api)
+        second = await self._create(api)
+        assert second == {"id": second["id"], "status": "processing", "estimated_seconds": 120, "reused_from": first["id"]}
+
+    @pytest.mark.asyncio
+    async def test_same_task_from_different_wording(self, api):
+        first = await self._create(api)
+        await _wait_completed(api, first["id"])
+        # Different text, but the (replayed) intent parse yields the same task
+        other = await self._create(api, query="Who wins Malaysia's next general election?")
+        assert other["reused_from"] is None
+        assert await _wait_completed(api, other["id"]) == "completed"
+        pred = (await api.get(f"/api/v1/predictions/{other['id']}")).json()
+        assert pred["reused_from"] == first["id"]
+
+    @pytest.mark.asyncio
+    async def test_failed_run_is_not_reused(self, api):
+        with patch("app.services.prediction_pipeline.stage_three_engine_reasoning", AsyncMock(side_effect=RuntimeError("down"))):
+            first = await self._create(api)
+            assert await _wait_completed(api, first["id"]) == "failed"
+        assert await find_reusable(query_fingerprint(QUERY)) is None
+        second = await self._create(api)
+        assert second["reused_from"] is None
+        assert (await get_job_queue().get(second["id"])) is not None
+
+    @pytest.mark.asyncio
+    async def test_cancel_only_unlinks_a_shared_run(self, api, monkeypatch):
+        monkeypatch.setattr("app.routers.predictions.ensure_embedded_worker", lambda: None)
+
+        async def as_user(user_id, method, url, **kwargs):
+            app.dependency_overrides[get_current_user] = lambda: {"id": user_id}
+            return await api.request(method, url, **kwargs)
+
+        owner = (await as_user("alice", "POST", "/api/v1/predictions/create", json={"query": QUERY})).json()
+        follower = (await as_user("bob", "POST", "/api/v1/predictions/create", json={"query": QUERY})).json()
+        assert follower["reused_from"] == owner["id"]
+
+        # The owner leaves; the run keeps going for the follower
+        resp = await as_user("alice", "POST", f"/api/v1/predictions/{owner['id']}/cancel")
+        assert resp.json()["status"] == "cancelled"
+        assert (await get_job_queue().get(owner["id"])).status == "queued"
+        assert (await api.get(f"/api/v1/predictions/{follower['id']}")).json()["status"] == "processing"
+
+        # The last one following it cancels the run itself
+        resp = await as_user("bob", "POST", f"/api/v1/predictions/{follower['id']}/cancel")
+        assert resp.status_code == 200
+        assert resp.json()["status"] == "cancelled"
+        assert (await get_job_queue().get(owner["id"])).status == "cancelled"
@@ -0,0 +1,248 @@
+"""Verify the prediction job queue, the worker pool and the API on top of them."""
+
+import asyncio
+import uuid
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.core.auth import get_current_user
+from app.core.config import settings
+from app.core.llm import set_llm_backend
+from app.core.llm_backends import ReplayBackend
+from app.main import app
+from app.services.jobs import (
+    CANCELLED,
+    COMPLETED,
+    FAILED,
+    QUEUED,
+    InMemoryJobQueue,
+    JobPriority,
+    JobWorker,
+    RedisJobQueue,
+)
+
+
+async def _until(predicate, timeout: float = 5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not await predicate():
+        assert asyncio.get_running_loop().time() < deadline, "condition not reached in time"
+        await asyncio.sleep(0.01)
+
+
+async def _status(queue, job_id):
+    return (await queue.get(job_id)).status
+
+
+class TestInMemoryJobQueue:
+    @pytest.mark.asyncio
+    async def test_claims_by_priority_then_fifo(self):
+        queue = InMemoryJobQueue()
+        await queue.enqueue("k", {"n": 1}, priority=JobPriority.LOW, job_id="low")
+        await queue.enqueue("k", {"n": 2}, job_id="normal-1")
+        await queue.enqueue("k", {"n": 3}, job_id="normal-2")
+        await queue.enqueue("k", {"n": 4}, priority=JobPriority.HIGH, job_id="high")
+        claimed = [(await queue.claim("w")).id for _ in range(4)]
+        assert claimed == ["high", "normal-1", "normal-2", "low"]
+        assert await queue.claim("w") is None
+
+    @pytest.mark.asyncio
+    async def test_cancel_queued_job(self):
+        queue = InMemoryJobQueue()
+        await queue.enqueue("k", {}, job_id="a")
+        assert await queue.cancel("a") is True
+        assert await _status(queue, "a") == CANCELLED
+        assert await queue.claim("w") is None
+        # Already finished
+        assert await queue.cancel("a") is False
+        assert await queue.cancel("missing") is False
+
+    @pytest.mark.asyncio
+    async def test_stats_report_depth_and_wait(self):
+        queue = InMemoryJobQueue()
+        await queue.enqueue("k", {}, priority=JobPriority.HIGH)
+        await queue.enqueue("k", {})
+        await queue.claim("w")
+        stats = await queue.stats()
+        assert stats["depth"] == 1
+        assert stats["depth_by_priority"][JobPriority.NORMAL] == 1
+        assert stats["running"] == 1
+        assert stats["oldest_wait_seconds"] >= 0
+
+    @pytest.mark.asyncio
+    async def test_finished_jobs_are_bounded(self):
+        queue = InMemoryJobQueue(max_finished=2)
+        for i in range(3):
+            job = await queue.enqueue("k", {}, job_id=str(i))
+            await queue.finish(job, COMPLETED, result=i)
+        assert await queue.get("0") is None
+        assert (await queue.get("2")).result == 2
+
+
+class TestJobWorker:
+    @pytest.mark.asyncio
+    async def test_runs_jobs_within_concurrency_cap(self):
+        queue = InMemoryJobQueue()
+        active, peak = 0, 0
+
+        async def handler(job, q):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.02)
+            active -= 1
+            return job.payload["n"] * 2
+
+        worker = JobWorker(queue, {"double": handler}, concurrency=2, poll_interval=0.01)
+        runner = asyncio.create_task(worker.run())
+        jobs = [await queue.enqueue("double", {"n": n}) for n in range(6)]
+        try:
+            await _until(lambda: _all_done(queue, jobs))
+        finally:
+            await worker.stop()
+            runner.cancel()
+        assert [(await queue.get(j.id)).result for j in jobs] == [0, 2, 4, 6, 8, 10]
+        assert peak == 2
+        assert worker.stats()[COMPLETED] == 6
+
+    @pytest.mark.asyncio
+    async def test_failed_and_unknown_jobs(self):
+        queue = InMemoryJobQueue()
+
+        async def boom(job, q):
+            raise RuntimeError("boom")
+
+        worker = JobWorker(queue, {"boom": boom}, poll_interval=0.01)
+        runner = asyncio.create_task(worker.run())
+        jobs = [await queue.enqueue("boom", {}), await queue.enqueue("nope", {})]
+        try:
+            await _until(lambda: _all_done(queue, jobs))
+        finally:
+            await worker.stop()
+            runner.cancel()
+        first, second = [await queue.get(j.id) for j in jobs]
+        assert (first.status, first.error) == (FAILED, "boom")
+        assert second.status == FAILED and "nope" in second.error
+
+    @pytest.mark.asyncio
+    async def test_cancels_running_job(self):
+        queue = InMemoryJobQueue()
+        started = asyncio.Event()
+
+        async def forever(job, q):
+            started.set()
+            await asyncio.sleep(60)
+
+        worker = JobWorker(queue, {"forever": forever}, poll_interval=0.01, heartbeat_interval=0.01)
+        runner = asyncio.create_task(worker.run())
+        job = await queue.enqueue("forever", {})
+        try:
+            await asyncio.wait_for(started.wait(), 5)
+            assert await queue.cancel(job.id) is True
+            await _until(lambda: _all_done(queue, [job]))
+        finally:
+            await worker.stop()
+            runner.cancel()
+        assert await _status(queue, job.id) == CANCELLED
+        assert worker.stats()["running"] == 0
+
+
+async def _all_done(queue, jobs) -> bool:
+    for job in jobs:
+        if (await queue.get(job.id)).status in (QUEUED, "running"):
+            return False
+    return True
+
+
+class TestPredictionJobsApi:
+    @pytest.fixture
+    async def api(self):
+        app.dependency_overrides[get_current_user] = lambda: {"id": "job-user"}
+        set_llm_backend(ReplayBackend())
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            yield client
+        set_llm_backend(None)
+        app.dependency_overrides.pop(get_current_user, None)
+
+    @pytest.mark.asyncio
+    async def test_create_runs_on_queue(self, api):
+        resp = await api.post("/api/v1/predictions/create", json={"query": "2026 Malaysian General Election outcome?"})
+        assert resp.status_code == 200
+        prediction_id = resp.json()["id"]
+
+        async def completed():
+            return (await api.get(f"/api/v1/predictions/{prediction_id}")).json()["status"] == "completed"
+
+        await _until(completed, timeout=30)
+        result = (await api.get(f"/api/v1/predictions/{prediction_id}/result")).json()
+        assert result["outcomes"]
+        assert result["metadata"]["total_time_seconds"] >= 0
+
+        metrics = (await api.get("/api/v1/admin/jobs")).json()
+        assert metrics["queue"]["depth"] == 0
+        assert metrics["worker"][COMPLETED] == 1
+
+    @pytest.mark.asyncio
+    async def test_cancel_prediction(self, api, monkeypatch):
+        # No worker in this process: the job stays queued until cancelled
+        monkeypatch.setattr("app.routers.predictions.ensure_embedded_worker", lambda: None)
+        prediction_id = (await api.post("/api/v1/predictions/create", json={"query": "Will it rain tomorrow?"})).json()["id"]
+
+        resp = await api.post(f"/api/v1/predictions/{prediction_id}/cancel")
+        assert resp.json() == {"id": prediction_id, "status": CANCELLED}
+        assert (await api.get(f"/api/v1/predictions/{prediction_id}")).json()["status"] == CANCELLED
+        assert (await api.post(f"/api/v1/predictions/{prediction_id}/cancel")).status_code == 409
+
+
+@pytest.mark.integration
+class TestRedisJobQueue:
+    """Needs a Redis server at settings.redis_url."""
+
+    @pytest.fixture
+    async def queue(self, monkeypatch):
+        import redis.asyncio as aioredis
+
+        client = aioredis.from_url(settings.redis_url, decode_responses=False)
+        try:
+            await client.ping()
+        except Exception:
+            pytest.skip("Redis not available")
+
+        async def _get_redis():
+            return client
+
+        monkeypatch.setattr("app.core.cache.get_redis", _get_redis)
+        prefix = f"jobs-test-{uuid.uuid4().hex[:8]}"
+        yield RedisJobQueue(prefix=prefix, visibility_timeout=0.05)
+        keys = [k async for k in client.scan_iter(f"{prefix}:*")]
+        if keys:
+            await client.delete(*keys)
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_priority_progress_and_finish(self, queue):
+        await queue.enqueue("k", {"n": 1}, job_id="normal")
+        await queue.enqueue("k", {"n": 2}, priority=JobPriority.HIGH, job_id="high")
+        job = await queue.claim("w1")
+        assert job.id == "high"
+        await queue.progress(job.id, stage="stage_1_done", partial={"got": {"outcomes": [1]}})
+        await queue.finish(job, COMPLETED, result={"ok": True})
+        stored = await queue.get("high")
+        assert (stored.status, stored.stage, stored.result) == (COMPLETED, "stage_1_done", {"ok": True})
+        assert stored.partial == {"got": {"outcomes": [1]}}
+
+    @pytest.mark.asyncio
+    async def test_abandoned_job_is_reclaimed(self, queue):
+        await queue.enqueue("k", {}, job_id="a")
+        assert (await queue.claim("dead-worker")).id == "a"
+        await asyncio.sleep(0.1)
+        job = await queue.claim("w2")
+        assert job.id == "a" and job.attempts == 2
+
+    @pytest.mark.asyncio
+    async def test_cancel_queued(self, queue):
+        await queue.enqueue("k", {}, job_id="a")
+        assert await queue.cancel("a")
+        assert await queue.claim("w") is None
+        assert (await queue.get("a")).status == CANCELLED
@@ -0,0 +1,128 @@
+"""Verify the pluggable LLM backend and the offline ReplayBackend stand-in."""
+
+import json
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.core.llm import call_llm, call_llm_json, get_cost_log, set_llm_backend
+from app.core.llm_backends import (
+    InjectedLLMError,
+    LLMResponse,
+    ReplayBackend,
+    request_hash,
+    synthesize_response,
+)
+
+MESSAGES = [{"role": "user", "content": "2026 Malaysian General Election outcome?"}]
+
+
+@pytest.fixture
+def use_backend():
+    """Install a backend for one test, then restore the configured one."""
+    def _install(backend):
+        set_llm_backend(backend)
+        return backend
+    yield _install
+    set_llm_backend(None)
+
+
+class TestReplayBackend:
+    @pytest.mark.asyncio
+    async def test_synthetic_responses_are_deterministic(self):
+        a = await ReplayBackend().complete("intent_parse", "m", MESSAGES)
+        b = await ReplayBackend().complete("intent_parse", "m", MESSAGES)
+        assert a == b
+        parsed = json.loads(a.text)
+        assert parsed["outcomes"]
+        assert a.tokens_in > 0 and a.tokens_out > 0
+
+    def test_synthetic_shapes_match_engines(self):
+        got = json.loads(synthesize_response("got_reasoning", "k"))
+        assert abs(sum(o["probability"] for o in got["outcomes"]) - 1) < 0.01
+        assert got["causal_graph"]["nodes"]
+        mcts = json.loads(synthesize_response("mcts_evaluate", "k"))
+        assert "branches" in mcts and 0 <= mcts["score"] <= 1
+        debate = json.loads(synthesize_response("debate", "k"))
+        assert {"probabilities", "updated_probabilities", "confidence"} <= debate.keys()
+
+    @pytest.mark.asyncio
+    async def test_record_then_replay(self, tmp_path):
+        path = tmp_path / "llm.jsonl"
+        inner = AsyncMock()
+        inner.complete = AsyncMock(return_value=LLMResponse('{"answer": 42}', 12, 3))
+
+        recorder = ReplayBackend(path=str(path), mode="record", inner=inner)
+        await recorder.complete("explanation", "m", MESSAGES, temperature=0)
+        assert recorder.stats["recorded"] == 1
+
+        replayer = ReplayBackend(path=str(path), synthesize_misses=False)
+        resp = await replayer.complete("explanation", "m", MESSAGES, temperature=0)
+        assert resp == LLMResponse('{"answer": 42}', 12, 3)
+        assert replayer.stats["replayed"] == 1
+
+        # Different sampling kwargs are a different request
+        with pytest.raises(KeyError):
+            await replayer.complete("explanation", "m", MESSAGES, temperature=1)
+
+    def test_record_mode_requires_inner(self):
+        with pytest.raises(ValueError):
+            ReplayBackend(mode="record")
+
+    def test_request_hash_stable(self):
+        assert request_hash("m", MESSAGES, {"a": 1, "b": 2}) == request_hash("m", MESSAGES, {"b": 2, "a": 1})
+
+    @pytest.mark.asyncio
+    async def test_error_injection(self):
+        backend = ReplayBackend(rate_limit_rate=1.0)
+        with pytest.raises(InjectedLLMError) as exc:
+            await backend.complete("debate", "m", MESSAGES)
+        assert exc.value.status_code == 429
+
+    @pytest.mark.asyncio
+    async def test_latency_injection(self):
+        backend = ReplayBackend(latency_median=0.01, seed=1)
+        with patch("app.core.llm_backends.asyncio.sleep", AsyncMock()) as sleep:
+            await backend.complete("debate", "m", MESSAGES)
+        assert sleep.await_args.args[0] > 0
+
+    @pytest.mark.asyncio
+    async def test_stream_chunks_reassemble(self):
+        backend = ReplayBackend()
+        chunks = [c async for c in backend.stream("got_reasoning", "m", MESSAGES)]
+        full = await backend.complete("got_reasoning", "m", MESSAGES)
+        assert "".join(c.text for c in chunks) == full.text
+        assert chunks[-1].tokens_out == full.tokens_out
+
+
+class TestBackendWiring:
+    @pytest.mark.asyncio
+    async def test_call_llm_uses_installed_backend(self, use_backend):
+        backend = use_backend(ReplayBackend())
+        result = await call_llm_json("intent_parse", MESSAGES)
+        assert result["type"] == "election"
+        assert backend.stats["synthesized"] == 1
+        assert get_cost_log()[-1]["tokens_out"] > 0
+
+    @pytest.mark.asyncio
+    async def test_injected_errors_are_retried(self, use_backend):
+        backend = use_backend(ReplayBackend(error_rate=0.5, seed=3))
+        with patch("app.core.llm.asyncio.sleep", AsyncMock()):
+            results = [await call_llm("debate", [{"role": "user", "content": str(i)}]) for i in range(5)]
+        assert all(results)
+        assert backend.stats["errors"] > 0
+
+    @pytest.mark.asyncio
+    async def test_engines_run_offline(self, use_backend):
+        """The three-engine stage runs end to end without the network."""
+        from app.services.prediction_pipeline import (
+            MALAYSIA_SAMPLE_DATA,
+            stage_three_engine_reasoning,
+        )
+
+        use_backend(ReplayBackend())
+        task = {"type": "election", "outcomes": ["PH wins", "PN wins", "Hung parliament"]}
+        sim = {"agent_count": 10, "ticks": [{}], "final_distribution": {"government_support": 0.5, "opposition_support": 0.5}}
+        result = await stage_three_engine_reasoning(task, MALAYSIA_SAMPLE_DATA, sim, {"agents": []})
+        assert {o["name"] for o in result["outcomes"]} == set(task["outcomes"])
+        assert result["engines"]["got"] and result["engines"]["mcts"] and result["engines"]["debate"]
@@ -0,0 +1,233 @@
+"""Verify the LLM response cache and single-flight coalescing in app.core.llm."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.core.config import settings
+from app.core.llm import (
+    TASK_CACHE_TTL,
+    Models,
+    call_llm,
+    call_llm_json,
+    get_llm_stats,
+    make_llm_cache_key,
+)
+
+MESSAGES = [{"role": "user", "content": "2026 Malaysian General Election outcome?"}]
+
+
+def _mock_response(content: str) -> MagicMock:
+    resp = MagicMock()
+    resp.choices = [MagicMock()]
+    resp.choices[0].message.content = content
+    resp.usage = MagicMock(prompt_tokens=10, completion_tokens=5)
+    return resp
+
+
+@pytest.fixture
+def cache_on(monkeypatch):
+    """Enable the cache but keep it off Redis (L1 only) so tests stay hermetic."""
+    monkeypatch.setattr(settings, "llm_cache_enabled", True)
+    with patch("app.core.cache.get_redis", AsyncMock(return_value=None)):
+        yield
+
+
+class TestCacheKey:
+    def test_key_is_deterministic(self):
+        k1 = make_llm_cache_key("intent_parse", Models.SONNET, MESSAGES, {"temperature": 0})
+        k2 = make_llm_cache_key("intent_parse", Models.SONNET, MESSAGES, {"temperature": 0})
+        assert k1 == k2
+        assert k1.startswith("llm:intent_parse:")
+
+    def test_key_ignores_kwarg_order(self):
+        k1 = make_llm_cache_key("debate", Models.SONNET, MESSAGES, {"a": 1, "b": 2})
+        k2 = make_llm_cache_key("debate", Models.SONNET, MESSAGES, {"b": 2, "a": 1})
+        assert k1 == k2
+
+    def test_key_varies_with_inputs(self):
+        base = make_llm_cache_key("intent_parse", Models.SONNET, MESSAGES, {})
+        assert base != make_llm_cache_key("explanation", Models.SONNET, MESSAGES, {})
+        assert base != make_llm_cache_key("intent_parse", Models.HAIKU, MESSAGES, {})
+        assert base != make_llm_cache_key("intent_parse", Models.SONNET, MESSAGES, {"temperature": 1})
+        other = [{"role": "user", "content": "Bitcoin above $200K?"}]
+        assert base != make_llm_cache_key("intent_parse", Models.SONNET, other, {})
+
+
+class TestCallLLMCache:
+    @pytest.mark.asyncio
+    async def test_repeat_call_served_from_cache(self, cache_on):
+        """Second identical call for a cacheable task skips the provider."""
+        with patch("app.core.llm.client") as mock_client:
+            mock_client.chat.completions.create = AsyncMock(return_value=_mock_response("parsed"))
+            first = await call_llm("intent_parse", MESSAGES)
+            second = await call_llm("intent_parse", MESSAGES)
+
+        assert first == second == "parsed"
+        assert mock_client.chat.completions.create.await_count == 1
+        assert get_llm_stats()["cache"]["hits"] >= 1
+
+    @pytest.mark.asyncio
+    async def test_bypass_flag(self, cache_on):
+        """use_cache=False always calls the provider."""
+        with patch("app.core.llm.client") as mock_client:
+            mock_client.chat.completions.create = AsyncMock(return_value=_mock_response("fresh"))
+            await call_llm("intent_parse", MESSAGES)
+            await call_llm("intent_parse", MESSAGES, use_cache=False)
+
+        assert mock_client.chat.completions.create.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_uncached_task_not_cached(self, cache_on):
+        """Tasks without a TTL (e.g. MCTS rollouts) are never cached."""
+        assert "mcts_evaluate" not in TASK_CACHE_TTL
+        with patch("app.core.llm.client") as mock_client:
+            mock_client.chat.completions.create = AsyncMock(return_value=_mock_response("{}"))
+            await call_llm("mcts_evaluate", MESSAGES)
+            await call_llm("mcts_evaluate", MESSAGES)
+
+        assert mock_client.chat.completions.create.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_disabled_by_setting(self):
+        """The autouse fixture disables caching; every call hits the provider."""
+        with patch("app.core.llm.client") as mock_client:
+            mock_client.chat.completions.create = AsyncMock(return_value=_mock_response("x"))
+            await call_llm("intent_parse", MESSAGES)
+            await call_llm("intent_parse", MESSAGES)
+
+        assert mock_client.chat.completions.create.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_redis_hit_used(self, monkeypatch):
+        """A value already in Redis is returned without calling the provider."""
+        monkeypatch.setattr(settings, "llm_cache_enabled", True)
+        with patch("app.core.llm.cache_get", AsyncMock(return_value="from redis")), \
+             patch("app.core.llm.client") as mock_client:
+            mock_client.chat.completions.create = AsyncMock()
+            result = await call_llm("explanation", MESSAGES)
+
+        assert result == "from redis"
+        mock_client.chat.completions.create.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_unparseable_json_evicted(self, cache_on):
+        """A cached response that fails JSON parsing is evicted, not replayed."""
+        with patch("app.core.llm.client") as mock_client:
+            mock_client.chat.completions.create = AsyncMock(
+                side_effect=[_mock_response("not json"), _mock_response('{"ok": true}')]
+            )
+            with pytest.raises(ValueError):
+                await call_llm_json("intent_parse", MESSAGES)
+            result = await call_llm_json("intent_parse", MESSAGES)
+
+        assert result == {"ok": True}
+        assert mock_client.chat.completions.create.await_count == 2
+
+
+class TestSingleFlight:
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_calls_coalesced(self, cache_on):
+        """Identical concurrent calls share one provider request."""
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def slow_create(*args, **kwargs):
+            started.set()
+            await release.wait()
+            return _mock_response("shared")
+
+        before = get_llm_stats()["single_flight"]["coalesced"]
+        with patch("app.core.llm.client") as mock_client:
+            mock_client.chat.completions.create = AsyncMock(side_effect=slow_create)
+            calls = [asyncio.create_task(call_llm("explanation", MESSAGES)) for _ in range(5)]
+            await started.wait()
+            release.set()
+            results = await asyncio.gather(*calls)
+
+        assert results == ["shared"] * 5
+        assert mock_client.chat.completions.create.await_count == 1
+        stats = get_llm_stats()["single_flight"]
+        assert stats["coalesced"] - before == 4
+        assert stats["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_different_requests_not_coalesced(self, cache_on):
+        with patch("app.core.llm.client") as mock_client:
+            mock_client.chat.completions.create = AsyncMock(return_value=_mock_response("x"))
+            await asyncio.gather(
+                call_llm("explanation", MESSAGES),
+                call_llm("explanation", [{"role": "user", "content": "other"}]),
+            )
+        assert mock_client.chat.completions.create.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_does_not_cancel_others(self, cache_on):
+        release = asyncio.Event()
+
+        async def slow_create(*args, **kwargs):
+            await release.wait()
+            return _mock_response("survivor")
+
+        with patch("app.core.llm.client") as mock_client:
+            mock_client.chat.completions.create = AsyncMock(side_effect=slow_create)
+            first = asyncio.create_task(call_llm("explanation", MESSAGES))
+            second = asyncio.create_task(call_llm("explanation", MESSAGES))
+            await asyncio.sleep(0)
+            first.cancel()
+            await asyncio.sleep(0)
+            release.set()
+            assert await second == "survivor"
+        assert first.cancelled()
+
+    @pytest.mark.asyncio
+    async def test_last_waiter_cancel_cancels_call(self, cache_on):
+        cancelled = asyncio.Event()
+
+        async def hang(*args, **kwargs):
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        with patch("app.core.llm.client") as mock_client:
+            mock_client.chat.completions.create = AsyncMock(side_effect=hang)
+            call = asyncio.create_task(call_llm("explanation", MESSAGES))
+            await asyncio.sleep(0.01)
+            call.cancel()
+            await asyncio.wait_for(cancelled.wait(), timeout=1)
+            await asyncio.sleep(0.01)
+        assert get_llm_stats()["single_flight"]["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_errors_shared_by_waiters(self, cache_on):
+        async def boom(*args, **kwargs):
+            await asyncio.sleep(0.01)
+            raise ConnectionError("down")
+
+        with patch("app.core.llm.client") as mock_client:
+            mock_client.chat.completions.create = AsyncMock(side_effect=boom)
+            results = await asyncio.gather(
+                call_llm("explanation", MESSAGES, max_retries=0),
+                call_llm("explanation", MESSAGES, max_retries=0),
+                return_exceptions=True,
+            )
+        assert all(isinstance(r, ConnectionError) for r in results)
+        assert mock_client.chat.completions.create.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_uncached_task_not_coalesced(self, cache_on):
+        """Sampling tasks want independent draws, so identical calls each hit the provider."""
+        with patch("app.core.llm.client") as mock_client:
+            mock_client.chat.completions.create = AsyncMock(return_value=_mock_response("x"))
+            await asyncio.gather(*(call_llm("mcts_evaluate", MESSAGES) for _ in range(3)))
+        assert mock_client.chat.completions.create.await_count == 3
+
+    @pytest.mark.asyncio
+    async def test_bypass_flag_not_coalesced(self, cache_on):
+        with patch("app.core.llm.client") as mock_client:
+            mock_client.chat.completions.create = AsyncMock(return_value=_mock_response("x"))
+            await asyncio.gather(*(call_llm("explanation", MESSAGES, use_cache=False) for _ in range(3)))
+        assert mock_client.chat.completions.create.await_count == 3
@@ -0,0 +1,85 @@
+"""Verify the bounded cost log, rolling aggregates and USD pricing."""
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.core.llm import Models, call_llm, compute_cost_usd, set_llm_backend
+from app.core.llm_backends import ReplayBackend
+from app.core.llm_costs import BUCKET_SECONDS, CostTracker, llm_cost_scope
+from app.main import app
+
+
+def _entry(ts: float, model: str = "m", task: str = "t", tokens_in: int = 100, tokens_out: int = 10) -> dict:
+    return {
+        "task": task, "model": model, "elapsed": 1.0,
+        "tokens_in": tokens_in, "tokens_out": tokens_out, "cost_usd": 0.5, "timestamp": ts,
+    }
+
+
+class TestPricing:
+    def test_known_model(self):
+        # 1M input + 1M output tokens on Sonnet
+        assert compute_cost_usd(Models.SONNET, 1_000_000, 1_000_000) == pytest.approx(18.0)
+
+    def test_unknown_model_is_free(self):
+        assert compute_cost_usd("unknown/model", 1000, 1000) == 0.0
+
+
+class TestCostTracker:
+    def test_log_is_bounded(self):
+        tracker = CostTracker(log_size=5)
+        for i in range(20):
+            tracker.record(_entry(1_000_000 + i))
+        assert len(tracker.entries) == 5
+        assert tracker.entries[-1]["timestamp"] == 1_000_019
+        # Aggregates still see every call
+        assert tracker.all_time.totals["calls"] == 20
+
+    def test_windows(self):
+        now = 10_000 * BUCKET_SECONDS + 100
+        tracker = CostTracker()
+        tracker.record(_entry(now - 3 * 86400, model="old"))
+        tracker.record(_entry(now - 3600, model="recent", task="debate"))
+        tracker.record(_entry(now, model="recent", task="debate"))
+
+        today = tracker.window(86400, now=now).summary()
+        week = tracker.window(604800, now=now).summary()
+        assert today["calls"] == 2
+        assert week["calls"] == 3
+        assert today["by_model"]["recent"]["calls"] == 2
+        assert today["by_task"]["debate"]["tokens_in"] == 200
+        assert today["total_cost_usd"] == pytest.approx(1.0)
+
+    def test_old_buckets_evicted(self):
+        tracker = CostTracker(retention_buckets=3)
+        base = 5_000 * BUCKET_SECONDS
+        for h in range(10):
+            tracker.record(_entry(base + h * BUCKET_SECONDS))
+        assert len(tracker._buckets) == 3
+        assert tracker.all_time.totals["calls"] == 10
+
+
+class TestCostScope:
+    @pytest.mark.asyncio
+    async def test_scope_accumulates_calls(self):
+        set_llm_backend(ReplayBackend())
+        try:
+            with llm_cost_scope() as scope:
+                await call_llm("got_reasoning", [{"role": "user", "content": "a"}])
+                await call_llm("debate", [{"role": "user", "content": "b"}])
+            await call_llm("debate", [{"role": "user", "content": "outside"}])
+        finally:
+            set_llm_backend(None)
+        assert scope.calls == 2
+        assert scope.cost_usd > 0
+        assert scope.tokens_out > 0
+
+
+@pytest.mark.asyncio
+async def test_cost_endpoint_reports_usd():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        resp = await ac.get("/api/v1/admin/costs")
+    data = resp.json()
+    assert "total_cost_usd" in data["all_time"]
+    assert "by_task" in data["today"]
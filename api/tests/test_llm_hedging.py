@@ -0,0 +1,182 @@
+"""Verify hedged LLM requests and the latency-aware fallback chain."""
+
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.core.config import settings
+from app.core.llm import (
+    MODEL_FALLBACK_CHAIN,
+    Models,
+    call_llm,
+    call_llm_json_stream,
+    get_limiter,
+    get_llm_stats,
+    latency_p95,
+    record_latency,
+)
+
+MESSAGES = [{"role": "user", "content": "Who wins?"}]
+
+
+def _mock_response(content: str) -> MagicMock:
+    resp = MagicMock()
+    resp.choices = [MagicMock()]
+    resp.choices[0].message.content = content
+    resp.usage = MagicMock(prompt_tokens=10, completion_tokens=5)
+    return resp
+
+
+@pytest.fixture
+def fast_hedging(monkeypatch):
+    """Learn a ~50ms p95 for got_reasoning on Opus and allow sub-second hedges."""
+    monkeypatch.setattr(settings, "llm_hedge_min_delay", 0.0)
+    for _ in range(settings.llm_hedge_min_samples):
+        record_latency("got_reasoning", Models.OPUS, 0.05)
+
+
+def _model_delays(delays: dict[str, float], cancelled: list | None = None):
+    async def create(*args, **kwargs):
+        model = kwargs["model"]
+        try:
+            await asyncio.sleep(delays[model])
+        except asyncio.CancelledError:
+            if cancelled is not None:
+                cancelled.append(model)
+            raise
+        return _mock_response(model)
+    return create
+
+
+class TestLatencyTracking:
+    def test_p95_needs_min_samples(self):
+        record_latency("explanation", Models.SONNET, 1.0)
+        assert latency_p95("explanation", Models.SONNET) is None
+
+    def test_p95_value(self):
+        for i in range(100):
+            record_latency("explanation", Models.SONNET, float(i))
+        assert latency_p95("explanation", Models.SONNET) == 95.0
+
+
+class TestHedging:
+    @pytest.mark.asyncio
+    async def test_no_hedge_without_history(self):
+        with patch("app.core.llm.client") as mock_client:
+            mock_client.chat.completions.create = AsyncMock(side_effect=_model_delays({Models.OPUS: 0.01}))
+            result = await call_llm("got_reasoning", MESSAGES)
+        assert result == Models.OPUS
+        assert mock_client.chat.completions.create.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_slow_primary_hedged_and_cancelled(self, fast_hedging):
+        """Backup model wins when the primary is well past its p95; loser is cancelled."""
+        cancelled = []
+        delays = {Models.OPUS: 5.0, Models.SONNET: 0.01, Models.HAIKU: 5.0}
+        with patch("app.core.llm.client") as mock_client:
+            mock_client.chat.completions.create = AsyncMock(side_effect=_model_delays(delays, cancelled))
+            result = await asyncio.wait_for(call_llm("got_reasoning", MESSAGES), timeout=2)
+
+        assert result == Models.SONNET
+        assert Models.OPUS in cancelled
+        stats = get_llm_stats()["hedging"]
+        assert stats["hedge_wins"] >= 1
+        assert stats["wins_by_task"]["got_reasoning"] >= 1
+
+    @pytest.mark.asyncio
+    async def test_primary_still_wins_if_faster(self, fast_hedging):
+        """A hedge is launched but the primary answering first is kept."""
+        delays = {Models.OPUS: 0.08, Models.SONNET: 5.0, Models.HAIKU: 5.0}
+        with patch("app.core.llm.client") as mock_client:
+            mock_client.chat.completions.create = AsyncMock(side_effect=_model_delays(delays))
+            result = await asyncio.wait_for(call_llm("got_reasoning", MESSAGES), timeout=2)
+        assert result == Models.OPUS
+
+    @pytest.mark.asyncio
+    async def test_chain_cascades(self, fast_hedging):
+        """Each further p95 interval launches the next model in the chain."""
+        assert MODEL_FALLBACK_CHAIN[Models.OPUS] == [Models.SONNET, Models.HAIKU]
+        delays = {Models.OPUS: 5.0, Models.SONNET: 5.0, Models.HAIKU: 0.01}
+        with patch("app.core.llm.client") as mock_client:
+            mock_client.chat.completions.create = AsyncMock(side_effect=_model_delays(delays))
+            result = await asyncio.wait_for(call_llm("got_reasoning", MESSAGES), timeout=2)
+        assert result == Models.HAIKU
+
+    @pytest.mark.asyncio
+    async def test_disabled_by_setting(self, fast_hedging, monkeypatch):
+        monkeypatch.setattr(settings, "llm_hedging_enabled", False)
+        delays = {Models.OPUS: 0.2, Models.SONNET: 0.01}
+        with patch("app.core.llm.client") as mock_client:
+            mock_client.chat.completions.create = AsyncMock(side_effect=_model_delays(delays))
+            result = await call_llm("got_reasoning", MESSAGES)
+        assert result == Models.OPUS
+
+    @pytest.mark.asyncio
+    async def test_shared_deadline(self, fast_hedging):
+        """If nobody answers before the timeout, the call times out instead of hanging."""
+        delays = {Models.OPUS: 5.0, Models.SONNET: 5.0, Models.HAIKU: 5.0}
+        with patch("app.core.llm.client") as mock_client:
+            mock_client.chat.completions.create = AsyncMock(side_effect=_model_delays(delays))
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(
+                    call_llm("got_reasoning", MESSAGES, timeout=0.3, max_retries=0), timeout=2
+                )
+
+
+def _stream_delays(delays: dict[str, float], cancelled: list):
+    """Streams whose first chunk takes delays[model] seconds; the body names the model."""
+    async def create(*args, **kwargs):
+        model = kwargs["model"]
+        try:
+            await asyncio.sleep(delays[model])
+        except asyncio.CancelledError:
+            cancelled.append(model)
+            raise
+
+        async def chunks():
+            chunk = MagicMock(usage=None, choices=[MagicMock()])
+            chunk.choices[0].delta.content = json.dumps({"model": model})
+            yield chunk
+            yield MagicMock(choices=[], usage=MagicMock(prompt_tokens=10, completion_tokens=5))
+        return chunks()
+    return create
+
+
+class TestStreamHedging:
+    @pytest.fixture
+    def fast_first_chunk(self, monkeypatch):
+        monkeypatch.setattr(settings, "llm_hedge_min_delay", 0.0)
+        for _ in range(settings.llm_hedge_min_samples):
+            record_latency("got_reasoning:first_chunk", Models.OPUS, 0.05)
+
+    @pytest.mark.asyncio
+    async def test_slow_first_chunk_is_hedged(self, fast_first_chunk):
+        """The streamed stage-5 call is hedged like a plain call, on its first chunk."""
+        cancelled, fields = [], []
+
+        async def on_field(key, value):
+            fields.append(value)
+
+        delays = {Models.OPUS: 5.0, Models.SONNET: 0.01, Models.HAIKU: 5.0}
+        with patch("app.core.llm.client") as mock_client:
+            mock_client.chat.completions.create = AsyncMock(side_effect=_stream_delays(delays, cancelled))
+            result = await asyncio.wait_for(
+                call_llm_json_stream("got_reasoning", MESSAGES, on_field=on_field), timeout=2
+            )
+
+        assert result == {"model": Models.SONNET}
+        assert fields == [Models.SONNET]
+        assert Models.OPUS in cancelled
+        assert get_llm_stats()["hedging"]["wins_by_task"]["got_reasoning"] >= 1
+        assert all(get_limiter(m).active == 0 for m in delays)
+
+    @pytest.mark.asyncio
+    async def test_no_stream_hedge_without_history(self):
+        cancelled = []
+        with patch("app.core.llm.client") as mock_client:
+            mock_client.chat.completions.create = AsyncMock(side_effect=_stream_delays({Models.OPUS: 0.01}, cancelled))
+            result = await call_llm_json_stream("got_reasoning", MESSAGES)
+        assert result == {"model": Models.OPUS}
+        assert mock_client.chat.completions.create.await_count == 1
@@ -0,0 +1,172 @@
+"""Verify per-model concurrency limiting, priorities and AIMD backoff in app.core.llm."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.core.config import settings
+from app.core.llm import (
+    ModelLimiter,
+    Models,
+    Priority,
+    call_llm,
+    get_limiter,
+    get_llm_stats,
+    llm_priority,
+)
+
+
+def _mock_response(content: str = "ok") -> MagicMock:
+    resp = MagicMock()
+    resp.choices = [MagicMock()]
+    resp.choices[0].message.content = content
+    resp.usage = MagicMock(prompt_tokens=10, completion_tokens=5)
+    return resp
+
+
+class TestModelLimiter:
+    @pytest.mark.asyncio
+    async def test_limit_respected(self):
+        limiter = ModelLimiter("m", max_limit=2)
+        await limiter.acquire()
+        await limiter.acquire()
+        third = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        assert not third.done()
+        assert limiter.queue_depth == 1
+
+        limiter.release()
+        await third
+        assert limiter.active == 2
+        assert limiter.queue_depth == 0
+
+    @pytest.mark.asyncio
+    async def test_priority_order(self):
+        """Interactive waiters are admitted before pipeline and rollout waiters."""
+        limiter = ModelLimiter("m", max_limit=1)
+        await limiter.acquire()
+        order = []
+
+        async def waiter(name, priority):
+            await limiter.acquire(priority)
+            order.append(name)
+
+        tasks = [
+            asyncio.create_task(waiter("rollout", Priority.ROLLOUT)),
+            asyncio.create_task(waiter("pipeline", Priority.PIPELINE)),
+            asyncio.create_task(waiter("interactive", Priority.INTERACTIVE)),
+        ]
+        await asyncio.sleep(0)
+        for _ in range(3):
+            limiter.release()
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+        assert order == ["interactive", "pipeline", "rollout"]
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_frees_queue(self):
+        limiter = ModelLimiter("m", max_limit=1)
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert limiter.queue_depth == 0
+        limiter.release()
+        assert limiter.active == 0
+
+    def test_aimd(self):
+        limiter = ModelLimiter("m", max_limit=8)
+        limiter.on_backpressure()
+        assert limiter.limit == 4
+        # Cooldown: a burst of 429s only halves once
+        limiter.on_backpressure()
+        assert limiter.limit == 4
+        for _ in range(20):
+            limiter.on_success()
+        assert 4 < limiter.limit <= 8
+
+    def test_limit_never_below_min(self):
+        limiter = ModelLimiter("m", max_limit=2)
+        for _ in range(5):
+            limiter._last_decrease = 0.0
+            limiter.on_backpressure()
+        assert limiter.limit == 1
+
+    @pytest.mark.asyncio
+    async def test_wait_metrics(self):
+        limiter = ModelLimiter("m", max_limit=1)
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire(Priority.ROLLOUT))
+        await asyncio.sleep(0.02)
+        limiter.release()
+        await waiter
+        stats = limiter.stats()
+        assert stats["acquired"] == 2
+        assert stats["queued"] == 1
+        assert stats["max_wait"] > 0
+        assert Priority.ROLLOUT in stats["avg_wait_by_priority"]
+
+
+class TestCallLLMLimiting:
+    @pytest.mark.asyncio
+    async def test_concurrency_capped_per_model(self, monkeypatch):
+        monkeypatch.setattr(settings, "llm_model_concurrency", {Models.SONNET: 2})
+        in_flight = 0
+        peak = 0
+
+        async def create(*args, **kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return _mock_response()
+
+        with patch("app.core.llm.client") as mock_client:
+            mock_client.chat.completions.create = AsyncMock(side_effect=create)
+            await asyncio.gather(*[
+                call_llm("debate", [{"role": "user", "content": str(i)}]) for i in range(6)
+            ])
+        assert peak == 2
+        assert get_llm_stats()["limiters"][Models.SONNET]["acquired"] == 6
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_triggers_backoff(self):
+        error = ConnectionError("Too Many Requests")
+        error.status_code = 429
+        calls = 0
+
+        async def create(*args, **kwargs):
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                raise error
+            return _mock_response()
+
+        with patch("app.core.llm.client") as mock_client, \
+             patch("app.core.llm.asyncio.sleep", AsyncMock()):
+            mock_client.chat.completions.create = AsyncMock(side_effect=create)
+            await call_llm("debate", [{"role": "user", "content": "x"}])
+        limiter = get_limiter(Models.SONNET)
+        assert limiter.stats()["backoffs"] == 1
+        assert limiter.limit < limiter.max_limit
+
+    @pytest.mark.asyncio
+    async def test_priority_context_applies(self):
+        seen = []
+        original = ModelLimiter.acquire
+
+        async def spy(self, priority=Priority.PIPELINE):
+            seen.append(priority)
+            await original(self, priority)
+
+        with patch("app.core.llm.client") as mock_client, \
+             patch.object(ModelLimiter, "acquire", spy):
+            mock_client.chat.completions.create = AsyncMock(return_value=_mock_response())
+            await call_llm("mcts_evaluate", [{"role": "user", "content": "a"}])
+            with llm_priority(Priority.INTERACTIVE):
+                await call_llm("mcts_evaluate", [{"role": "user", "content": "b"}])
+        assert seen == [Priority.ROLLOUT, Priority.INTERACTIVE]
@@ -0,0 +1,190 @@
+"""Verify streamed LLM responses and incremental JSON field parsing."""
+
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.core.json_stream import JSONFieldStream
+from app.core.llm import TASK_MODEL, call_llm_json_stream, get_cost_log, get_limiter
+
+GOT_RESPONSE = {
+    "dimensions": [{"name": "Economic", "analysis": "GDP {growth}, \"steady\"", "impact": {"A": 0.1}}],
+    "outcomes": [{"name": "A", "probability": 0.6}, {"name": "B", "probability": 0.4}],
+    "causal_graph": {"nodes": [{"id": "gdp"}], "edges": []},
+}
+
+
+def _chunks(text: str, size: int) -> list[str]:
+    return [text[i : i + size] for i in range(0, len(text), size)]
+
+
+def _stream_chunk(content: str | None, usage=None) -> MagicMock:
+    chunk = MagicMock()
+    chunk.usage = usage
+    if content is None:
+        chunk.choices = []
+    else:
+        chunk.choices = [MagicMock()]
+        chunk.choices[0].delta.content = content
+    return chunk
+
+
+def _fake_stream(pieces: list[str]):
+    async def gen():
+        for p in pieces:
+            yield _stream_chunk(p)
+        yield _stream_chunk(None, usage=MagicMock(prompt_tokens=100, completion_tokens=50))
+    return gen()
+
+
+class TestJSONFieldStream:
+    def test_fields_emitted_in_order(self):
+        text = json.dumps(GOT_RESPONSE)
+        parser = JSONFieldStream()
+        emitted = []
+        for piece in _chunks(text, 7):
+            emitted.extend(parser.feed(piece))
+        assert [k for k, _ in emitted] == ["dimensions", "outcomes", "causal_graph"]
+        assert dict(emitted) == GOT_RESPONSE
+        assert parser.done
+
+    def test_field_available_before_end(self):
+        text = json.dumps(GOT_RESPONSE)
+        cut = text.index('"causal_graph"') + 20
+        parser = JSONFieldStream()
+        emitted = parser.feed(text[:cut])
+        assert "outcomes" in dict(emitted)
+        assert "causal_graph" not in parser.fields
+
+    def test_code_fence_and_scalars(self):
+        text = '```json\n{"score": 0.7, "ok": true, "note": "a,b}c", "none": null}\n```'
+        parser = JSONFieldStream()
+        emitted = []
+        for ch in text:
+            emitted.extend(parser.feed(ch))
+        assert dict(emitted) == {"score": 0.7, "ok": True, "note": "a,b}c", "none": None}
+
+    def test_escaped_quotes_in_keys_and_values(self):
+        obj = {'we"ird': 'x\\"y', "n": [1, [2, {"k": "]"}]]}
+        parser = JSONFieldStream()
+        assert dict(parser.feed(json.dumps(obj))) == obj
+
+    def test_empty_object(self):
+        parser = JSONFieldStream()
+        assert parser.feed("{}") == []
+        assert parser.done
+
+
+class TestCallLLMJsonStream:
+    @pytest.mark.asyncio
+    async def test_streams_fields_and_returns_result(self):
+        seen = []
+
+        async def on_field(key, value):
+            seen.append(key)
+
+        pieces = _chunks(json.dumps(GOT_RESPONSE), 11)
+        with patch("app.core.llm.client") as mock_client:
+            mock_client.chat.completions.create = AsyncMock(return_value=_fake_stream(pieces))
+            result = await call_llm_json_stream("got_reasoning", [{"role": "user", "content": "q"}], on_field=on_field)
+
+        assert result == GOT_RESPONSE
+        assert seen == ["dimensions", "outcomes", "causal_graph"]
+        kwargs = mock_client.chat.completions.create.call_args.kwargs
+        assert kwargs["stream"] is True
+        entry = get_cost_log()[-1]
+        assert entry["task"] == "got_reasoning"
+        assert entry["tokens_out"] == 50
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_plain_call(self):
+        """A broken stream falls back to call_llm_json and still reports every field."""
+        seen = {}
+
+        async def on_field(key, value):
+            seen[key] = value
+
+        async def broken():
+            yield _stream_chunk('{"outcomes": [1], ')
+            raise ConnectionError("stream reset")
+
+        with patch("app.core.llm.client") as mock_client, \
+             patch("app.core.llm.call_llm_json", AsyncMock(return_value={"outcomes": [1], "causal_graph": {}})):
+            mock_client.chat.completions.create = AsyncMock(return_value=broken())
+            result = await call_llm_json_stream("got_reasoning", [{"role": "user", "content": "q"}], on_field=on_field)
+
+        assert result == {"outcomes": [1], "causal_graph": {}}
+        assert seen == {"outcomes": [1], "causal_graph": {}}
+
+    @pytest.mark.asyncio
+    async def test_callback_errors_propagate_without_fallback(self):
+        """A failing on_field is the caller's bug: no second, non-streaming LLM call."""
+
+        async def on_field(key, value):
+            raise ValueError("bad field")
+
+        fallback = AsyncMock(return_value=GOT_RESPONSE)
+        stream = _fake_stream(_chunks(json.dumps(GOT_RESPONSE), 11))
+        messages = [{"role": "user", "content": "q"}]
+        with patch("app.core.llm.client") as mock_client, \
+             patch("app.core.llm.call_llm_json", fallback):
+            mock_client.chat.completions.create = AsyncMock(return_value=stream)
+            with pytest.raises(ValueError, match="bad field"):
+                await call_llm_json_stream("got_reasoning", messages, on_field=on_field)
+
+        fallback.assert_not_called()
+        assert get_limiter(TASK_MODEL["got_reasoning"]).active == 0
+
+
+class TestPipelinePartials:
+    @pytest.mark.asyncio
+    async def test_got_partials_reach_prediction_status(self):
+        from app.routers.predictions import _predictions, _sync_from_job
+        from app.services.jobs import get_job_queue
+        from app.services.prediction_pipeline import (
+            MALAYSIA_SAMPLE_DATA,
+            stage_got_reasoning,
+        )
+
+        _predictions["stream-test"] = {"id": "stream-test", "status": "stage_5_done"}
+        queue = get_job_queue()
+        await queue.enqueue("prediction", {"query": "q"}, job_id="stream-test")
+        job = await queue.claim("test")
+        sim = {"agent_count": 10, "ticks": [], "final_distribution": {"government_support": 0.5, "opposition_support": 0.5}}
+
+        async def on_field(key, value):
+            await queue.progress(job.id, partial={"got": {key: value}})
+
+        pieces = _chunks(json.dumps(GOT_RESPONSE), 13)
+        with patch("app.core.llm.client") as mock_client:
+            mock_client.chat.completions.create = AsyncMock(return_value=_fake_stream(pieces))
+            result = await stage_got_reasoning({"outcomes": ["A", "B"]}, MALAYSIA_SAMPLE_DATA, sim, on_field=on_field)
+
+        assert result["outcomes"] == GOT_RESPONSE["outcomes"]
+        await _sync_from_job("stream-test")
+        assert _predictions["stream-test"]["partial"]["got"]["outcomes"] == GOT_RESPONSE["outcomes"]
+        del _predictions["stream-test"]
+
+    @pytest.mark.asyncio
+    async def test_failed_progress_write_keeps_got_result(self):
+        from app.services.jobs import JobQueueUnavailableError
+        from app.services.prediction_pipeline import (
+            MALAYSIA_SAMPLE_DATA,
+            stage_got_reasoning,
+        )
+
+        sim = {"agent_count": 10, "ticks": [], "final_distribution": {"government_support": 0.5, "opposition_support": 0.5}}
+        seen = []
+
+        async def on_field(key, value):
+            seen.append(key)
+            raise JobQueueUnavailableError("redis down")
+
+        pieces = _chunks(json.dumps(GOT_RESPONSE), 13)
+        with patch("app.core.llm.client") as mock_client:
+            mock_client.chat.completions.create = AsyncMock(return_value=_fake_stream(pieces))
+            result = await stage_got_reasoning({"outcomes": ["A", "B"]}, MALAYSIA_SAMPLE_DATA, sim, on_field=on_field)
+
+        assert result == GOT_RESPONSE
+        assert seen == ["dimensions", "outcomes", "causal_graph"]
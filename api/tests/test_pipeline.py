@@ -1,13 +1,15 @@
+from unittest.mock import patch
+
 import pytest
-from unittest.mock import AsyncMock, patch, MagicMock
 
+from app.services.population import Population
 from app.services.prediction_pipeline import (
-    stage_intent_parse,
+    _fallback_got_result,
     stage_data_collection,
+    stage_explanation,
+    stage_intent_parse,
     stage_pop_synthesizer,
     stage_simulation,
-    stage_explanation,
-    _fallback_got_result,
 )
 
 
@@ -39,9 +41,9 @@ async def test_pop_synthesizer():
     from app.services.prediction_pipeline import MALAYSIA_SAMPLE_DATA
 
     pop = await stage_pop_synthesizer(MALAYSIA_SAMPLE_DATA, agent_count=20)
-    assert len(pop["agents"]) == 20
-    assert "network" in pop
-    for agent in pop["agents"]:
+    assert pop["agent_count"] == 20
+    assert "edges" in pop
+    for agent in Population.from_payload(pop).agent_records():
         assert "id" in agent
         assert "stance" in agent
         assert "ethnicity" in agent
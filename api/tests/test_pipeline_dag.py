@@ -0,0 +1,123 @@
+"""Verify the stage DAG scheduler and the pipeline built on it."""
+
+import asyncio
+import time
+
+import pytest
+
+from app.core.llm import set_llm_backend
+from app.core.llm_backends import ReplayBackend
+from app.services.pipeline_dag import Stage, StageTimeoutError, run_stages
+from app.services.prediction_pipeline import run_prediction_pipeline
+
+
+def _sleeper(value, delay: float = 0.05):
+    async def _run(results):
+        await asyncio.sleep(delay)
+        return value
+    return _run
+
+
+class TestRunStages:
+    @pytest.mark.asyncio
+    async def test_independent_stages_overlap(self):
+        stages = [Stage("a", _sleeper(1, 0.1)), Stage("b", _sleeper(2, 0.1)), Stage("c", _sleeper(3, 0.1))]
+        started = time.monotonic()
+        results, timings = await run_stages(stages)
+        assert results == {"a": 1, "b": 2, "c": 3}
+        assert time.monotonic() - started < 0.25
+        assert set(timings) == {"a", "b", "c"}
+
+    @pytest.mark.asyncio
+    async def test_dependencies_run_in_order(self):
+        async def double(results):
+            return results["a"] * 2
+
+        results, timings = await run_stages([Stage("b", double, deps=("a",)), Stage("a", _sleeper(21))])
+        assert results["b"] == 42
+        assert timings["b"]["started_at"] >= timings["a"]["ended_at"]
+
+    @pytest.mark.asyncio
+    async def test_timeout_uses_fallback(self):
+        stage = Stage("slow", _sleeper("late", 1), timeout=0.05, fallback=lambda r: "fallback")
+        results, timings = await run_stages([stage])
+        assert results["slow"] == "fallback"
+        assert timings["slow"]["timed_out"] is True
+
+    @pytest.mark.asyncio
+    async def test_timeout_without_fallback_raises(self):
+        with pytest.raises(StageTimeoutError):
+            await run_stages([Stage("slow", _sleeper("late", 1), timeout=0.05)])
+
+    @pytest.mark.asyncio
+    async def test_failure_cancels_running_stages(self):
+        cancelled = asyncio.Event()
+
+        async def long(results):
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        async def boom(results):
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            await run_stages([Stage("long", long), Stage("boom", boom)])
+        assert cancelled.is_set()
+
+    @pytest.mark.asyncio
+    async def test_completed_stages_are_skipped(self):
+        async def fail(results):
+            raise AssertionError("should not run")
+
+        async def use(results):
+            return results["a"] + 1
+
+        results, timings = await run_stages([Stage("a", fail), Stage("b", use, deps=("a",))], results={"a": 1})
+        assert results["b"] == 2
+        assert "a" not in timings
+
+    @pytest.mark.asyncio
+    async def test_on_start_reports_status(self):
+        seen = []
+
+        async def on_start(stage):
+            seen.append(stage.status)
+
+        await run_stages(
+            [Stage("a", _sleeper(1, 0), status="one"), Stage("b", _sleeper(2, 0), deps=("a",), status="two")],
+            on_start=on_start,
+        )
+        assert seen == ["one", "two"]
+
+    @pytest.mark.asyncio
+    async def test_invalid_graphs(self):
+        with pytest.raises(ValueError):
+            await run_stages([Stage("a", _sleeper(1), deps=("b",)), Stage("b", _sleeper(2), deps=("a",))])
+        with pytest.raises(ValueError):
+            await run_stages([Stage("a", _sleeper(1), deps=("missing",))])
+
+
+class TestPredictionPipeline:
+    @pytest.mark.asyncio
+    async def test_offline_run_records_stage_timings(self):
+        set_llm_backend(ReplayBackend())
+        statuses = []
+
+        async def update_status(prediction_id, stage):
+            statuses.append(stage)
+
+        try:
+            result = await run_prediction_pipeline("dag", "2026 Malaysian General Election outcome?", update_status)
+        finally:
+            set_llm_backend(None)
+
+        timings = result["metadata"]["stage_timings"]
+        assert set(timings) == {"intent", "data", "gap_fill", "population", "simulation", "reasoning", "explanation"}
+        # The gap fill no longer sits in front of population synthesis
+        assert timings["gap_fill"]["started_at"] <= timings["population"]["ended_at"]
+        assert "gap_fills" in result["data"]
+        assert statuses[0] == "stage_1_done" and statuses[-1] == "completed"
+        assert statuses.index("stage_5_done") < statuses.index("stage_6_done")
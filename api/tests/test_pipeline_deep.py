@@ -1,24 +1,23 @@
 """Deep prediction pipeline tests."""
 
+from unittest.mock import AsyncMock, patch
+
 import pytest
-from unittest.mock import AsyncMock, patch, MagicMock
-import json
 
+from app.services.engines.debate_engine import DebateEngine
+from app.services.engines.ensemble import EnsembleAggregator
+from app.services.engines.mcts_engine import MCTSEngine, MCTSNode
+from app.services.population import Population
 from app.services.prediction_pipeline import (
-    stage_intent_parse,
+    MALAYSIA_SAMPLE_DATA,
+    _fallback_got_result,
     stage_data_collection,
+    stage_explanation,
+    stage_intent_parse,
     stage_pop_synthesizer,
     stage_simulation,
-    stage_got_reasoning,
-    stage_explanation,
-    stage_three_engine_reasoning,
-    _fallback_got_result,
-    MALAYSIA_SAMPLE_DATA,
 )
-from app.services.engines.mcts_engine import MCTSEngine, MCTSNode
-from app.services.engines.debate_engine import DebateEngine
-from app.services.engines.ensemble import EnsembleAggregator
-
+from app.services.simulation import StanceSimulation
 
 # ─── Stage 1: Intent Parser ───
 
@@ -88,7 +87,7 @@ async def test_pop_synthesizer_correct_count():
     """Generates exactly the requested number of agents."""
     data = MALAYSIA_SAMPLE_DATA
     result = await stage_pop_synthesizer(data, agent_count=100)
-    assert len(result["agents"]) == 100
+    assert len(Population.from_payload(result).agent_records()) == 100
 
 
 @pytest.mark.asyncio
@@ -96,7 +95,7 @@ async def test_pop_synthesizer_valid_demographics():
     """Agent demographics are valid."""
     data = MALAYSIA_SAMPLE_DATA
     result = await stage_pop_synthesizer(data, agent_count=200)
-    for agent in result["agents"]:
+    for agent in Population.from_payload(result).agent_records():
         assert 21 <= agent["age"] <= 75
         assert agent["ethnicity"] in ["Malay", "Chinese", "Indian", "Others"]
         assert agent["income"] in ["low", "medium", "high"]
@@ -109,11 +108,11 @@ async def test_pop_synthesizer_valid_demographics():
 async def test_pop_synthesizer_network_connected():
     """Social network has edges (no completely disconnected graph)."""
     data = MALAYSIA_SAMPLE_DATA
-    result = await stage_pop_synthesizer(data, agent_count=100)
-    assert len(result["network"]["edges"]) > 0
+    population = Population.from_payload(await stage_pop_synthesizer(data, agent_count=100))
+    assert population.edge_count > 0
     # Check edges reference valid agents
-    agent_ids = {a["id"] for a in result["agents"]}
-    for edge in result["network"]["edges"]:
+    agent_ids = {a["id"] for a in population.agent_records()}
+    for edge in population.edge_records():
         assert edge["source"] in agent_ids
         assert edge["target"] in agent_ids
 
@@ -135,9 +134,10 @@ async def test_simulation_stance_changes():
     """Some agents change stance during simulation."""
     data = MALAYSIA_SAMPLE_DATA
     pop = await stage_pop_synthesizer(data, agent_count=100)
-    initial_stances = [a["stance"] for a in pop["agents"]]
-    await stage_simulation(pop, ticks=30)
-    final_stances = [a["stance"] for a in pop["agents"]]
+    initial_stances = pop["agents"]["stance"].tolist()
+    sim = StanceSimulation(Population.from_payload(pop), seed=0)
+    sim.run(30)
+    final_stances = sim.stance.tolist()
     # At least some stances should have changed
     changes = sum(1 for i, f in zip(initial_stances, final_stances) if abs(i - f) > 0.01)
     assert changes > 0, "No agents changed stance in 30 ticks"
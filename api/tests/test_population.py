@@ -0,0 +1,63 @@
+"""Verify the vectorized population synthesizer."""
+
+import numpy as np
+import pytest
+
+from app.core.cache_codec import CacheCodec
+from app.services.population import NETWORK_WINDOW, Population, synthesize_population
+from app.services.prediction_pipeline import MALAYSIA_SAMPLE_DATA
+
+CENSUS = MALAYSIA_SAMPLE_DATA["census"]
+
+
+def test_seed_reproduces_population():
+    a = synthesize_population(CENSUS, 1000, seed=3)
+    b = synthesize_population(CENSUS, 1000, seed=3)
+    c = synthesize_population(CENSUS, 1000, seed=4)
+    assert a.agent_records() == b.agent_records()
+    assert a.edge_records() == b.edge_records()
+    assert a.agent_records() != c.agent_records()
+
+
+def test_attributes_follow_census():
+    pop = synthesize_population(CENSUS, 100_000, seed=1)
+    ethnicity = np.bincount(pop.agents["ethnicity"], minlength=4) / len(pop)
+    for code, name in enumerate(pop.categories["ethnicity"]):
+        assert ethnicity[code] == pytest.approx(CENSUS["ethnic_composition"][name], abs=0.01)
+    assert pop.agents["urban"].mean() == pytest.approx(CENSUS["urban_ratio"], abs=0.01)
+    assert set(np.unique(pop.agents["region"])) == set(range(len(CENSUS["regions"])))
+    assert pop.agents["age"].min() >= 21 and pop.agents["age"].max() <= 75
+
+
+def test_network_is_local_and_homophilous():
+    pop = synthesize_population(CENSUS, 50_000, seed=2)
+    source, target = pop.edges["source"], pop.edges["target"]
+    gap = target - source
+    assert gap.min() >= 1 and gap.max() < NETWORK_WINDOW
+    # Roughly one link per agent at the default window
+    assert 0.8 < pop.edge_count / len(pop) < 1.3
+    region = pop.agents["region"]
+    # Same-region pairs link at 0.2+ against a 0.05+ base, so they are overrepresented
+    same_region = (region[source] == region[target]).mean()
+    assert same_region > 2 / len(CENSUS["regions"])
+
+
+def test_payload_survives_checkpoint_encoding():
+    pop = synthesize_population(CENSUS, 200, seed=5)
+    codec = CacheCodec()
+    restored = Population.from_payload(codec.decode(codec.encode(pop.to_payload())))
+    assert restored.agents["stance"].dtype == np.float32
+    assert restored.agent_records() == pop.agent_records()
+    assert restored.edge_records() == pop.edge_records()
+
+
+def test_records_limit_keeps_edges_within_subset():
+    pop = synthesize_population(CENSUS, 500, seed=6)
+    edges = pop.edge_records(limit=50)
+    assert len(pop.agent_records(limit=50)) == 50
+    assert edges and all(e["source"] < 50 and e["target"] < 50 for e in edges)
+
+
+def test_memory_per_agent_is_small():
+    pop = synthesize_population(CENSUS, 100_000, seed=7)
+    assert pop.nbytes / len(pop) < 40
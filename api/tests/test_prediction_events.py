@@ -0,0 +1,107 @@
+"""Verify job progress events and the server-sent events endpoint."""
+
+import asyncio
+import json
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.core.auth import get_current_user
+from app.core.llm import set_llm_backend
+from app.core.llm_backends import ReplayBackend
+from app.main import app
+from app.services.jobs import COMPLETED, InMemoryJobQueue
+from app.services.jobs.queue import _deliver
+from app.services.prediction_pipeline import (
+    MALAYSIA_SAMPLE_DATA,
+    stage_three_engine_reasoning,
+)
+
+QUERY = "2026 Malaysian General Election outcome?"
+
+
+def _parse_sse(text: str) -> list[tuple[str, dict]]:
+    events = []
+    for block in text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":"))
+        if "event" in lines:
+            events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+class TestJobEvents:
+    @pytest.mark.asyncio
+    async def test_subscribers_see_progress(self):
+        queue = InMemoryJobQueue()
+        await queue.enqueue("k", {}, job_id="a")
+        async with queue.subscribe("a") as events:
+            job = await queue.claim("w")
+            await queue.progress("a", stage="stage_1_done", partial={"got": {"outcomes": [1]}})
+            await queue.finish(job, COMPLETED, result={})
+            seen = [await events.next(0.1) for _ in range(4)]
+        assert [e["type"] for e in seen] == ["started", "stage", "partial", "finished"]
+        assert seen[2]["partial"] == {"got": {"outcomes": [1]}}
+        assert await events.next(0.01) is None
+
+    @pytest.mark.asyncio
+    async def test_slow_subscriber_drops_oldest(self):
+        events = asyncio.Queue(maxsize=2)
+        for i in range(3):
+            _deliver(events, {"stage": f"s{i}"})
+        assert [events.get_nowait()["stage"] for _ in range(2)] == ["s1", "s2"]
+
+    @pytest.mark.asyncio
+    async def test_engine_completions_are_reported(self):
+        set_llm_backend(ReplayBackend())
+        seen = []
+
+        async def update_substage(prediction_id, event):
+            if event["field"] == "status":
+                seen.append((event["engine"], event["value"]))
+
+        task = {"outcomes": ["PH wins", "PN wins"], "type": "election"}
+        sim = {"agent_count": 10, "ticks": [], "final_distribution": {"government_support": 0.5, "opposition_support": 0.5}}
+        try:
+            await stage_three_engine_reasoning(task, MALAYSIA_SAMPLE_DATA, sim, {}, update_substage=update_substage)
+        finally:
+            set_llm_backend(None)
+        assert sorted(seen) == [("debate", "completed"), ("got", "completed"), ("mcts", "completed")]
+
+
+class TestEventStream:
+    @pytest.fixture
+    async def api(self):
+        app.dependency_overrides[get_current_user] = lambda: {"id": "sse-user"}
+        set_llm_backend(ReplayBackend())
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            yield client
+        set_llm_backend(None)
+        app.dependency_overrides.pop(get_current_user, None)
+
+    @pytest.mark.asyncio
+    async def test_streams_run_to_completion(self, api):
+        prediction_id = (await api.post("/api/v1/predictions/create", json={"query": QUERY})).json()["id"]
+        resp = await api.get(f"/api/v1/predictions/{prediction_id}/events")
+        assert resp.headers["content-type"].startswith("text/event-stream")
+        events = _parse_sse(resp.text)
+
+        assert events[0][0] == "status"
+        assert events[-1] == ("done", {"status": "completed", "error": None, "reused_from": None})
+        stages = [data["stage"] for name, data in events if name == "stage"]
+        assert "stage_5_done" in stages and "completed" in stages
+        engines = {name for kind, data in events if kind == "partial" for name in data["partial"]}
+        assert {"got", "mcts", "debate"} <= engines
+
+    @pytest.mark.asyncio
+    async def test_finished_prediction_closes_immediately(self, api):
+        first = (await api.post("/api/v1/predictions/create", json={"query": QUERY})).json()["id"]
+        await api.get(f"/api/v1/predictions/{first}/events")
+        # Reused result: already complete on connect
+        second = (await api.post("/api/v1/predictions/create", json={"query": QUERY})).json()["id"]
+        events = _parse_sse((await api.get(f"/api/v1/predictions/{second}/events")).text)
+        assert [name for name, _ in events] == ["status", "done"]
+        assert events[-1][1]["reused_from"] == first
+
+    @pytest.mark.asyncio
+    async def test_unknown_prediction(self, api):
+        assert (await api.get("/api/v1/predictions/missing/events")).status_code == 404
@@ -0,0 +1,203 @@
+"""Verify the GCRA rate limiter: limits, route costs and bounded memory."""
+
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from httpx import ASGITransport, AsyncClient
+
+from app.core.config import settings
+from app.core.rate_limit import LocalRateLimiter, RedisRateLimiter, gcra, route_cost
+from app.core.security import RateLimitMiddleware, rate_limit_key
+from tests.conftest import make_auth_headers
+
+
+class TestGCRA:
+    def test_burst_then_deny(self):
+        limiter = LocalRateLimiter(limit=5, window=10)
+        results = [limiter.hit("ip", now=100.0) for _ in range(6)]
+        assert [r.allowed for r in results] == [True] * 5 + [False]
+        assert results[0].remaining == 4
+        assert results[4].remaining == 0
+        # One request's worth of allowance returns after window / limit seconds
+        assert results[5].retry_after == pytest.approx(2.0)
+
+    def test_recovers_over_time(self):
+        limiter = LocalRateLimiter(limit=5, window=10)
+        for _ in range(5):
+            limiter.hit("ip", now=100.0)
+        assert not limiter.hit("ip", now=101.0).allowed
+        assert limiter.hit("ip", now=102.0).allowed
+        assert not limiter.hit("ip", now=102.0).allowed
+
+    def test_keys_are_independent(self):
+        limiter = LocalRateLimiter(limit=1, window=10)
+        assert limiter.hit("a", now=0.0).allowed
+        assert limiter.hit("b", now=0.0).allowed
+        assert not limiter.hit("a", now=0.0).allowed
+
+    def test_cost_weights(self):
+        limiter = LocalRateLimiter(limit=60, window=60)
+        assert limiter.hit("ip", cost=50, now=0.0).allowed
+        assert not limiter.hit("ip", cost=11, now=0.0).allowed
+        assert limiter.hit("ip", cost=10, now=0.0).allowed
+
+    def test_denied_request_does_not_consume(self):
+        result, tat = gcra(tat=20.0, now=10.0, cost=1, limit=1, window=10)
+        assert not result.allowed
+        assert tat == 20.0
+
+
+class TestBoundedMemory:
+    def test_idle_keys_swept(self):
+        limiter = LocalRateLimiter(limit=10, window=10, sweep_interval=5)
+        for i in range(1000):
+            limiter.hit(f"10.0.{i // 256}.{i % 256}", now=0.0)
+        assert len(limiter) == 1000
+        # Each key used 1s of allowance; by t=6 all have recovered
+        limiter.hit("fresh", now=6.0)
+        assert len(limiter) == 1
+        assert limiter.stats["evicted"] == 1000
+
+    def test_active_keys_survive_sweep(self):
+        limiter = LocalRateLimiter(limit=2, window=10, sweep_interval=1)
+        limiter.hit("idle", now=0.0)
+        limiter.hit("busy", now=4.0)
+        limiter.hit("busy", now=4.0)
+        limiter.sweep(now=6.0)
+        assert len(limiter) == 1
+        assert not limiter.hit("busy", now=6.0).allowed
+
+    def test_max_keys_cap(self):
+        limiter = LocalRateLimiter(limit=10, window=60, max_keys=100)
+        for i in range(500):
+            limiter.hit(f"k{i}", now=1.0)
+        assert len(limiter) == 100
+
+
+def test_route_cost_lookup():
+    costs = {"POST /api/v1/predictions/create": 10}
+    assert route_cost(costs, "POST", "/api/v1/predictions/create") == 10
+    assert route_cost(costs, "GET", "/api/v1/predictions/create") == 1
+    assert route_cost(costs, "GET", "/health") == 1
+
+
+class TestRedisLimiter:
+    """Shared limiter: Lua script through Redis, local fallback when it is down."""
+
+    @pytest.mark.asyncio
+    async def test_falls_back_without_redis(self):
+        limiter = RedisRateLimiter(limit=2, window=60)
+        results = [await limiter.hit("ip:1.2.3.4") for _ in range(3)]
+        assert [r.allowed for r in results] == [True, True, False]
+        assert limiter.stats["fallback"] == 3
+
+    @pytest.mark.asyncio
+    async def test_uses_script_result(self, monkeypatch):
+        script = AsyncMock(return_value=[0, 0, 1500, 60000])
+        redis_client = MagicMock()
+        redis_client.register_script.return_value = script
+        monkeypatch.setattr("app.core.cache.get_redis", AsyncMock(return_value=redis_client))
+
+        limiter = RedisRateLimiter(limit=60, window=60)
+        result = await limiter.hit("user:abc", cost=10)
+        assert not result.allowed
+        assert result.retry_after == 1.5
+        assert result.reset_after == 60.0
+        script.assert_awaited_once_with(keys=["ratelimit:user:abc"], args=[10, 60, 60000])
+        assert limiter.stats == {"redis": 1, "fallback": 0, "denied": 1}
+
+    @pytest.mark.asyncio
+    async def test_script_error_falls_back(self, monkeypatch):
+        redis_client = MagicMock()
+        redis_client.register_script.return_value = AsyncMock(side_effect=ConnectionError("down"))
+        monkeypatch.setattr("app.core.cache.get_redis", AsyncMock(return_value=redis_client))
+
+        limiter = RedisRateLimiter(limit=5, window=60)
+        assert (await limiter.hit("ip:x")).allowed
+        assert limiter.stats["fallback"] == 1
+
+
+class TestRateLimitKey:
+    def test_verified_token_keys_by_user(self, monkeypatch):
+        monkeypatch.setattr(settings, "supabase_anon_key", "test-secret")
+        headers = make_auth_headers(user_id="u-42", secret="test-secret")
+        assert rate_limit_key(headers["Authorization"], "1.2.3.4") == "user:u-42"
+
+    def test_forged_token_keys_by_ip(self, monkeypatch):
+        monkeypatch.setattr(settings, "supabase_anon_key", "test-secret")
+        forged = make_auth_headers(user_id="victim", secret="wrong-secret")
+        assert rate_limit_key(forged["Authorization"], "1.2.3.4") == "ip:1.2.3.4"
+        assert rate_limit_key(None, "1.2.3.4") == "ip:1.2.3.4"
+
+
+def _limited_app(max_requests: int, costs: dict | None = None) -> FastAPI:
+    inner = FastAPI()
+
+    @inner.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    @inner.post("/expensive")
+    async def expensive():
+        return {"ok": True}
+
+    @inner.get("/stream")
+    async def stream():
+        async def chunks():
+            for i in range(3):
+                yield f"data: {i}\n\n"
+        return StreamingResponse(chunks(), media_type="text/event-stream")
+
+    inner.add_middleware(RateLimitMiddleware, max_requests=max_requests, window=60, costs=costs or {})
+    return inner
+
+
+@pytest.fixture
+def local_limits(monkeypatch):
+    monkeypatch.setattr(settings, "rate_limit_redis", False)
+
+
+class TestMiddleware:
+    async def _client(self, app: FastAPI, ip: str = "10.0.0.1") -> AsyncClient:
+        return AsyncClient(transport=ASGITransport(app=app, client=(ip, 5000)), base_url="http://test")
+
+    @pytest.mark.asyncio
+    async def test_headers_and_429(self, local_limits):
+        async with await self._client(_limited_app(2)) as ac:
+            first = await ac.get("/ping")
+            await ac.get("/ping")
+            denied = await ac.get("/ping")
+        assert first.status_code == 200
+        assert first.headers["x-ratelimit-limit"] == "2"
+        assert first.headers["x-ratelimit-remaining"] == "1"
+        assert int(first.headers["x-ratelimit-reset"]) > 0
+        assert denied.status_code == 429
+        assert denied.json() == {"detail": "Rate limit exceeded"}
+        assert denied.headers["retry-after"] == "30"
+        assert denied.headers["x-ratelimit-remaining"] == "0"
+
+    @pytest.mark.asyncio
+    async def test_route_costs_applied(self, local_limits):
+        app = _limited_app(10, costs={"POST /expensive": 8})
+        async with await self._client(app) as ac:
+            assert (await ac.post("/expensive")).status_code == 200
+            assert (await ac.post("/expensive")).status_code == 429
+            assert (await ac.get("/ping")).status_code == 200
+
+    @pytest.mark.asyncio
+    async def test_streaming_passes_through(self, local_limits):
+        async with await self._client(_limited_app(5)) as ac:
+            resp = await ac.get("/stream")
+        assert resp.status_code == 200
+        assert resp.text == "data: 0\n\ndata: 1\n\ndata: 2\n\n"
+        assert resp.headers["x-ratelimit-limit"] == "5"
+
+    @pytest.mark.asyncio
+    async def test_local_clients_exempt(self, local_limits):
+        async with await self._client(_limited_app(1), ip="127.0.0.1") as ac:
+            for _ in range(3):
+                resp = await ac.get("/ping")
+                assert resp.status_code == 200
+        assert "x-ratelimit-limit" not in resp.headers
@@ -0,0 +1,186 @@
+"""Verify incremental and numeric what-if reruns and rerun sessions."""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.core.llm import set_llm_backend
+from app.core.llm_backends import ReplayBackend
+from app.services.prediction_pipeline import (
+    MALAYSIA_SAMPLE_DATA,
+    rerun_with_variables,
+    stage_three_engine_reasoning,
+)
+from app.services.rerun_sessions import get_rerun_session
+
+TASK = {"type": "election", "region": "MY", "outcomes": ["PH wins", "PN wins"], "key_variables": ["GDP Growth", "Oil Price"]}
+SIM = {"agent_count": 10, "ticks": [], "final_distribution": {"government_support": 0.6, "opposition_support": 0.4}}
+VARIABLES = [
+    {"name": "GDP Growth", "current": MALAYSIA_SAMPLE_DATA["economic"]["gdp_growth"], "range": [-10, 100], "impact": 0.4},
+    {"name": "Oil Price", "current": 0, "range": [-10, 100], "impact": 0.2},
+]
+
+
+class CountingBackend(ReplayBackend):
+    calls = 0
+
+    async def complete(self, *args, **kwargs):
+        CountingBackend.calls += 1
+        return await super().complete(*args, **kwargs)
+
+    async def stream(self, *args, **kwargs):
+        CountingBackend.calls += 1
+        async for chunk in super().stream(*args, **kwargs):
+            yield chunk
+
+
+@pytest.fixture
+async def previous():
+    CountingBackend.calls = 0
+    set_llm_backend(CountingBackend())
+    three_engine = await stage_three_engine_reasoning(TASK, MALAYSIA_SAMPLE_DATA, SIM, {})
+    CountingBackend.calls = 0
+    yield {
+        "outcomes": three_engine["outcomes"],
+        "causal_graph": three_engine["causal_graph"],
+        "reasoning": {"got_tree": [], "shap_factors": [], "explanation_text": "original"},
+        "engines": three_engine["engines"],
+        "variables": VARIABLES,
+        "metadata": {"engine_inputs": three_engine["engine_inputs"]},
+    }
+    set_llm_backend(None)
+
+
+async def _rerun(previous, variables, **kwargs):
+    return await rerun_with_variables(
+        TASK, MALAYSIA_SAMPLE_DATA, {}, variables, sim_result=SIM, previous=previous, **kwargs,
+    )
+
+
+@pytest.mark.asyncio
+async def test_unaffected_engines_are_reused(previous):
+    # Oil price is not an input of any engine
+    result = await _rerun(previous, {"Oil Price": 80})
+    assert result["reused_engines"] == ["debate", "got", "mcts"]
+    assert result["engines"]["mcts"] == previous["engines"]["mcts"]
+    # Only the explanation is recomputed
+    assert CountingBackend.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_changed_inputs_rerun_once(previous):
+    first = await _rerun(previous, {"GDP Growth": 7.5})
+    assert first["mode"] == "incremental"
+    assert first["reused_engines"] == []
+    calls = CountingBackend.calls
+    assert calls > 1
+
+    # Moving the slider back to a seen position is served from cache
+    again = await _rerun(previous, {"GDP Growth": 7.5})
+    assert CountingBackend.calls == calls
+    assert again["outcomes"] == first["outcomes"]
+
+
+@pytest.mark.asyncio
+async def test_fallbacks_are_not_cached(previous):
+    down = AsyncMock(side_effect=ConnectionError("provider down"))
+    with patch("app.services.prediction_pipeline.call_llm_json", down), \
+         patch("app.services.engines.mcts_engine.call_llm_json", down), \
+         patch("app.services.engines.debate_engine.call_llm_json", down):
+        outage = await _rerun(previous, {"GDP Growth": 9.5})
+    assert outage["engines"]["got"]["source"] == "fallback"
+
+    recovered = await _rerun(previous, {"GDP Growth": 9.5})
+    assert recovered["engines"]["got"].get("source") != "fallback"
+    assert recovered["reasoning"]["explanation_text"] != outage["reasoning"]["explanation_text"]
+
+
+@pytest.mark.asyncio
+async def test_numeric_mode_makes_no_llm_calls(previous):
+    baseline = await _rerun(previous, {}, mode="numeric")
+    higher = await _rerun(previous, {"GDP Growth": 50}, mode="numeric")
+    lower = await _rerun(previous, {"GDP Growth": -5}, mode="numeric")
+    assert CountingBackend.calls == 0
+
+    assert higher["approximate"] and higher["mode"] == "numeric"
+    probs = [{o["name"]: o["probability"] for o in r["outcomes"]} for r in (lower, baseline, higher)]
+    assert probs[0]["PH wins"] < probs[1]["PH wins"] < probs[2]["PH wins"]
+    assert sum(probs[2].values()) == pytest.approx(1, abs=1e-3)
+    assert higher["reasoning"] == previous["reasoning"]
+
+
+class TestRerunSession:
+    @pytest.mark.asyncio
+    async def test_burst_is_debounced_to_last_request(self):
+        session = get_rerun_session("debounce")
+        started, stored = [], []
+
+        def _runner(value):
+            async def _run():
+                started.append(value)
+                return {"value": value}
+            return _run
+
+        results = await asyncio.gather(*(
+            session.submit(_runner(v), on_result=stored.append, debounce=0.05) for v in range(5)
+        ))
+        assert started == [4]
+        assert stored == [{"value": 4}]
+        assert results[-1] == {"value": 4}
+        assert all(r == {"value": 4, "superseded": True} for r in results[:-1])
+
+    @pytest.mark.asyncio
+    async def test_superseded_run_is_cancelled_and_never_stored(self):
+        session = get_rerun_session("cancel")
+        release = asyncio.Event()
+        cancelled, stored = [], []
+
+        async def _slow():
+            try:
+                await release.wait()
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+            return {"value": "old"}
+
+        async def _fast():
+            return {"value": "new"}
+
+        first = asyncio.ensure_future(session.submit(_slow, on_result=stored.append))
+        await asyncio.sleep(0.01)
+        second = await session.submit(_fast, on_result=stored.append)
+        release.set()
+
+        assert cancelled == [True]
+        assert second == {"value": "new"}
+        assert (await first)["value"] == "new"
+        assert stored == [{"value": "new"}]
+
+    @pytest.mark.asyncio
+    async def test_error_reaches_superseded_waiters(self):
+        session = get_rerun_session("error")
+
+        async def _fail():
+            raise RuntimeError("engines down")
+
+        with pytest.raises(RuntimeError):
+            await asyncio.gather(session.submit(_fail, debounce=0.01), session.submit(_fail, debounce=0.01))
+
+    @pytest.mark.asyncio
+    async def test_cancellation_stops_llm_calls(self):
+        CountingBackend.calls = 0
+        set_llm_backend(CountingBackend(latency_median=0.05, latency_sigma=0.01))
+        try:
+            run = asyncio.ensure_future(rerun_with_variables(TASK, MALAYSIA_SAMPLE_DATA, {}, {"GDP Growth": 9.1}, sim_result=SIM))
+            await asyncio.sleep(0.12)
+            run.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await run
+            calls = CountingBackend.calls
+            assert calls > 0
+            await asyncio.sleep(0.3)
+            # MCTS, the debate and GoT all stopped with the rerun
+            assert CountingBackend.calls == calls
+        finally:
+            set_llm_backend(None)
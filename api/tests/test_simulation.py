@@ -0,0 +1,89 @@
+"""Verify sparse stance propagation and what the pipeline shows of it."""
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.core.llm import set_llm_backend
+from app.core.llm_backends import ReplayBackend
+from app.services import simulation
+from app.services.checkpoints import load_checkpoints
+from app.services.population import synthesize_population
+from app.services.prediction_pipeline import (
+    MALAYSIA_SAMPLE_DATA,
+    run_prediction_pipeline,
+    stage_simulation,
+)
+from app.services.simulation import StanceSimulation
+
+CENSUS = MALAYSIA_SAMPLE_DATA["census"]
+
+
+def _direct_step(pop, stance):
+    """One synchronous tick without noise, computed agent by agent."""
+    neighbors = {i: [] for i in range(len(pop))}
+    for s, t, w in zip(*(pop.edges[c].tolist() for c in ("source", "target", "weight"))):
+        neighbors[s].append((t, w))
+        neighbors[t].append((s, w))
+    new = list(stance)
+    for i, links in neighbors.items():
+        if links:
+            influence = sum(stance[j] * w for j, w in links) / max(sum(w for _, w in links), 0.01)
+            new[i] = 0.7 * stance[i] + 0.3 * influence
+    return [max(-1, min(1, s)) for s in new]
+
+
+def test_tick_matches_direct_computation(monkeypatch):
+    monkeypatch.setattr(simulation, "NOISE_RATE", 0.0)
+    pop = synthesize_population(CENSUS, 300, seed=1)
+    sim = StanceSimulation(pop)
+    expected = pop.agents["stance"].tolist()
+    for _ in range(5):
+        sim.step()
+        expected = _direct_step(pop, expected)
+    assert sim.stance.tolist() == pytest.approx(expected, abs=1e-5)
+
+
+def test_isolated_agents_keep_stance_without_noise(monkeypatch):
+    monkeypatch.setattr(simulation, "NOISE_RATE", 0.0)
+    pop = synthesize_population(CENSUS, 200, seed=2, window=1)
+    assert pop.edge_count == 0
+    sim = StanceSimulation(pop)
+    sim.run(10)
+    assert np.array_equal(sim.stance, pop.agents["stance"])
+
+
+def test_seeded_runs_are_reproducible():
+    pop = synthesize_population(CENSUS, 5000, seed=3)
+    a, b = StanceSimulation(pop, seed=9).run(20), StanceSimulation(pop, seed=9).run(20)
+    assert a["ticks"] == b["ticks"]
+    assert np.array_equal(a["final_stance"], b["final_stance"])
+
+
+@pytest.mark.asyncio
+async def test_stage_output_shape_and_population_untouched():
+    pop = synthesize_population(CENSUS, 20_000, seed=4).to_payload()
+    before = pop["agents"]["stance"].copy()
+    result = await stage_simulation(pop, ticks=15, seed=0)
+    assert [t["tick"] for t in result["ticks"]] == list(range(15))
+    assert result["agent_count"] == 20_000
+    fd = result["final_distribution"]
+    assert fd["government_support"] + fd["opposition_support"] == pytest.approx(1)
+    assert np.array_equal(pop["agents"]["stance"], before)
+
+
+@pytest.mark.asyncio
+async def test_visualized_agents_show_simulated_stances(monkeypatch):
+    monkeypatch.setattr(settings, "pipeline_agent_count", 300)
+    set_llm_backend(ReplayBackend())
+    try:
+        result = await run_prediction_pipeline("sim-stances", "Who will win the 2026 Malaysian General Election?")
+    finally:
+        set_llm_backend(None)
+    checkpoints = await load_checkpoints("sim-stances")
+    initial = checkpoints["population"]["agents"]["stance"]
+    final = checkpoints["simulation"]["final_stance"]
+    shown = [a["stance"] for a in result["metadata"]["agent_histories"]]
+    assert shown == pytest.approx(list(final), abs=1e-6)
+    assert shown != pytest.approx(list(initial), abs=1e-3)
+    assert "final_stance" not in result["engines"].get("simulation", {})